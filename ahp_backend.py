@@ -1,16 +1,67 @@
 
 import os
+import re
 import json
-import pandas as pd
+import pickle
+import threading
 import zipfile
 from datetime import datetime
+from functools import lru_cache
+from ahp_integrity import check_integrity, summarise_integrity
+
+# --- Process-wide read cache, shared by every browser session ---
+# path -> ((mtime_ns, size), parsed value). Entries are re-parsed when the file
+# changes on disk and dropped by the write paths in this module.
+_JSON_CACHE = {}
+_JSON_CACHE_LOCK = threading.Lock()
+_CONTAINERS = (dict, list)
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def read_json_shared(path, default=None, prepare=None):
+    """
+    Parsed JSON file shared across sessions, parsed once per change. The value is
+    shared: callers must not mutate it (use copy_json for a private copy).
+    prepare(value) runs once per parse and its result is what gets cached.
+    """
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return default
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    # One parse per change even when many sessions miss at once
+    with _JSON_CACHE_LOCK:
+        cached = _JSON_CACHE.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with open(path, "r") as f:
+            value = json.load(f)
+        if prepare is not None:
+            value = prepare(value)
+        _JSON_CACHE[path] = (stamp, value)
+        return value
+
+def invalidate_json_cache(path=None):
+    with _JSON_CACHE_LOCK:
+        if path is None:
+            _JSON_CACHE.clear()
+        else:
+            _JSON_CACHE.pop(path, None)
+
+def copy_json(value):
+    """Private deep copy of parsed JSON data"""
+    return pickle.loads(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
 
 FORCES_FILE = "forces.json"
 def load_forces():
-    if os.path.exists(FORCES_FILE):
-        with open(FORCES_FILE, "r") as f:
-            return json.load(f)
-    return ["blue", "red"]
+    forces = read_json_shared(FORCES_FILE)
+    return list(forces) if forces is not None else ["blue", "red"]
 
 PROJECTS_DIR = "projects"
 ARCHIVE_DIR = "archive"
@@ -39,6 +90,68 @@ DEFAULT_STRUCTURE = {
     "control": {}
 }
 
+# --- Natural / hierarchical ordering ---
+SORT_FIELDS = {"phases": "Phase No", "objectives": "Objective No", "dps": "DP No", "tasks": "Task No"}
+_SORT_TOKEN = re.compile(r"\d+|[^\W\d_]+")
+
+@lru_cache(maxsize=None)
+def _natural_key(text):
+    tokens = _SORT_TOKEN.findall(text)
+    if not tokens:
+        return ((2, text),)
+    return tuple((0, int(token)) if token.isdigit() else (1, token.lower()) for token in tokens)
+
+def natural_sort_key(value):
+    """
+    Sort key for labels such as 3, "3.2.1", "3.10" and "DP-3a": numeric parts compare
+    as numbers and separators are ignored. Parsed once per distinct label.
+    Blank values sort last.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return ((3, ""),)
+    return _natural_key(str(value).strip())
+
+def _section_order(items, field):
+    """(numbering values, index array in natural order) for one section"""
+    keys = tuple(item.get(field) for item in items)
+    return keys, sorted(range(len(keys)), key=lambda i: natural_sort_key(keys[i]))
+
+def build_sort_orders(data):
+    """Pre-sorted index arrays per section, by that section's numbering field"""
+    return {section: _section_order(data.get(section, []), field) for section, field in SORT_FIELDS.items()}
+
+def get_sort_order(data, section):
+    """
+    Index array of a section in natural order. Built at load time and kept with
+    the numbering values it was sorted on; rebuilt only when those values change
+    (records added, removed or renumbered).
+    """
+    items, field = data.get(section, []), SORT_FIELDS[section]
+    cached = data.get("_order", {}).get(section)
+    if cached is not None and len(cached[0]) == len(items) and all(
+            a is b or a == b for a, b in zip(cached[0], (item.get(field) for item in items))):
+        return cached[1]
+    entry = _section_order(items, field)
+    data.setdefault("_order", {})[section] = entry
+    return entry[1]
+
+def get_sorted_items(data, section):
+    items = data.get(section, [])
+    return [items[i] for i in get_sort_order(data, section)]
+
+def get_dp_group_order(data, dp_nos):
+    """
+    DP numbers (as grouped by str(DP No)) in the plan's DP order, without re-sorting;
+    numbers with no matching DP, such as "Unassigned", follow in natural order.
+    """
+    wanted, ordered = set(dp_nos), []
+    for dp in get_sorted_items(data, "dps"):
+        dp_no = str(dp.get("DP No"))
+        if dp_no in wanted:
+            ordered.append(dp_no)
+            wanted.discard(dp_no)
+    return ordered + sorted(wanted, key=natural_sort_key)
+
 def get_project_path(project_name, side):
     return os.path.join(PROJECTS_DIR, f"{project_name}_{side}.json")
 
@@ -54,7 +167,15 @@ def list_projects():
             projects.add(name)
     return sorted(list(projects))
 
-def load_project(project_name, side):
+def _prepare_snapshot(data):
+    """Run once per parse: typed numerics, sort orders, and which sections hold nested records"""
+    report = normalise_numeric_fields(data)
+    data["_order"] = build_sort_orders(data)
+    nested = {key for key, value in data.items() if isinstance(value, list)
+              and any(type(v) in _CONTAINERS for item in value if type(item) is dict for v in item.values())}
+    return {"data": data, "report": report, "nested": nested}
+
+def _snapshot(project_name, side):
     path = get_project_path(project_name, side)
     if not os.path.exists(path):
         data = DEFAULT_STRUCTURE.copy()
@@ -62,14 +183,86 @@ def load_project(project_name, side):
         data["metadata"]["name"] = project_name
         data["metadata"]["created"] = datetime.now().isoformat()
         save_project(project_name, side, data)
-    with open(path, "r") as f:
-        return json.load(f)
+    snapshot = read_json_shared(path, prepare=_prepare_snapshot)
+    _NORMALISATION_REPORTS[(project_name, side)] = snapshot["report"]
+    return snapshot
+
+def get_project_snapshot(project_name, side):
+    """Shared, already-normalised project data for read-only use (rollups, search, summaries)"""
+    return _snapshot(project_name, side)["data"]
+
+def load_project(project_name, side):
+    """Private copy of the project: the shared snapshot copied record by record, safe to mutate"""
+    snapshot = _snapshot(project_name, side)
+    data = {}
+    for key, value in snapshot["data"].items():
+        if type(value) is list and key not in snapshot["nested"]:
+            # Records of flat sections hold only scalars, so one dict() per record is a full copy
+            data[key] = [dict(item) if type(item) is dict else copy_json(item) if type(item) is list else item
+                         for item in value]
+        elif type(value) in _CONTAINERS:
+            data[key] = copy_json(value)
+        else:
+            data[key] = value
+    return data
 
 def save_project(project_name, side, data):
     data["metadata"]["modified"] = datetime.now().isoformat()
     path = get_project_path(project_name, side)
     with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+        # Sort orders are derived at load time and never written to disk
+        json.dump({key: value for key, value in data.items() if key != "_order"}, f, indent=2)
+    invalidate_json_cache(path)
+    if "_order" in data:
+        data["_order"] = build_sort_orders(data)
+    _SAVE_COUNTERS[(project_name, side)] = _SAVE_COUNTERS.get((project_name, side), 0) + 1
+    _INTEGRITY_REPORTS[(project_name, side)] = (get_data_version(project_name, side), check_integrity(data))
+
+# (project, side) -> (data version, integrity issues); rebuilt when the file changes, whoever changed it
+_INTEGRITY_REPORTS = {}
+
+def get_integrity_report(project_name, side, data=None):
+    """Integrity issues for the project as it is on disk; data, if given, must be that version"""
+    key = (project_name, side)
+    version = get_data_version(project_name, side)
+    cached = _INTEGRITY_REPORTS.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    issues = check_integrity(data if data is not None else get_project_snapshot(project_name, side))
+    _INTEGRITY_REPORTS[key] = (version, issues)
+    return issues
+
+SUMMARY_SECTIONS = ["phases", "objectives", "dps", "tasks"]
+
+# (project, side) -> row counts and integrity counts, rebuilt only when the data version changes
+_PROJECT_SUMMARIES = {}
+
+def get_project_summary(project_name, side):
+    """Row counts per section and integrity error/warning counts, without keeping the project in memory"""
+    key = (project_name, side)
+    version = get_data_version(project_name, side)
+    cached = _PROJECT_SUMMARIES.get(key)
+    if cached and cached["version"] == version:
+        return cached
+    data = get_project_snapshot(project_name, side)
+    issues = check_integrity(data)
+    _INTEGRITY_REPORTS[key] = (get_data_version(project_name, side), issues)
+    summary = {
+        "version": get_data_version(project_name, side),
+        "counts": {section: len(data.get(section, [])) for section in SUMMARY_SECTIONS},
+        "integrity": summarise_integrity(issues)
+    }
+    _PROJECT_SUMMARIES[key] = summary
+    return summary
+
+# Bumped on every save so derived caches (theater rollups etc.) know when to rebuild
+_SAVE_COUNTERS = {}
+
+def get_data_version(project_name, side):
+    """In-process save counter plus file mtime; changes whenever the project file changes"""
+    path = get_project_path(project_name, side)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return (_SAVE_COUNTERS.get((project_name, side), 0), mtime)
 
 def archive_project(project_name):
     for side in SIDES:
@@ -77,6 +270,7 @@ def archive_project(project_name):
         dst = get_archive_path(project_name, side)
         if os.path.exists(src):
             os.replace(src, dst)
+            invalidate_json_cache(src)
 
 def delete_project(project_name):
     """Move ALL project files to archive instead of deleting - dismounts from active projects"""
@@ -88,26 +282,29 @@ def delete_project(project_name):
             dst = os.path.join(ARCHIVE_DIR, f)
             if os.path.exists(src):
                 os.replace(src, dst)
+                invalidate_json_cache(src)
 
 def export_project_json(project_name, side):
     data = load_project(project_name, side)
+    data.pop("_order", None)
     path = f"{project_name}_{side}_export.json"
     with open(path, "w") as f:
         json.dump(data, f, indent=2)
     return path
 
 def export_project_excel(project_name, side):
+    import pandas as pd
     data = load_project(project_name, side)
-    writer = pd.ExcelWriter(f"{project_name}_{side}_export.xlsx", engine="openpyxl")
-    for key in ["phases", "objectives", "dps", "tasks"]:
-        df = pd.DataFrame(data.get(key, []))
-        df.to_excel(writer, sheet_name=key.capitalize(), index=False)
-    writer.save()
-    return writer.path
-
-def export_project_zip(project_name):
+    path = f"{project_name}_{side}_export.xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for key in ["phases", "objectives", "dps", "tasks"]:
+            df = pd.DataFrame(data.get(key, []))
+            df.to_excel(writer, sheet_name=key.capitalize(), index=False)
+    return path
+
+def export_project_zip(project_name, sides=None):
     files = []
-    for side in SIDES:
+    for side in (SIDES if sides is None else sides):
         json_path = export_project_json(project_name, side)
         excel_path = export_project_excel(project_name, side)
         files.extend([json_path, excel_path])
@@ -121,6 +318,7 @@ def export_project_zip(project_name):
 
 def import_from_single_sheet(data, df):
     """Import data from a single sheet containing all information"""
+    import pandas as pd
     # Extract unique phases
     if 'Phase' in df.columns:
         unique_phases = df['Phase'].dropna().unique()
@@ -285,6 +483,7 @@ def import_from_single_sheet(data, df):
                     data['tasks'].append(task_entry)
 
 def import_excel_to_project(project_name, side, excel_path):
+    import pandas as pd
     data = load_project(project_name, side)
     xls = None
     try:
@@ -311,8 +510,10 @@ def import_excel_to_project(project_name, side, excel_path):
             if has_user_format:
                 # Process single-sheet format
                 import_from_single_sheet(data, df)
+                report = normalise_numeric_fields(data)
+                _NORMALISATION_REPORTS[(project_name, side)] = report
                 save_project(project_name, side, data)
-                return
+                return report
         
         # Otherwise, use multi-sheet format
         sheet_map = {
@@ -594,7 +795,10 @@ def import_excel_to_project(project_name, side, excel_path):
                     data[key] = standardized_data
                 else:
                     data[key] = df.to_dict(orient="records")
+        report = normalise_numeric_fields(data)
+        _NORMALISATION_REPORTS[(project_name, side)] = report
         save_project(project_name, side, data)
+        return report
     finally:
         # Ensure Excel file handle is properly closed
         if xls is not None:
@@ -649,6 +853,93 @@ def compute_progress(data):
         "phase": phase_progress
     }
 
+def parse_numeric(value, default=0.0):
+    """Parse ints, floats, "20" / "20%" strings and NaN leftovers into a float"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return default if value != value else float(value)
+    try:
+        text = str(value).strip().replace('%', '')
+        if not text:
+            return default
+        number = float(text)
+        return default if number != number else number
+    except ValueError:
+        return default
+
+# --- Typed numeric normalisation (run once at import / load) ---
+# Weight fields in the precedence the UI and rollups read them; all are normalised
+TASK_WEIGHT_FIELDS = ["stated", "Weight", "weight", "Stated %", "Wt", "wt"]
+TASK_PROGRESS_FIELDS = ["Achieved %", "Progress", "progress", "achieved", "Progress %", "Actual Progress"]
+DP_WEIGHT_FIELDS = ["Weight", "weight", "Weightage Factor"]
+
+# (project, side) -> issues found the last time the project was loaded or imported
+_NORMALISATION_REPORTS = {}
+
+def to_number(value):
+    """
+    Convert a stored weight/progress value to int (when integral) or float.
+    Returns (number, issue); number is None when the value is blank or unparseable.
+    """
+    if isinstance(value, bool):
+        return int(value), "boolean value"
+    if isinstance(value, int):
+        return value, None
+    if isinstance(value, float):
+        if value != value:
+            return None, "blank (NaN)"
+        return (int(value) if value.is_integer() else value), None
+    if value is None or str(value).strip() == "" or str(value).strip().lower() == "nan":
+        return None, "blank"
+    number = parse_numeric(value, None)
+    if number is None:
+        return None, "not a number"
+    return (int(number) if number.is_integer() else number), None
+
+def _normalise_items(items, section, weight_fields, progress_fields, report):
+    for i, item in enumerate(items):
+        label = item.get("Task No") if section == "tasks" else item.get("DP No")
+        label = label if label is not None else i + 1
+        for field in weight_fields + progress_fields:
+            if field not in item:
+                continue
+            value = item[field]
+            number, issue = to_number(value)
+            # Empty cells are expected (nothing reported yet), not a data problem
+            blank = number is None and issue.startswith("blank")
+            if field in progress_fields:
+                if number is None:
+                    number = 0
+                elif not 0 <= number <= 100:
+                    issue = "outside 0-100, clamped"
+                    number = min(max(number, 0), 100)
+                item[field] = number
+            elif number is None:
+                # Missing weights fall back to their group's default downstream
+                del item[field]
+            elif number < 0:
+                issue = "negative weight, set to 0"
+                item[field] = number = 0
+            else:
+                item[field] = number
+            if issue and not blank:
+                report.append({"section": section, "item": str(label), "field": field,
+                               "value": str(value), "issue": issue})
+
+def normalise_numeric_fields(data):
+    """
+    Convert task/DP weights and progress to typed numbers in place, so render
+    and rollup code never parse strings. Returns a list of validation issues.
+    """
+    report = []
+    _normalise_items(data.get("tasks", []), "tasks", TASK_WEIGHT_FIELDS, TASK_PROGRESS_FIELDS, report)
+    _normalise_items(data.get("dps", []), "dps", DP_WEIGHT_FIELDS, [], report)
+    return report
+
+def get_normalisation_report(project_name, side):
+    return _NORMALISATION_REPORTS.get((project_name, side), [])
+
 def get_progress_range(intangible_type):
     """
     Return (min_progress, max_progress, default_progress) based on Intangible type.
@@ -662,3 +953,211 @@ def get_progress_range(intangible_type):
         return (67, 100, 67)
     else:  # "nil" or any other default
         return (0, 33, 0)
+
+INTANGIBLE_LEVELS = ["nil", "partial", "complete"]
+
+def get_task_weight(task, default=0):
+    """A task's stated weight: the first non-blank field in TASK_WEIGHT_FIELDS order, as the rollups read it"""
+    for field in TASK_WEIGHT_FIELDS:
+        value = task.get(field)
+        if value is not None and str(value).strip() != "" and str(value).lower() != "nan":
+            return parse_numeric(value, default)
+    return default
+
+def set_task_progress(task, weight, progress, intangible, comment):
+    """Write one task's entry values to every field name the UI and rollups read; weight None leaves weights alone"""
+    if weight is not None:
+        for field in ("Weight", "weight", "stated", "Stated %"):
+            task[field] = weight
+    for field in ("Progress", "progress", "achieved", "Achieved %", "Progress %"):
+        task[field] = progress
+    # Tangible tasks never carry an intangible assessment
+    task["Intangible"] = intangible if str(task.get("Type", "T")).upper() != "T" else "nil"
+    task["Progress Comment"] = comment
+    task["progress_comment"] = comment
+
+def apply_progress_updates(tasks, updates):
+    """
+    Validate and apply a batch of {task_index: {"Weight", "Progress", "Intangible",
+    "Progress Comment"}} edits; omitted fields keep their current value. Nothing is applied unless every row is valid;
+    raises ValueError listing all problems. Returns the indices that changed.
+    """
+    errors, rows = [], []
+    for idx, update in updates.items():
+        if not 0 <= idx < len(tasks):
+            errors.append(f"Task index {idx} is out of range")
+            continue
+        task = tasks[idx]
+        label = f"Task {task.get('Task No', idx + 1)} (DP {task.get('DP No', '?')})"
+        weight = to_number(update["Weight"])[0] if "Weight" in update else None
+        progress = to_number(update.get("Progress", task.get("Progress", 0)))[0]
+        intangible = str(update.get("Intangible", task.get("Intangible", "nil")) or "nil").lower().strip()
+        comment = update.get("Progress Comment", task.get("Progress Comment", task.get("progress_comment", "")))
+        comment = "" if comment is None or comment != comment else str(comment)
+        if "Weight" in update and (weight is None or not 0 <= weight <= 100):
+            errors.append(f"{label}: weight must be a number from 0 to 100")
+        if intangible not in INTANGIBLE_LEVELS:
+            errors.append(f"{label}: assessment must be nil, partial or complete")
+        low, high = (0, 100) if str(task.get("Type", "T")).upper() == "T" else get_progress_range(intangible)[:2]
+        if progress is None or not low <= progress <= high:
+            errors.append(f"{label}: progress must be between {low} and {high}% for this task")
+        rows.append((idx, weight, progress, intangible, comment))
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    changed = []
+    for idx, weight, progress, intangible, comment in rows:
+        task = tasks[idx]
+        before = (task.get("Weight"), task.get("Progress"), task.get("Intangible", "nil"),
+                  task.get("Progress Comment", task.get("progress_comment", "")))
+        set_task_progress(task, weight, progress, intangible, comment)
+        if before != (task.get("Weight"), task["Progress"], task["Intangible"], task["Progress Comment"]):
+            changed.append(idx)
+    return changed
+
+# --- Independent force assessments (sparse overlay on the Control base) ---
+INDEPENDENT_PROGRESS_FIELDS = ["progress", "Progress", "Actual Progress", "achieved", "Achieved %", "Progress %"]
+INDEPENDENT_OVERLAY_FIELDS = INDEPENDENT_PROGRESS_FIELDS + ["Intangible", "Progress Comment", "progress_comment"]
+INDEPENDENT_OVERLAY_VERSION = 2
+
+def get_independent_path(project_name, force):
+    return f"{project_name}_{force}_independent.json"
+
+def get_independent_version(project_name, force):
+    """Changes whenever Control's base or the force's overlay changes"""
+    path = get_independent_path(project_name, force)
+    return (get_data_version(project_name, force), os.path.getmtime(path) if os.path.exists(path) else None)
+
+def get_task_ids(tasks):
+    """
+    Stable IDs for a task list: "DP No|Task No", falling back to the task name.
+    Repeated IDs get a "#n" suffix so every task maps to exactly one ID.
+    """
+    ids, seen = [], {}
+    for i, task in enumerate(tasks):
+        task_no = str(task.get("Task No", "") or "").strip()
+        if task_no:
+            base = f"{str(task.get('DP No', '') or '').strip()}|{task_no}"
+        else:
+            base = f"name:{task.get('description') or task.get('Name') or i}"
+        seen[base] = seen.get(base, 0) + 1
+        ids.append(base if seen[base] == 1 else f"{base}#{seen[base]}")
+    return ids
+
+def _overlay_entry(task):
+    entry = {field: task[field] for field in INDEPENDENT_OVERLAY_FIELDS if field in task}
+    blank = (all(parse_numeric(entry.get(f, 0)) == 0 for f in INDEPENDENT_PROGRESS_FIELDS)
+             and entry.get("Intangible", "nil") == "nil"
+             and not entry.get("Progress Comment") and not entry.get("progress_comment"))
+    return None if blank else entry
+
+def _migrate_independent_copy(legacy, base_tasks):
+    """Old files held a full project copy; keep only the progress of tasks matching the base"""
+    base_ids = {}
+    for task_id, task in zip(get_task_ids(base_tasks), base_tasks):
+        base_ids.setdefault((task.get("description"), task.get("Name")), task_id)
+    overlay = {}
+    for task in legacy.get("tasks", []):
+        task_id = base_ids.get((task.get("description"), task.get("Name")))
+        entry = _overlay_entry(task) if task_id else None
+        if entry and task_id not in overlay:
+            overlay[task_id] = entry
+    return overlay
+
+def read_independent_overlay(project_name, force, base=None):
+    """{task_id: progress fields}; legacy full copies are migrated (and rewritten) on first read"""
+    path = get_independent_path(project_name, force)
+    stored = read_json_shared(path)
+    if stored is None:
+        return {}
+    if stored.get("version") == INDEPENDENT_OVERLAY_VERSION:
+        return copy_json(stored.get("tasks", {}))
+    stored = copy_json(stored)
+    base = base if base is not None else load_project(project_name, force)
+    overlay = _migrate_independent_copy(stored, base.get("tasks", []))
+    write_independent_overlay(project_name, force, overlay)
+    return overlay
+
+def write_independent_overlay(project_name, force, overlay):
+    path = get_independent_path(project_name, force)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": INDEPENDENT_OVERLAY_VERSION, "tasks": overlay}, f, indent=2)
+    os.replace(tmp_path, path)
+    invalidate_json_cache(path)
+
+def merge_independent_overlay(base, overlay):
+    """Apply a force's overlay onto Control's structure; unreported tasks start at 0 / nil"""
+    for task_id, task in zip(get_task_ids(base.get("tasks", [])), base.get("tasks", [])):
+        for field in INDEPENDENT_PROGRESS_FIELDS:
+            task[field] = 0
+        task["Intangible"] = "nil"
+        task.pop("Progress Comment", None)
+        task.pop("progress_comment", None)
+        task.update(overlay.get(task_id, {}))
+    return base
+
+def load_independent_data(project_name, force):
+    base = load_project(project_name, force)
+    merged = merge_independent_overlay(base, read_independent_overlay(project_name, force, base))
+    normalise_numeric_fields(merged)
+    return merged
+
+def update_independent_tasks(project_name, force, tasks_by_id):
+    """Write only the given {task_id: task} entries into the force's overlay"""
+    overlay = read_independent_overlay(project_name, force)
+    for task_id, task in tasks_by_id.items():
+        entry = _overlay_entry(task)
+        if entry:
+            overlay[task_id] = entry
+        else:
+            overlay.pop(task_id, None)
+    write_independent_overlay(project_name, force, overlay)
+
+def save_independent_data(project_name, force, data):
+    """Replace the overlay with the non-blank progress of every task in `data`"""
+    tasks = data.get("tasks", [])
+    overlay = {}
+    for task_id, task in zip(get_task_ids(tasks), tasks):
+        entry = _overlay_entry(task)
+        if entry:
+            overlay[task_id] = entry
+    write_independent_overlay(project_name, force, overlay)
+
+# --- Chat storage: one {project}_messages.json per project ---
+def get_messages_path(project_name):
+    return f"{project_name}_messages.json"
+
+def read_messages(project_name):
+    """Private copy of a project's messages: {"conversations": {"a_to_b": [...]}, "last_updated": ...}"""
+    messages = read_json_shared(get_messages_path(project_name))
+    if messages is None:
+        return {"conversations": {}, "last_updated": ""}
+    return copy_json(messages)
+
+def append_message(project_name, sender, recipient, message_text):
+    """Append a message to the sender->recipient conversation and save; returns the message"""
+    messages_data = read_messages(project_name)
+    conversation = messages_data["conversations"].setdefault(f"{sender}_to_{recipient}", [])
+    new_message = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sender": sender,
+        "recipient": recipient,
+        "message": message_text,
+        "message_id": len(conversation) + 1
+    }
+    conversation.append(new_message)
+    messages_data["last_updated"] = new_message["timestamp"]
+    path = get_messages_path(project_name)
+    with open(path, "w") as f:
+        json.dump(messages_data, f, indent=2)
+    invalidate_json_cache(path)
+    return new_message
+
+def read_conversation(project_name, participant1, participant2):
+    """Messages between two participants in both directions, oldest first"""
+    conversations = read_json_shared(get_messages_path(project_name), default={}).get("conversations", {})
+    messages = list(conversations.get(f"{participant1}_to_{participant2}", []))
+    messages.extend(conversations.get(f"{participant2}_to_{participant1}", []))
+    messages.sort(key=lambda x: x["timestamp"])
+    return copy_json(messages)
@@ -0,0 +1,232 @@
+
+"""
+Synthetic plans and backend benchmarks.
+
+    python ahp_bench.py --preset medium --label "after overlay change"
+
+Every run works in a throwaway folder (the backend uses paths relative to the
+working directory) and appends its timings to bench_results.json, so runs
+before and after a change can be compared; operations slower than the previous
+run with the same scale by more than --threshold are reported as regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from datetime import datetime
+from ahp_backend import (DEFAULT_STRUCTURE, DEFAULT_METADATA, load_project, save_project, compute_progress,
+                         import_excel_to_project, export_project_zip, load_independent_data,
+                         save_independent_data, set_task_progress, append_message,
+                         read_conversation, invalidate_json_cache, get_project_path, PROJECTS_DIR,
+                         INTANGIBLE_LEVELS)
+
+RESULTS_FILE = "bench_results.json"
+REGRESSION_THRESHOLD = 0.20
+
+# phases, objectives per phase, DPs per objective, tasks per DP, forces, chat messages per project
+PRESETS = {
+    "small": dict(phases=3, objectives=3, dps=4, tasks=5, forces=2, messages=20),
+    "medium": dict(phases=5, objectives=5, dps=8, tasks=10, forces=3, messages=200),
+    "large": dict(phases=8, objectives=8, dps=12, tasks=20, forces=4, messages=1000),
+}
+
+_WORDS = ("secure", "bridge", "sector", "patrol", "supply", "route", "convoy", "ridge", "harbour", "relay",
+          "screen", "flank", "depot", "crossing", "signal", "airfield", "corridor", "checkpoint")
+
+def _phrase(rng, words=4):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize()
+
+def generate_plan(phases=3, objectives=3, dps=4, tasks=5, seed=0, name="Bench"):
+    """
+    A project in DEFAULT_STRUCTURE shape with phases x objectives x dps x tasks
+    records and random progress. The same arguments always give the same plan.
+    """
+    rng = random.Random(seed)
+    data = dict(DEFAULT_STRUCTURE, metadata=dict(DEFAULT_METADATA, name=name, created="2024-01-01T00:00:00"),
+                phases=[], objectives=[], dps=[], tasks=[], ko={}, progress={}, control={})
+    for p in range(1, phases + 1):
+        phase = f"Phase {p}"
+        data["phases"].append({"Phase No": str(p), "Name": phase})
+        for o in range(1, objectives + 1):
+            objective = f"Objective {p}.{o}"
+            data["objectives"].append({"Objective No": f"{p}.{o}", "Name": objective, "Phase": phase,
+                                       "Description": _phrase(rng, 6)})
+            for d in range(1, dps + 1):
+                dp_no = f"{p}.{o}.{d}"
+                data["dps"].append({"DP No": dp_no, "Name": _phrase(rng), "Objective": objective, "Phase": phase,
+                                    "Force Group": f"Group {rng.randint(1, 4)}", "Weight": rng.randint(1, 5)})
+                for t in range(1, tasks + 1):
+                    task = {"Task No": str(t), "DP No": dp_no, "dp_no": dp_no, "description": _phrase(rng, 6),
+                            "Type": "T" if rng.random() < 0.7 else "I",
+                            "Criteria of Success": _phrase(rng, 5)}
+                    task["Name"] = task["description"]
+                    set_task_progress(task, rng.randint(1, 5), rng.randint(0, 100),
+                                      rng.choice(INTANGIBLE_LEVELS), _phrase(rng, 3) if rng.random() < 0.3 else "")
+                    data["tasks"].append(task)
+    return data
+
+def generate_project(project, phases=3, objectives=3, dps=4, tasks=5, forces=2, messages=20, seed=0):
+    """
+    Write a plan and an independent assessment for every force, plus `messages`
+    chat messages shared out between Control and the forces. Returns the force names.
+    """
+    rng = random.Random(seed)
+    sides = [f"force{i}" for i in range(1, forces + 1)]
+    for i, side in enumerate(sides):
+        data = generate_plan(phases, objectives, dps, tasks, seed=seed + i, name=project)
+        save_project(project, side, data)
+        for task in data["tasks"]:
+            set_task_progress(task, None, rng.randint(0, 100), rng.choice(INTANGIBLE_LEVELS), "")
+        save_independent_data(project, side, data)
+    for m in range(messages):
+        side = sides[m % len(sides)]
+        sender, recipient = ("control", side) if (m // len(sides)) % 2 == 0 else (side, "control")
+        append_message(project, sender, recipient, _phrase(rng, 8))
+    return sides
+
+def write_plan_workbook(data, path):
+    """The plan as a single-sheet workbook in the columns import_excel_to_project recognises"""
+    import pandas as pd
+    dps = {dp["DP No"]: dp for dp in data["dps"]}
+    rows = []
+    for task in data["tasks"]:
+        dp = dps[task["DP No"]]
+        rows.append({"Phase": dp["Phase"], "Objective": dp["Objective"], "DP No": dp["DP No"],
+                     "DP Description": dp["Name"], "Task No": task["Task No"], "Task Description": task["description"],
+                     "Force Group": dp["Force Group"], "Type (Tangible/Intangible)": task["Type"],
+                     "Criteria of Success": task["Criteria of Success"], "Weightage Factor (1–5)": task["Weight"]})
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return path
+
+def time_call(fn, repeat=5, setup=None):
+    """Wall-clock milliseconds of fn() over `repeat` runs; setup() runs untimed before each"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3), "runs": repeat}
+
+def _ko_matrices(rng, planners, n):
+    from ahp_group import judgments_to_matrix
+    matrices = []
+    for _ in range(planners):
+        judgments = {(i, j): rng.choice((1 / 3, 1 / 2, 1, 2, 3, 5)) for i in range(n) for j in range(i + 1, n)}
+        matrices.append(judgments_to_matrix(n, judgments))
+    return matrices
+
+def run_benchmarks(scale, repeat=5, seed=0):
+    """Generate a project at `scale` in the current folder and time each backend operation"""
+    from ahp_group import stack_matrices, priority_vectors, consistency_ratios, group_consensus
+    project = "Bench"
+    sides = generate_project(project, seed=seed, **scale)
+    side = sides[0]
+    data = load_project(project, side)
+    path = get_project_path(project, side)
+    workbook = write_plan_workbook(data, "bench_plan.xlsx")
+    rng = random.Random(seed)
+    matrices = _ko_matrices(rng, planners=5, n=min(9, max(3, scale["objectives"])))
+
+    def ko_weights():
+        stack = stack_matrices(matrices)
+        _, lambda_max = priority_vectors(stack)
+        consistency_ratios(stack, lambda_max)
+        group_consensus(matrices, "aij")
+        group_consensus(matrices, "aip")
+
+    def cleanup_zip():
+        if os.path.exists(f"{project}_export.zip"):
+            os.remove(f"{project}_export.zip")
+
+    results = {
+        "compute_progress": time_call(lambda: compute_progress(data), repeat),
+        "load_project (parse)": time_call(lambda: load_project(project, side), repeat,
+                                          setup=lambda: invalidate_json_cache(path)),
+        "load_project (cached)": time_call(lambda: load_project(project, side), repeat),
+        "save_project": time_call(lambda: save_project(project, side, data), repeat),
+        "import_excel_to_project": time_call(lambda: import_excel_to_project(project, side, workbook), repeat),
+        "export_project_zip": time_call(lambda: export_project_zip(project, sides), repeat, setup=cleanup_zip),
+        "load_independent_data": time_call(lambda: load_independent_data(project, side), repeat),
+        "ko_weights": time_call(ko_weights, repeat),
+        "chat_send": time_call(lambda: append_message(project, "control", side, "Status report requested"), repeat),
+        "chat_read": time_call(lambda: read_conversation(project, "control", side), repeat),
+    }
+    return results
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def record_results(entry, path=RESULTS_FILE):
+    history = load_results(path)
+    history.append(entry)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+    return history
+
+def find_regressions(previous, current, threshold=REGRESSION_THRESHOLD):
+    """(operation, previous ms, current ms) for operations whose median grew by more than threshold"""
+    regressions = []
+    for name, timing in current["results"].items():
+        before = previous["results"].get(name)
+        if before and timing["median_ms"] > before["median_ms"] * (1 + threshold):
+            regressions.append((name, before["median_ms"], timing["median_ms"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the AHP backend on a synthetic plan")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for field in ("phases", "objectives", "dps", "tasks", "forces", "messages"):
+        parser.add_argument(f"--{field}", type=int, help=f"override the preset's {field}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON history file (appended to)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    scale = dict(PRESETS[args.preset])
+    scale.update({k: getattr(args, k) for k in scale if getattr(args, k) is not None})
+    results_path = os.path.abspath(args.results)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="ahp_bench_")
+    try:
+        os.chdir(workdir)
+        os.makedirs(PROJECTS_DIR, exist_ok=True)
+        results = run_benchmarks(scale, args.repeat, args.seed)
+    finally:
+        os.chdir(cwd)
+        invalidate_json_cache()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    entry = {"label": args.label, "timestamp": datetime.now().isoformat(timespec="seconds"),
+             "python": sys.version.split()[0], "scale": scale, "seed": args.seed, "results": results}
+    previous = [e for e in load_results(results_path) if e.get("scale") == scale and e.get("seed") == args.seed]
+    record_results(entry, results_path)
+
+    tasks = scale["phases"] * scale["objectives"] * scale["dps"] * scale["tasks"]
+    print(f"{tasks} tasks per force, {scale['forces']} forces, {scale['messages']} chat messages")
+    for name, timing in results.items():
+        print(f"  {name:<26} median {timing['median_ms']:>10.2f} ms   min {timing['min_ms']:>10.2f} ms")
+    if previous:
+        regressions = find_regressions(previous[-1], entry, args.threshold)
+        since = previous[-1].get("label") or previous[-1]["timestamp"]
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.2f} ms -> {after:.2f} ms (vs {since})")
+        if not regressions:
+            print(f"No regressions over {args.threshold:.0%} vs {since}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+
+import threading
+from collections import OrderedDict
+import plotly.graph_objects as go
+
+# Horizontal progress bars: up to BAR_LIMIT items are drawn as SVG bars with
+# value labels; above that a WebGL scatter (one marker per item) is used, and
+# above WEBGL_LIMIT consecutive items are aggregated into WEBGL_LIMIT buckets
+# (mean marker, min-max whisker).
+BAR_LIMIT = 150
+WEBGL_LIMIT = 2000
+MAX_CHART_HEIGHT = 1600
+RAG_COLORS = {"red": "#dc2626", "amber": "#f59e0b", "green": "#16a34a"}
+FIGURE_CACHE_SIZE = 64
+
+# (kind, data version, options...) -> figure, shared by all sessions. Figures
+# are only ever passed to st.plotly_chart, which does not modify them.
+_FIGURES = OrderedDict()
+_FIGURES_LOCK = threading.Lock()
+
+def cached_figure(key, build):
+    """
+    build() for key, cached on a miss; least recently used entries are dropped.
+    build may return the figure together with the data the caller shows beside it.
+    """
+    with _FIGURES_LOCK:
+        figure = _FIGURES.get(key)
+        if figure is not None:
+            _FIGURES.move_to_end(key)
+            return figure
+    figure = build()
+    with _FIGURES_LOCK:
+        _FIGURES[key] = figure
+        while len(_FIGURES) > FIGURE_CACHE_SIZE:
+            _FIGURES.popitem(last=False)
+    return figure
+
+def clear_figure_cache():
+    with _FIGURES_LOCK:
+        _FIGURES.clear()
+
+def figure_cache_size():
+    return len(_FIGURES)
+
+def rag_color(value, rag):
+    if value < rag["red"]:
+        return RAG_COLORS["red"]
+    if value < rag["amber"]:
+        return RAG_COLORS["amber"]
+    return RAG_COLORS["green"]
+
+def _buckets(labels, values, size):
+    """Consecutive items grouped size at a time: (label range, mean, min, max) per bucket"""
+    for start in range(0, len(values), size):
+        chunk = values[start:start + size]
+        first, last = labels[start], labels[min(start + size, len(labels)) - 1]
+        label = first if first == last else f"{first} … {last}"
+        yield label, sum(chunk) / len(chunk), min(chunk), max(chunk)
+
+def progress_bar_figure(labels, values, colors=None, rag=None, title="", axis_title="",
+                        row_height=50, min_height=300, margin=None, text_size=11):
+    """
+    Horizontal progress chart (0-100%) for labels/values in display order.
+    Bars are coloured by colors, or by RAG band when rag is given. Large item
+    counts switch to WebGL markers and, past WEBGL_LIMIT, to bucket aggregates.
+    """
+    margin = margin or dict(l=150, r=50, t=50, b=50)
+    count = len(values)
+    whiskers = None
+    if count > WEBGL_LIMIT:
+        size = -(-count // WEBGL_LIMIT)
+        buckets = list(_buckets(labels, values, size))
+        labels = [b[0] for b in buckets]
+        values = [b[1] for b in buckets]
+        whiskers = dict(type='data', symmetric=False, color='#94a3b8', thickness=1, width=0,
+                        array=[b[3] - b[1] for b in buckets], arrayminus=[b[1] - b[2] for b in buckets])
+        colors = None  # per-item colours do not apply to buckets
+        title = f"{title} · {count} items, {size} per point (mean, min-max)"
+    if rag is not None:
+        colors = [rag_color(v, rag) for v in values]
+    if count <= BAR_LIMIT:
+        figure = go.Figure([go.Bar(
+            y=labels,
+            x=values,
+            orientation='h',
+            marker_color=colors,
+            text=[f"{v:.1f}%" for v in values],
+            textposition='inside',
+            textfont=dict(color='white', size=text_size, family='Arial Black')
+        )])
+        height = max(min_height, count * row_height)
+    else:
+        figure = go.Figure([go.Scattergl(
+            y=labels,
+            x=values,
+            mode='markers',
+            marker=dict(color=colors, size=6, symbol='square'),
+            error_x=whiskers,
+            hovertemplate="%{y}: %{x:.1f}%<extra></extra>"
+        )])
+        height = min(MAX_CHART_HEIGHT, max(min_height, len(values) * 4))
+    figure.update_layout(
+        title=title,
+        xaxis_title="Progress (%)",
+        yaxis_title=axis_title,
+        height=height,
+        margin=margin,
+        yaxis=dict(automargin=True, showticklabels=count <= BAR_LIMIT),
+        font=dict(size=text_size),
+        showlegend=False
+    )
+    if count > BAR_LIMIT:
+        figure.update_xaxes(range=[0, 100])
+    return figure
@@ -0,0 +1,107 @@
+
+import numpy as np
+from ahp_backend import get_project_snapshot, parse_numeric, get_task_ids, read_independent_overlay
+from ahp_rollup import build_progress_index, effective_task_values, rollup_batch
+
+DIVERGENCE_LEVELS = ("task", "dp", "objective")
+
+def _task_arrays(control_ids, reported):
+    """Achieved % and intangible flags of the reported {task_id: task} laid out in Control's task order"""
+    n = len(control_ids)
+    achieved = np.zeros(n)
+    partial = np.zeros(n, dtype=bool)
+    complete = np.zeros(n, dtype=bool)
+    matched = 0
+    for i, task_id in enumerate(control_ids):
+        task = reported.get(task_id)
+        if task:
+            matched += 1
+            achieved[i] = parse_numeric(task.get("Achieved %", 0))
+            intangible = task.get("Intangible", "nil")
+            partial[i] = intangible == "partial"
+            complete[i] = intangible == "complete"
+    return achieved, partial, complete, matched
+
+def compare_reported(control_data, reported):
+    """
+    Diff Control's data against a force's reported {task_id: task fields} at task,
+    DP and objective level in one vectorised rollup. Deltas are force minus Control;
+    tasks the force has not reported count as 0 / nil.
+    """
+    index = build_progress_index(control_data)
+    achieved, partial, complete, matched = _task_arrays(get_task_ids(control_data.get("tasks", [])), reported)
+    values = np.stack([effective_task_values(index), effective_task_values(index, achieved, partial, complete)])
+    rollup = rollup_batch(index, values)
+
+    result = {"index": index, "reported": matched}
+    for level, both in (("task", values), ("dp", rollup["dp"]), ("objective", rollup["objective"])):
+        result[level] = {"control": both[0], "force": both[1], "delta": both[1] - both[0]}
+    return result
+
+def compare_force_data(control_data, independent_data):
+    """Align two full datasets by task ID and diff them (see compare_reported)"""
+    tasks = independent_data.get("tasks", [])
+    return compare_reported(control_data, dict(zip(get_task_ids(tasks), tasks)))
+
+def _labels(data, index, level):
+    if level == "task":
+        tasks = data.get("tasks", [])
+        return [f"Task {t.get('Task No', i + 1)}: {t.get('description') or t.get('Name') or ''}" for i, t in enumerate(tasks)]
+    if level == "dp":
+        return [f"DP {label}: {name}" for label, name in zip(index["labels"]["dp"], index["names"]["dp"])]
+    return [str(label) for label in index["labels"]["objective"]]
+
+def _mean_abs(values):
+    return float(np.abs(values).mean()) if len(values) else 0.0
+
+def divergence_report(project, forces, top=20, threshold=0.0):
+    """
+    Control-vs-force divergence for every force at once. Returns per-force
+    summaries plus the `top` largest absolute disagreements per level, ranked
+    across all forces.
+    """
+    summaries, compared = {}, []
+    for force in forces:
+        control = get_project_snapshot(project, force)
+        overlay = read_independent_overlay(project, force, control)
+        # The overlay is already keyed by task ID, so no merged copy of the project is needed
+        comparison = compare_reported(control, overlay)
+        summaries[force] = {
+            "tasks": len(control.get("tasks", [])),
+            "reported": comparison["reported"],
+            "mean_abs_task_delta": _mean_abs(comparison["task"]["delta"]),
+            "mean_abs_dp_delta": _mean_abs(comparison["dp"]["delta"]),
+            "objective_delta": float(comparison["objective"]["delta"].mean()) if len(comparison["objective"]["delta"]) else 0.0
+        }
+        compared.append((force, control, comparison))
+
+    ranked = {}
+    for level in DIVERGENCE_LEVELS:
+        sizes = [len(comparison[level]["delta"]) for _, _, comparison in compared]
+        if not sum(sizes):
+            ranked[level] = []
+            continue
+        deltas = np.concatenate([comparison[level]["delta"] for _, _, comparison in compared])
+        owner = np.repeat(np.arange(len(compared)), sizes)
+        offset = np.arange(len(deltas)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        magnitude = np.abs(deltas)
+        candidates = np.flatnonzero(magnitude > threshold)
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-magnitude[candidates], top - 1)[:top]]
+        candidates = candidates[np.argsort(-magnitude[candidates], kind="stable")]
+
+        labels, rows = {}, []
+        for i in candidates:
+            force, control, comparison = compared[owner[i]]
+            if owner[i] not in labels:
+                labels[owner[i]] = _labels(control, comparison["index"], level)
+            j = offset[i]
+            rows.append({
+                "force": force,
+                "item": labels[owner[i]][j],
+                "control": float(comparison[level]["control"][j]),
+                "force_value": float(comparison[level]["force"][j]),
+                "delta": float(deltas[i])
+            })
+        ranked[level] = rows
+    return {"forces": summaries, "ranked": ranked}
@@ -0,0 +1,185 @@
+
+import numpy as np
+from datetime import datetime
+
+# Saaty's random consistency index for matrices of order n
+RANDOM_INDEX = {
+    1: 0.0, 2: 0.0, 3: 0.58, 4: 0.90, 5: 1.12, 6: 1.24, 7: 1.32, 8: 1.41,
+    9: 1.45, 10: 1.49, 11: 1.51, 12: 1.48, 13: 1.56, 14: 1.57, 15: 1.59
+}
+
+# Judgments with CR above this are flagged as inconsistent
+CONSISTENCY_THRESHOLD = 0.10
+
+SAATY_SCALE = {
+    1: "Equal",
+    2: "Equal to Moderate",
+    3: "Moderate",
+    4: "Moderate to Strong",
+    5: "Strong",
+    6: "Strong to Very Strong",
+    7: "Very Strong",
+    8: "Very to Extreme",
+    9: "Extreme"
+}
+
+GROUP_METHODS = {
+    "aij": "Geometric mean of judgments (AIJ)",
+    "aip": "Aggregation of individual priorities (AIP)"
+}
+
+def random_index(n):
+    """Random consistency index for order n (Alonso & Lamata approximation beyond 15)"""
+    if n in RANDOM_INDEX:
+        return RANDOM_INDEX[n]
+    return 1.98 * (n - 2) / n
+
+def judgments_to_matrix(n, judgments):
+    """Build a reciprocal pairwise matrix from {(i, j): a_ij} judgments"""
+    matrix = np.ones((n, n))
+    for (i, j), value in judgments.items():
+        value = float(value)
+        if value <= 0:
+            raise ValueError(f"Judgment for pair ({i}, {j}) must be positive")
+        matrix[i, j] = value
+        matrix[j, i] = 1.0 / value
+    return matrix
+
+def stack_matrices(matrices):
+    """Stack planners' pairwise matrices into a (planners, n, n) array"""
+    stack = np.asarray(matrices, dtype=float)
+    if stack.ndim == 2:
+        stack = stack[np.newaxis]
+    if stack.ndim != 3 or stack.shape[1] != stack.shape[2]:
+        raise ValueError("Pairwise matrices must all be square and of the same size")
+    if not np.all(stack > 0):
+        raise ValueError("Pairwise matrices must contain only positive judgments")
+    return stack
+
+def priority_vectors(stack, iterations=200, tol=1e-12):
+    """Principal eigenvector and lambda max for every matrix in the stack at once"""
+    planners, n, _ = stack.shape
+    weights = np.full((planners, n), 1.0 / n)
+    for _ in range(iterations):
+        product = np.einsum("pij,pj->pi", stack, weights)
+        new_weights = product / product.sum(axis=1, keepdims=True)
+        converged = np.max(np.abs(new_weights - weights)) < tol
+        weights = new_weights
+        if converged:
+            break
+    product = np.einsum("pij,pj->pi", stack, weights)
+    lambda_max = np.mean(product / weights, axis=1)
+    return weights, lambda_max
+
+def consistency_ratios(stack, lambda_max=None):
+    """Consistency ratio per matrix; always 0 for 1x1 and 2x2 matrices"""
+    n = stack.shape[1]
+    if lambda_max is None:
+        _, lambda_max = priority_vectors(stack)
+    if n <= 2:
+        return np.zeros(stack.shape[0])
+    ci = (lambda_max - n) / (n - 1)
+    return np.maximum(ci, 0.0) / random_index(n)
+
+def _normalise_planner_weights(planner_weights, planners):
+    if planner_weights is None:
+        return np.full(planners, 1.0 / planners)
+    planner_weights = np.asarray(planner_weights, dtype=float)
+    if planner_weights.shape != (planners,) or np.any(planner_weights < 0) or planner_weights.sum() <= 0:
+        raise ValueError("Planner weights must be one non-negative value per planner")
+    return planner_weights / planner_weights.sum()
+
+def aggregate_judgments(stack, planner_weights=None):
+    """AIJ: element-wise weighted geometric mean of all planners' matrices"""
+    weights = _normalise_planner_weights(planner_weights, stack.shape[0])
+    return np.exp(np.einsum("p,pij->ij", weights, np.log(stack)))
+
+def aggregate_priorities(priorities, planner_weights=None):
+    """AIP: weighted geometric mean of individual priority vectors, renormalised"""
+    weights = _normalise_planner_weights(planner_weights, priorities.shape[0])
+    combined = np.exp(weights @ np.log(priorities))
+    return combined / combined.sum()
+
+def group_consensus(matrices, method="aij", planner_weights=None, planners=None):
+    """
+    Aggregate several planners' pairwise matrices for the same set of items.
+    Returns consensus weights (summing to 100) and per-planner consistency.
+    """
+    if method not in GROUP_METHODS:
+        raise ValueError(f"Unknown group method '{method}'")
+    stack = stack_matrices(matrices)
+    if planners is None:
+        planners = [f"Planner {i+1}" for i in range(stack.shape[0])]
+
+    individual, lambda_max = priority_vectors(stack)
+    individual_cr = consistency_ratios(stack, lambda_max)
+
+    if method == "aij":
+        group_matrix = aggregate_judgments(stack, planner_weights)
+        consensus, group_lambda = priority_vectors(group_matrix[np.newaxis])
+        consensus = consensus[0]
+        group_cr = float(consistency_ratios(group_matrix[np.newaxis], group_lambda)[0])
+    else:
+        consensus = aggregate_priorities(individual, planner_weights)
+        group_cr = None
+
+    return {
+        "method": method,
+        "weights": (consensus * 100).tolist(),
+        "group_cr": group_cr,
+        "planners": [
+            {
+                "planner": name,
+                "weights": (individual[i] * 100).tolist(),
+                "cr": float(individual_cr[i]),
+                "consistent": bool(individual_cr[i] <= CONSISTENCY_THRESHOLD)
+            }
+            for i, name in enumerate(planners)
+        ]
+    }
+
+# --- Group judgment storage (kept under data["ko"]["group"]) ---
+def get_group_key(item_type, identifier):
+    return f"{item_type}:{identifier}"
+
+def get_group_session(data, item_type, identifier):
+    return data.get("ko", {}).get("group", {}).get(get_group_key(item_type, identifier))
+
+def submit_planner_judgments(data, item_type, identifier, parent_name, items, planner, matrix):
+    """
+    Store one planner's pairwise matrix for a DP/task set. `items` is a list of
+    {"key", "name"} dicts; earlier submissions are dropped if the item set changed.
+    """
+    matrix = stack_matrices(matrix)[0]
+    if matrix.shape[0] != len(items):
+        raise ValueError(f"Matrix is {matrix.shape[0]}x{matrix.shape[0]} but there are {len(items)} items")
+    group = data.setdefault("ko", {}).setdefault("group", {})
+    key = get_group_key(item_type, identifier)
+    session = group.get(key)
+    item_keys = [item["key"] for item in items]
+    if not session or [item["key"] for item in session.get("items", [])] != item_keys:
+        session = {"item_type": item_type, "identifier": identifier, "judgments": {}}
+    session["parent"] = parent_name
+    session["items"] = items
+    session["judgments"][planner] = {
+        "matrix": matrix.tolist(),
+        "submitted": datetime.now().isoformat()
+    }
+    group[key] = session
+    return session
+
+def remove_planner_judgments(data, item_type, identifier, planner):
+    session = get_group_session(data, item_type, identifier)
+    if session:
+        session["judgments"].pop(planner, None)
+
+def compute_group_session(session, method="aij"):
+    """Run group_consensus over every planner stored in a group session"""
+    judgments = session.get("judgments", {})
+    if not judgments:
+        return None
+    planners = sorted(judgments.keys())
+    matrices = [judgments[p]["matrix"] for p in planners]
+    result = group_consensus(matrices, method=method, planners=planners)
+    result["items"] = session.get("items", [])
+    return result
@@ -0,0 +1,161 @@
+
+import re
+from collections import defaultdict
+
+# How DPs and objectives link to their parent: (section, link field, parent section)
+INTEGRITY_LINKS = (
+    ("dps", "Objective", "objectives"),
+    ("objectives", "Phase", "phases"),
+)
+INTEGRITY_KEYS = {"phases": "Name", "objectives": "Name", "dps": "DP No"}
+PARENT_NAMES = {"dps": "DP", "objectives": "objective", "phases": "phase"}
+# A repeated key whose rows agree on these fields is the same record written twice
+# (the single-sheet importer writes one DP row per distinct task weight); reported
+# as a warning rather than a conflicting duplicate
+REPEAT_FIELDS = {"phases": (), "objectives": ("Phase",), "dps": ("Name", "Objective", "Phase")}
+INTANGIBLE_VALUES = ("nil", "partial", "complete")
+# Task weight fields are ahp_backend.TASK_WEIGHT_FIELDS (not imported here: ahp_backend imports this module)
+NUMERIC_FIELDS = {
+    "tasks": ("stated", "Weight", "weight", "Stated %", "Wt", "wt", "Achieved %"),
+    "dps": ("Weight", "Weightage Factor"),
+}
+WEIGHT_SUM_TARGET = 100
+WEIGHT_SUM_TOLERANCE = 0.5
+
+_SPACES = re.compile(r"\s+")
+
+def _key(value):
+    """Join key exactly as compute_progress matches it"""
+    return str(value).strip() if value is not None else None
+
+def _loose_key(value):
+    """Looser form used only to explain an orphan: case, spacing and 3 vs 3.0 ignored"""
+    text = _SPACES.sub(" ", str(value)).strip().casefold()
+    try:
+        number = float(text)
+        return repr(int(number)) if number.is_integer() else repr(number)
+    except ValueError:
+        return text
+
+def _label(section, item, i):
+    field = "Task No" if section == "tasks" else INTEGRITY_KEYS[section]
+    label = item.get(field)
+    return str(label) if label not in (None, "") else f"#{i + 1}"
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+def check_integrity(data):
+    """
+    Referential and type checks for a plan in one linear pass per section.
+    Finds orphans (links compute_progress cannot resolve and silently scores 0),
+    duplicate keys, empty parents, task weight sums per DP that are not 100,
+    and non-numeric or malformed values. Returns a list of issue dicts.
+    Weight sums use the weight the rollups read (get_task_weight).
+    """
+    from ahp_backend import get_task_weight
+    issues = []
+
+    def add(severity, section, item, field, value, issue):
+        issues.append({"severity": severity, "section": section, "item": item, "field": field,
+                       "value": "" if value is None else str(value), "issue": issue})
+
+    # Key indexes, built once: key -> first position, plus duplicate detection
+    keys = {}
+    for section, field in INTEGRITY_KEYS.items():
+        index = {}
+        for i, item in enumerate(data.get(section, [])):
+            key = _key(item.get(field))
+            if not key:
+                add("error", section, f"#{i + 1}", field, None, f"missing {field}")
+                continue
+            if key in index:
+                first = data[section][index[key]]
+                if all(_key(first.get(f)) == _key(item.get(f)) for f in REPEAT_FIELDS[section]):
+                    add("warning", section, key, field, item.get(field),
+                        f"repeated row (same as row {index[key] + 1}); counted once per row in averages")
+                else:
+                    add("error", section, key, field, item.get(field),
+                        f"duplicate {field} (also row {index[key] + 1}); rollups cannot tell them apart")
+                continue
+            index[key] = i
+        keys[section] = index
+
+    def orphan(section, label, field, value, parent, loose):
+        """Report an unresolved link; returns the (lazily built) loose index of parent keys"""
+        name = PARENT_NAMES[parent]
+        if not _key(value):
+            add("error", section, label, field, None, f"no {field}; not counted in any {name}")
+            return loose
+        if loose is None:
+            loose = {_loose_key(k): k for k in keys[parent]}
+        near = loose.get(_loose_key(value))
+        if near is not None:
+            add("error", section, label, field, value, f"does not match {name} '{near}' exactly (type/format mismatch)")
+        else:
+            add("error", section, label, field, value, f"unknown {name}; reported as 0")
+        return loose
+
+    # Tasks: DP link, duplicate Task No, numeric types, intangible values and weight sums in one pass
+    children = {parent: defaultdict(int) for parent in PARENT_NAMES}
+    dp_keys, dp_counts = keys["dps"], children["dps"]
+    weight_sums = defaultdict(float)
+    task_nos = set()
+    loose = None
+    for i, task in enumerate(data.get("tasks", [])):
+        value = task.get("DP No")
+        dp = _key(value)
+        linked = dp in dp_keys
+        if linked:
+            dp_counts[dp] += 1
+        else:
+            loose = orphan("tasks", _label("tasks", task, i), "DP No", value, "dps", loose)
+        task_no = _key(task.get("Task No"))
+        if task_no:
+            if (dp, task_no) in task_nos:
+                add("warning", "tasks", task_no, "Task No", task_no, f"duplicate Task No within DP {dp}")
+            task_nos.add((dp, task_no))
+        intangible = task.get("Intangible")
+        if intangible is not None and intangible not in INTANGIBLE_VALUES:
+            add("warning", "tasks", _label("tasks", task, i), "Intangible", intangible, "expected nil, partial or complete")
+        for field in NUMERIC_FIELDS["tasks"]:
+            if field in task and not _is_number(task[field]):
+                add("error", "tasks", _label("tasks", task, i), field, task[field], "not a number")
+        weight = get_task_weight(task, None)
+        if linked and weight is not None:
+            weight_sums[dp] += weight
+
+    # DPs and objectives: parent links and numeric DP weights
+    for section, field, parent in INTEGRITY_LINKS:
+        parent_keys, counts = keys[parent], children[parent]
+        loose = None
+        for i, item in enumerate(data.get(section, [])):
+            value = item.get(field)
+            key = _key(value)
+            if key in parent_keys:
+                counts[key] += 1
+            else:
+                loose = orphan(section, _label(section, item, i), field, value, parent, loose)
+            for number_field in NUMERIC_FIELDS.get(section, ()):
+                if number_field in item and not _is_number(item[number_field]):
+                    add("error", section, _label(section, item, i), number_field, item[number_field], "not a number")
+
+    for parent, child in (("dps", "tasks"), ("objectives", "DPs"), ("phases", "objectives")):
+        counts = children[parent]
+        for key in keys[parent]:
+            if not counts.get(key):
+                add("warning", parent, key, INTEGRITY_KEYS[parent], None, f"has no {child}; progress shows 0")
+
+    for dp, total in weight_sums.items():
+        if abs(total - WEIGHT_SUM_TARGET) > WEIGHT_SUM_TOLERANCE:
+            add("warning", "dps", dp, "Weight", round(total, 2),
+                f"task weights sum to {total:g}% (expected {WEIGHT_SUM_TARGET}%)")
+
+    return issues
+
+def summarise_integrity(issues):
+    """Counts of errors and warnings for a report"""
+    summary = {"error": 0, "warning": 0}
+    for issue in issues:
+        summary[issue["severity"]] += 1
+    return summary
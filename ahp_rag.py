@@ -0,0 +1,68 @@
+
+from bisect import bisect_left
+from ahp_backend import (get_project_snapshot, compute_progress, get_data_version, get_independent_version,
+                         load_independent_data, natural_sort_key)
+
+RAG_LEVELS = ("dp", "objective", "phase")
+DEFAULT_RAG = {"red": 40, "amber": 70}
+
+def rag_band(value, rag):
+    """red below rag["red"], amber below rag["amber"], green otherwise"""
+    if value < rag["red"]:
+        return "red"
+    if value < rag["amber"]:
+        return "amber"
+    return "green"
+
+def build_rag_table(progress):
+    """
+    Per level, from a compute_progress result: sorted progress values with count
+    and sum, and the (name, progress) items in natural name order for display.
+    """
+    table = {"progress": progress}
+    for level in RAG_LEVELS:
+        level_progress = progress.get(level, {})
+        values = sorted(level_progress.values())
+        items = sorted(level_progress.items(), key=lambda item: natural_sort_key(item[0]))
+        table[level] = {"values": values, "count": len(values), "sum": sum(values), "items": items}
+    return table
+
+def rag_counts(level_table, rag):
+    """
+    Red/amber/green counts for any thresholds with two binary searches over the
+    sorted values, plus the count and average. Matches v < red, red <= v < amber
+    and v >= amber.
+    """
+    values, count = level_table["values"], level_table["count"]
+    below_red = bisect_left(values, rag["red"])
+    below_amber = bisect_left(values, rag["amber"])
+    return {
+        "red": below_red,
+        "amber": max(0, below_amber - below_red),
+        "green": count - below_amber,
+        "total": count,
+        "average": level_table["sum"] / count if count else 0
+    }
+
+def level_average(table, level):
+    entry = table[level]
+    return entry["sum"] / entry["count"] if entry["count"] else 0
+
+# (project, side, independent) -> (data version, table), shared by all sessions
+_RAG_TABLES = {}
+
+def get_rag_table(project, side, independent=False):
+    """
+    RAG table for a force's plan (Control's data) or its independent assessment.
+    Progress is rolled up once per data version; threshold changes only re-run
+    rag_counts on the cached sorted values.
+    """
+    key = (project, side, independent)
+    version = get_independent_version(project, side) if independent else get_data_version(project, side)
+    cached = _RAG_TABLES.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    data = load_independent_data(project, side) if independent else get_project_snapshot(project, side)
+    table = build_rag_table(compute_progress(data))
+    _RAG_TABLES[key] = (version, table)
+    return table
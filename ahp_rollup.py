@@ -0,0 +1,274 @@
+
+import numpy as np
+from ahp_backend import parse_numeric, TASK_WEIGHT_FIELDS, DP_WEIGHT_FIELDS
+
+# Upper bound on draws x columns materialised per vectorised batch
+MAX_BATCH_CELLS = 2_000_000
+
+def _key(value):
+    # Same normalisation compute_progress uses when matching DP No / names
+    return str(value).strip() if value is not None else None
+
+def _first_present(item, fields):
+    for field in fields:
+        value = item.get(field)
+        if value is not None and str(value).strip() != "" and str(value).lower() != "nan":
+            return value
+    return None
+
+def build_progress_index(data):
+    """
+    Flatten a project into integer arrays describing the task -> DP -> objective -> phase
+    hierarchy, following compute_progress matching rules (stripped string keys,
+    duplicate DP numbers / names share one rollup slot).
+    """
+    tasks = data.get("tasks", [])
+    dps = data.get("dps", [])
+    objectives = data.get("objectives", [])
+    phases = data.get("phases", [])
+
+    dp_slots, dp_labels, dp_names, dp_entry_slot = {}, [], [], []
+    for dp in dps:
+        key = _key(dp.get("DP No"))
+        if key not in dp_slots:
+            dp_slots[key] = len(dp_labels)
+            dp_labels.append(dp.get("DP No"))
+            dp_names.append(dp.get("Name") or f"DP {dp.get('DP No')}")
+        dp_entry_slot.append(dp_slots[key])
+
+    obj_slots, obj_labels, obj_entry_slot = {}, [], []
+    for obj in objectives:
+        key = _key(obj.get("Name"))
+        if key not in obj_slots:
+            obj_slots[key] = len(obj_labels)
+            obj_labels.append(obj.get("Name"))
+        obj_entry_slot.append(obj_slots[key])
+
+    phase_slots, phase_labels = {}, []
+    for phase in phases:
+        key = _key(phase.get("Name"))
+        if key not in phase_slots:
+            phase_slots[key] = len(phase_labels)
+            phase_labels.append(phase.get("Name"))
+
+    # A DP whose number is missing never matches any task
+    task_dp_slot = [dp_slots.get(str(t.get("DP No", "")).strip(), -1) for t in tasks]
+    if None in dp_slots:
+        none_slot = dp_slots[None]
+        task_dp_slot = [-1 if slot == none_slot else slot for slot in task_dp_slot]
+
+    intangible = [t.get("Intangible", "nil") for t in tasks]
+    dp_entry_objective = [obj_slots.get(str(dp.get("Objective", "")).strip(), -1) for dp in dps]
+    obj_entry_phase = [phase_slots.get(str(obj.get("Phase", "")).strip(), -1) for obj in objectives]
+
+    return {
+        "n_tasks": len(tasks),
+        "task_dp": np.array(task_dp_slot, dtype=np.int64),
+        "task_achieved": np.array([parse_numeric(t.get("Achieved %", 0)) for t in tasks], dtype=float),
+        "task_complete": np.array([i == "complete" for i in intangible], dtype=bool),
+        "task_partial": np.array([i == "partial" for i in intangible], dtype=bool),
+        "dp_entry_slot": np.array(dp_entry_slot, dtype=np.int64),
+        "dp_entry_objective": np.array(dp_entry_objective, dtype=np.int64),
+        "obj_entry_slot": np.array(obj_entry_slot, dtype=np.int64),
+        "obj_entry_phase": np.array(obj_entry_phase, dtype=np.int64),
+        "labels": {"dp": dp_labels, "objective": obj_labels, "phase": phase_labels},
+        "slots": {"dp": dp_slots, "objective": obj_slots, "phase": phase_slots},
+        "names": {"dp": dp_names, "objective": obj_labels, "phase": phase_labels},
+        "task_weights": _weights_array(tasks, TASK_WEIGHT_FIELDS, task_dp_slot),
+        "dp_weights": _weights_array(dps, DP_WEIGHT_FIELDS, dp_entry_objective),
+        "plans": {
+            "task": make_segments(task_dp_slot, len(dp_labels)),
+            "dp_entry": make_segments(dp_entry_objective, len(obj_labels)),
+            "obj_entry": make_segments(obj_entry_phase, len(phase_labels)),
+        },
+    }
+
+def _weights_array(items, fields, groups):
+    """Stored weights as floats; missing values take the mean of their group (or 1)"""
+    weights = np.array([parse_numeric(_first_present(item, fields), np.nan) for item in items], dtype=float)
+    if not len(weights):
+        return weights
+    groups = np.asarray(groups, dtype=np.int64)
+    missing = np.isnan(weights)
+    if missing.any():
+        fill = np.ones(len(weights))
+        present = ~missing & (groups >= 0)
+        if present.any():
+            n_groups = groups.max() + 1
+            sums = np.bincount(groups[present], weights=weights[present], minlength=n_groups)
+            counts = np.bincount(groups[present], minlength=n_groups)
+            group_mean = np.divide(sums, counts, out=np.ones(n_groups), where=counts > 0)
+            fill = np.where(groups >= 0, group_mean[np.maximum(groups, 0)], 1.0)
+        weights[missing] = fill[missing]
+    return np.maximum(weights, 0.0)
+
+def effective_task_values(index, achieved=None, partial=None, complete=None):
+    """Apply compute_progress intangible rules (complete -> 100, partial -> at least 50)"""
+    achieved = index["task_achieved"] if achieved is None else np.asarray(achieved, dtype=float)
+    partial = index["task_partial"] if partial is None else partial
+    complete = index["task_complete"] if complete is None else complete
+    values = np.where(partial, np.maximum(achieved, 50.0), achieved)
+    return np.where(complete, 100.0, values)
+
+def make_segments(segments, n_segments):
+    """Precompute the sort order / group boundaries used by segment_mean"""
+    segments = np.asarray(segments, dtype=np.int64)
+    valid = np.flatnonzero(segments >= 0)
+    order = valid[np.argsort(segments[valid], kind="stable")]
+    sorted_segments = segments[order]
+    starts = np.flatnonzero(np.r_[True, sorted_segments[1:] != sorted_segments[:-1]]) if len(order) else np.array([], dtype=np.int64)
+    return {
+        "n": n_segments,
+        "order": order,
+        "starts": starts,
+        "present": sorted_segments[starts],
+        "counts": np.diff(np.r_[starts, len(order)]),
+    }
+
+def segment_mean(values, plan, weights=None):
+    """
+    Weighted mean of `values` (..., N) per segment -> (..., plan["n"]).
+    Entries with segment -1 are ignored, empty segments are 0 and segments whose
+    weights sum to 0 fall back to the plain mean.
+    """
+    values = np.asarray(values, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        values = np.broadcast_to(values, np.broadcast_shapes(values.shape, weights.shape))
+    out = np.zeros(values.shape[:-1] + (plan["n"],))
+    if not len(plan["starts"]):
+        return out
+    starts, present = plan["starts"], plan["present"]
+    ordered = values[..., plan["order"]]
+    plain = np.add.reduceat(ordered, starts, axis=-1) / plan["counts"]
+    if weights is None:
+        out[..., present] = plain
+        return out
+    weights = np.broadcast_to(weights, values.shape)[..., plan["order"]]
+    numerator = np.add.reduceat(ordered * weights, starts, axis=-1)
+    denominator = np.add.reduceat(weights, starts, axis=-1)
+    out[..., present] = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), plain)
+    return out
+
+def rollup_batch(index, task_values, task_weights=None, dp_weights=None):
+    """
+    Roll task values up the hierarchy for one or many draws at once.
+    task_values is (T,) or (draws, T); weights broadcast the same way.
+    With no weights this reproduces compute_progress exactly.
+    """
+    plans = index["plans"]
+    dp = segment_mean(task_values, plans["task"], task_weights)
+    objective = segment_mean(dp[..., index["dp_entry_slot"]], plans["dp_entry"], dp_weights)
+    phase = segment_mean(objective[..., index["obj_entry_slot"]], plans["obj_entry"])
+    return {"dp": dp, "objective": objective, "phase": phase}
+
+def batch_ranges(draws, width):
+    """Split `draws` into (start, stop) chunks of at most MAX_BATCH_CELLS cells"""
+    size = max(1, MAX_BATCH_CELLS // max(width, 1))
+    for start in range(0, draws, size):
+        yield start, min(draws, start + size)
+
+def rollup_to_dicts(index, rollup, draw=None):
+    """Convert one rollup row back to compute_progress-style {label: value} dicts"""
+    result = {}
+    for level in ("dp", "objective", "phase"):
+        row = rollup[level] if draw is None else rollup[level][draw]
+        result[level] = {label: float(value) for label, value in zip(index["labels"][level], row)}
+    return result
+
+# --- Incremental rollup graph ---
+# Running sums per DP / objective / phase; editing a task marks only its DP, that
+# DP's objectives and their phases dirty, so each edit costs O(depth).
+def _task_value(task):
+    achieved = parse_numeric(task.get("Achieved %", 0))
+    intangible = task.get("Intangible", "nil")
+    if intangible == "complete":
+        return 100.0
+    if intangible == "partial":
+        return max(achieved, 50.0)
+    return achieved
+
+def build_rollup_graph(data):
+    index = build_progress_index(data)
+    values = effective_task_values(index)
+    rollup = rollup_batch(index, values)
+    n = {level: len(index["labels"][level]) for level in ("dp", "objective", "phase")}
+
+    task_dp = index["task_dp"]
+    linked = task_dp >= 0
+    dp_sum = np.bincount(task_dp[linked], weights=values[linked], minlength=n["dp"])
+    dp_count = np.bincount(task_dp[linked], minlength=n["dp"])
+
+    # Parents are listed once per linking entry, matching compute_progress's duplicate handling
+    parents = {"dp": [[] for _ in range(n["dp"])], "objective": [[] for _ in range(n["objective"])]}
+    for dp_slot, obj_slot in zip(index["dp_entry_slot"], index["dp_entry_objective"]):
+        if obj_slot >= 0:
+            parents["dp"][dp_slot].append(int(obj_slot))
+    for obj_slot, phase_slot in zip(index["obj_entry_slot"], index["obj_entry_phase"]):
+        if phase_slot >= 0:
+            parents["objective"][obj_slot].append(int(phase_slot))
+
+    sums = {"dp": dp_sum.tolist(), "objective": [0.0] * n["objective"], "phase": [0.0] * n["phase"]}
+    counts = {"dp": dp_count.tolist(), "objective": [0] * n["objective"], "phase": [0] * n["phase"]}
+    for child, parent in (("dp", "objective"), ("objective", "phase")):
+        for slot, slot_parents in enumerate(parents[child]):
+            for parent_slot in slot_parents:
+                sums[parent][parent_slot] += rollup[child][slot]
+                counts[parent][parent_slot] += 1
+
+    return {
+        "index": index,
+        "task_values": values.tolist(),
+        "task_dp": task_dp.tolist(),
+        "parents": parents,
+        "sums": sums,
+        "counts": counts,
+        "values": {level: rollup[level].tolist() for level in ("dp", "objective", "phase")},
+        "dirty": {"dp": set(), "objective": set(), "phase": set()},
+        "progress": rollup_to_dicts(index, rollup)
+    }
+
+def update_graph_task(graph, task_idx, task):
+    """Record a task edit (progress, intangible or DP No) and mark its path dirty"""
+    old_slot = graph["task_dp"][task_idx]
+    new_slot = graph["index"]["slots"]["dp"].get(_key(task.get("DP No", "")), -1)
+    old_value = graph["task_values"][task_idx]
+    new_value = _task_value(task)
+    sums, counts, dirty = graph["sums"]["dp"], graph["counts"]["dp"], graph["dirty"]["dp"]
+    if old_slot >= 0:
+        sums[old_slot] -= old_value
+        counts[old_slot] -= 1
+        dirty.add(old_slot)
+    if new_slot >= 0:
+        sums[new_slot] += new_value
+        counts[new_slot] += 1
+        dirty.add(new_slot)
+    graph["task_dp"][task_idx] = new_slot
+    graph["task_values"][task_idx] = new_value
+
+def _flush_level(graph, level, parent_level):
+    index, values = graph["index"], graph["values"][level]
+    sums, counts = graph["sums"][level], graph["counts"][level]
+    for slot in graph["dirty"][level]:
+        new = sums[slot] / counts[slot] if counts[slot] else 0
+        delta = new - values[slot]
+        values[slot] = new
+        graph["progress"][level][index["labels"][level][slot]] = new
+        if parent_level:
+            for parent_slot in graph["parents"][level][slot]:
+                graph["sums"][parent_level][parent_slot] += delta
+                graph["dirty"][parent_level].add(parent_slot)
+    graph["dirty"][level] = set()
+
+def get_graph_progress(graph):
+    """compute_progress-style dicts, recomputing only the dirty path"""
+    _flush_level(graph, "dp", "objective")
+    _flush_level(graph, "objective", "phase")
+    _flush_level(graph, "phase", None)
+    return graph["progress"]
+
+def get_graph_value(graph, level, label):
+    """Current progress of one DP / objective / phase by its (unstripped) label"""
+    get_graph_progress(graph)
+    slot = graph["index"]["slots"][level].get(_key(label))
+    return graph["values"][level][slot] if slot is not None else 0
@@ -0,0 +1,107 @@
+
+import numpy as np
+from ahp_backend import parse_numeric
+from ahp_rollup import build_progress_index, effective_task_values, rollup_batch, batch_ranges
+
+SCENARIO_LEVELS = ("dp", "objective", "phase")
+DEFAULT_RAG = {"red": 40, "amber": 70}
+
+# Percentiles are read from per-item histograms over 0-100% in 0.1% steps,
+# so tens of thousands of draws never have to be held in memory at once
+HISTOGRAM_STEP = 0.1
+HISTOGRAM_BINS = int(round(100 / HISTOGRAM_STEP)) + 1
+SCENARIO_PERCENTILES = (5, 25, 50, 75, 95)
+
+def make_task_scenario(tasks, targets):
+    """
+    Turn {task_index: target} into per-task (low, likely, high) arrays.
+    A target is a number (fixed value) or a (low, likely, high) triangular range;
+    tasks without a target stay at their current Achieved %.
+    """
+    current = np.array([parse_numeric(t.get("Achieved %", 0)) for t in tasks], dtype=float)
+    low, likely, high = current.copy(), current.copy(), current.copy()
+    for task_idx, target in targets.items():
+        if not 0 <= task_idx < len(tasks):
+            raise ValueError(f"Task index {task_idx} is out of range")
+        if isinstance(target, (int, float)):
+            target = (target, target, target)
+        a, c, b = (float(v) for v in target)
+        if not 0 <= a <= c <= b <= 100:
+            task_no = tasks[task_idx].get("Task No", task_idx + 1)
+            raise ValueError(f"Task {task_no}: need 0 <= low <= likely <= high <= 100 (got {a}, {c}, {b})")
+        low[task_idx], likely[task_idx], high[task_idx] = a, c, b
+    return {"low": low, "likely": likely, "high": high}
+
+def sample_triangular(rng, low, likely, high, draws):
+    """Vectorised inverse-CDF triangular sampling with per-task parameters; zero-width ranges stay fixed"""
+    width = high - low
+    split = np.divide(likely - low, width, out=np.zeros_like(width), where=width > 0)
+    u = rng.random((draws, len(low)))
+    left = u < split
+    # One sqrt per sample: left branch uses u, right branch uses 1 - u
+    np.subtract(1, u, out=u, where=~left)
+    u *= np.where(left, width * (likely - low), width * (high - likely))
+    np.sqrt(u, out=u)
+    return np.where(left, low + u, high - u)
+
+def _percentile_from_histogram(counts, total, q):
+    cumulative = np.cumsum(counts, axis=1)
+    position = np.argmax(cumulative >= np.ceil(q / 100 * total), axis=1)
+    return position * HISTOGRAM_STEP
+
+def project_scenario(data, targets, draws=10000, rag=None, seed=None):
+    """
+    Monte Carlo projection of DP/objective/phase progress for a set of task targets.
+    Uses the same unweighted rollup as compute_progress, so the current column
+    matches the dashboards. Returns percentile bands and red/amber/green
+    probabilities (using the session RAG thresholds) per item.
+    """
+    if draws < 1:
+        raise ValueError("Number of draws must be at least 1")
+    rag = rag or DEFAULT_RAG
+    index = build_progress_index(data)
+    scenario = make_task_scenario(data.get("tasks", []), targets)
+    current = rollup_batch(index, effective_task_values(index))
+    uncertain = np.flatnonzero(scenario["high"] > scenario["low"])
+
+    rng = np.random.default_rng(seed)
+    sizes = {level: len(index["labels"][level]) for level in SCENARIO_LEVELS}
+    histograms = {level: np.zeros((sizes[level], HISTOGRAM_BINS), dtype=np.int64) for level in SCENARIO_LEVELS}
+    sums = {level: np.zeros(sizes[level]) for level in SCENARIO_LEVELS}
+    rag_counts = {level: np.zeros((3, sizes[level]), dtype=np.int64) for level in SCENARIO_LEVELS}
+
+    width = max(index["n_tasks"], max(sizes.values()) * 4, 1)
+    for start, stop in batch_ranges(draws, width):
+        n = stop - start
+        achieved = np.broadcast_to(scenario["likely"], (n, index["n_tasks"])).copy()
+        if len(uncertain):
+            achieved[:, uncertain] = sample_triangular(
+                rng, scenario["low"][uncertain], scenario["likely"][uncertain], scenario["high"][uncertain], n)
+        batch = rollup_batch(index, effective_task_values(index, achieved))
+        for level in SCENARIO_LEVELS:
+            values = batch[level]
+            m = sizes[level]
+            if not m:
+                continue
+            sums[level] += values.sum(axis=0)
+            bins = np.clip(np.rint(values / HISTOGRAM_STEP), 0, HISTOGRAM_BINS - 1).astype(np.int64)
+            flat = (bins + np.arange(m) * HISTOGRAM_BINS).ravel()
+            histograms[level] += np.bincount(flat, minlength=m * HISTOGRAM_BINS).reshape(m, HISTOGRAM_BINS)
+            red = values < rag["red"]
+            green = values >= rag["amber"]
+            rag_counts[level] += np.stack([red.sum(axis=0), (~red & ~green).sum(axis=0), green.sum(axis=0)])
+
+    levels = {}
+    for level in SCENARIO_LEVELS:
+        result = {
+            "labels": list(index["labels"][level]),
+            "names": list(index["names"][level]),
+            "current": current[level].tolist(),
+            "mean": (sums[level] / draws).tolist(),
+        }
+        for q in SCENARIO_PERCENTILES:
+            result[f"p{q}"] = _percentile_from_histogram(histograms[level], draws, q).tolist()
+        for row, status in enumerate(("red", "amber", "green")):
+            result[f"prob_{status}"] = (rag_counts[level][row] / draws).tolist()
+        levels[level] = result
+    return {"draws": draws, "rag": dict(rag), "levels": levels}
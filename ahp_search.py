@@ -0,0 +1,187 @@
+
+import re
+import heapq
+import threading
+from bisect import bisect_left
+from ahp_backend import get_project_snapshot, get_data_version, get_task_ids
+
+# Text fields indexed per entity kind
+SEARCH_FIELDS = {
+    "task": ("description", "Desc", "Name", "Task Name", "Task", "Criteria", "Progress Comment", "progress_comment"),
+    "dp": ("Name", "Description of DP"),
+    "objective": ("Name", "Description"),
+}
+SEARCH_KINDS = ("task", "dp", "objective")
+MATCH_SCORES = {"exact": 3, "prefix": 2, "fuzzy": 1}
+FUZZY_MIN_LENGTH = 4
+
+_WORD = re.compile(r"[^\W_]+")
+
+def tokenize(text):
+    return _WORD.findall(str(text).casefold())
+
+def _within_edits(a, b, limit):
+    """True if the Levenshtein distance between a and b is at most limit (banded, early exit)"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+def new_search_index():
+    """docs: doc_id -> entry; postings: term -> doc_ids; terms: sorted vocabulary for prefix lookups"""
+    return {"docs": {}, "postings": {}, "terms": [], "versions": {}}
+
+def _force_documents(force, data):
+    """(doc_id, text, meta) for every task, DP and objective of one force"""
+    tasks = data.get("tasks", [])
+    for task_id, task in zip(get_task_ids(tasks), tasks):
+        title = (task.get("description") or task.get("Name") or task.get("Task") or f"Task {task.get('Task No', '')}")
+        yield (force, "task", task_id), task, {
+            "dp": str(task.get("DP No") or task.get("dp_no") or "Unassigned"),
+            "label": f"Task {task.get('Task No', '')}".strip(), "title": str(title)}
+    for i, dp in enumerate(data.get("dps", [])):
+        dp_no = dp.get("DP No") or dp.get("dp_no")
+        yield (force, "dp", i), dp, {
+            "dp": str(dp_no), "label": f"DP {dp_no}", "title": str(dp.get("Name") or dp.get("Description of DP") or "")}
+    for i, obj in enumerate(data.get("objectives", [])):
+        yield (force, "objective", i), obj, {
+            "dp": None, "label": f"Objective {obj.get('Objective No', '')}".strip(), "title": str(obj.get("Name") or "")}
+
+def _remove_doc(index, doc_id):
+    entry = index["docs"].pop(doc_id)
+    postings = index["postings"]
+    for term in entry["terms"]:
+        docs = postings.get(term)
+        if docs is not None:
+            docs.discard(doc_id)
+            if not docs:
+                # The sorted vocabulary keeps the term; lookups skip terms without postings
+                del postings[term]
+
+def _add_doc(index, doc_id, text, meta):
+    terms = frozenset(tokenize(text))
+    index["docs"][doc_id] = dict(meta, text=text, terms=terms)
+    postings = index["postings"]
+    for term in terms:
+        if term not in postings:
+            postings[term] = set()
+            vocabulary = index["terms"]
+            i = bisect_left(vocabulary, term)
+            if i == len(vocabulary) or vocabulary[i] != term:
+                vocabulary.insert(i, term)
+        postings[term].add(doc_id)
+
+def index_force(index, force, data):
+    """
+    Bring one force's documents up to date. Only documents whose text changed
+    are re-tokenised, so a save touching a few tasks costs a few postings updates.
+    Returns the number of documents added, changed or removed.
+    """
+    seen = set()
+    touched = 0
+    for doc_id, item, meta in _force_documents(force, data):
+        kind = doc_id[1]
+        text = " ".join(str(item[field]) for field in SEARCH_FIELDS[kind] if item.get(field) not in (None, ""))
+        seen.add(doc_id)
+        entry = index["docs"].get(doc_id)
+        if entry is not None:
+            if entry["text"] == text:
+                entry.update(meta)
+                continue
+            _remove_doc(index, doc_id)
+        _add_doc(index, doc_id, text, meta)
+        touched += 1
+    for doc_id in [d for d in index["docs"] if d[0] == force and d not in seen]:
+        _remove_doc(index, doc_id)
+        touched += 1
+    return touched
+
+def drop_force(index, force):
+    for doc_id in [d for d in index["docs"] if d[0] == force]:
+        _remove_doc(index, doc_id)
+    index["versions"].pop(force, None)
+
+# project -> search index, kept in step with saves through get_data_version. Shared
+# by all sessions, which run on separate threads: re-syncing and querying hold
+# _SEARCH_LOCK so one session's update never interleaves with another's.
+_SEARCH_INDEXES = {}
+_SEARCH_LOCK = threading.RLock()
+
+def get_search_index(project, forces):
+    """
+    Search index for a project's forces; forces whose file changed since the last
+    query are re-synced. Hold _SEARCH_LOCK while reading the result (search_project does).
+    """
+    with _SEARCH_LOCK:
+        index = _SEARCH_INDEXES.setdefault(project, new_search_index())
+        for force in [f for f in index["versions"] if f not in forces]:
+            drop_force(index, force)
+        for force in forces:
+            version = get_data_version(project, force)
+            if index["versions"].get(force) != version:
+                index_force(index, force, get_project_snapshot(project, force))
+                index["versions"][force] = get_data_version(project, force)
+        return index
+
+def search_project(project, forces, query, **options):
+    """Re-sync the project's index and search it as one step; options as for search()"""
+    with _SEARCH_LOCK:
+        return search(get_search_index(project, forces), query, **options)
+
+def _expand_term(index, token, fuzzy):
+    """Matching vocabulary terms for one query token with their match kind"""
+    postings, terms = index["postings"], index["terms"]
+    matches = {}
+    i = bisect_left(terms, token)
+    while i < len(terms) and terms[i].startswith(token):
+        if terms[i] in postings:
+            matches[terms[i]] = "exact" if terms[i] == token else "prefix"
+        i += 1
+    if not matches and fuzzy and len(token) >= FUZZY_MIN_LENGTH:
+        # Fuzzy candidates share the first letter, which keeps the scan to one slice of the vocabulary
+        limit = 1 if len(token) < 8 else 2
+        start = bisect_left(terms, token[0])
+        stop = bisect_left(terms, chr(ord(token[0]) + 1))
+        for term in terms[start:stop]:
+            if term in postings and _within_edits(token, term, limit):
+                matches[term] = "fuzzy"
+    return matches
+
+def search(index, query, limit=50, fuzzy=True, kinds=SEARCH_KINDS):
+    """
+    Documents matching every word of the query (each word as exact, prefix or
+    fuzzy term), best scoring first. Returns result dicts with force, kind, dp,
+    label and title.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    scores = None
+    for token in tokens:
+        token_scores = {}
+        for term, match in _expand_term(index, token, fuzzy).items():
+            score = MATCH_SCORES[match]
+            for doc_id in index["postings"][term]:
+                if token_scores.get(doc_id, 0) < score:
+                    token_scores[doc_id] = score
+        if scores is None:
+            scores = token_scores
+        else:
+            scores = {doc_id: scores[doc_id] + s for doc_id, s in token_scores.items() if doc_id in scores}
+        if not scores:
+            return []
+    ranked = heapq.nsmallest(limit, (doc_id for doc_id in scores if doc_id[1] in kinds),
+                             key=lambda doc_id: (-scores[doc_id], SEARCH_KINDS.index(doc_id[1]), doc_id))
+    results = []
+    for doc_id in ranked:
+        entry = index["docs"][doc_id]
+        results.append({"force": doc_id[0], "kind": doc_id[1], "dp": entry["dp"], "label": entry["label"],
+                        "title": entry["title"], "text": entry["text"], "score": scores[doc_id]})
+    return results
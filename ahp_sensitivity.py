@@ -0,0 +1,154 @@
+
+import numpy as np
+from ahp_rollup import build_progress_index, effective_task_values, rollup_batch, batch_ranges
+
+SENSITIVITY_LEVELS = ("dp", "objective", "phase")
+PERTURB_OPTIONS = {
+    "both": "DP and task weights",
+    "dp": "DP weights only",
+    "task": "Task weights only"
+}
+
+def _ranks(values):
+    """Rank 1 = highest progress; ties keep their original order"""
+    order = np.argsort(-values, axis=-1, kind="stable")
+    ranks = np.empty_like(order)
+    positions = np.broadcast_to(np.arange(1, values.shape[-1] + 1), values.shape)
+    np.put_along_axis(ranks, order, positions, axis=-1)
+    return ranks
+
+def _level_stats(index, level, baseline, samples):
+    names = index["names"][level]
+    if not len(names):
+        return {"names": [], "baseline": [], "mean": [], "p5": [], "p50": [], "p95": [],
+                "rank_change": [], "reversals": []}
+    base_rank = _ranks(baseline)
+    rank_change = (_ranks(samples) != base_rank).mean(axis=0)
+    p5, p50, p95 = np.percentile(samples, [5, 50, 95], axis=0)
+
+    # Probability that each adjacent pair in the baseline ranking swaps places
+    order = np.argsort(-baseline, kind="stable")
+    swapped = (samples[:, order[1:]] > samples[:, order[:-1]]).mean(axis=0)
+    reversals = [
+        {"higher": names[a], "lower": names[b], "probability": float(p)}
+        for a, b, p in zip(order[:-1], order[1:], swapped)
+    ]
+    return {
+        "names": list(names),
+        "baseline": baseline.tolist(),
+        "base_rank": base_rank.tolist(),
+        "mean": samples.mean(axis=0).tolist(),
+        "p5": p5.tolist(),
+        "p50": p50.tolist(),
+        "p95": p95.tolist(),
+        "rank_change": rank_change.tolist(),
+        "reversals": reversals
+    }
+
+def weight_sensitivity(data, draws=2000, spread=0.25, perturb="both", seed=None):
+    """
+    Monte Carlo sensitivity of the DP/objective/phase rollups to KO weights.
+    Every draw multiplies each perturbed weight by U(1 - spread, 1 + spread);
+    all draws are rolled up in vectorised batches.
+    """
+    if perturb not in PERTURB_OPTIONS:
+        raise ValueError(f"Unknown perturbation '{perturb}'")
+    if not 0 <= spread < 1:
+        raise ValueError("Spread must be between 0 and 1")
+    index = build_progress_index(data)
+    values = effective_task_values(index)
+    task_weights, dp_weights = index["task_weights"], index["dp_weights"]
+    baseline = rollup_batch(index, values, task_weights, dp_weights)
+
+    rng = np.random.default_rng(seed)
+    samples = {level: [] for level in SENSITIVITY_LEVELS}
+    for start, stop in batch_ranges(draws, index["n_tasks"] + len(dp_weights)):
+        n = stop - start
+        draw_task_weights = task_weights
+        draw_dp_weights = dp_weights
+        if perturb in ("task", "both"):
+            draw_task_weights = task_weights * rng.uniform(1 - spread, 1 + spread, (n, len(task_weights)))
+        if perturb in ("dp", "both"):
+            draw_dp_weights = dp_weights * rng.uniform(1 - spread, 1 + spread, (n, len(dp_weights)))
+        batch = rollup_batch(index, np.broadcast_to(values, (n, len(values))), draw_task_weights, draw_dp_weights)
+        for level in SENSITIVITY_LEVELS:
+            samples[level].append(batch[level])
+
+    return {
+        "draws": draws,
+        "spread": spread,
+        "perturb": perturb,
+        "levels": {
+            level: _level_stats(index, level, baseline[level], np.concatenate(samples[level], axis=0))
+            for level in SENSITIVITY_LEVELS
+        }
+    }
+
+def _shifted_mean(total, weight, value, change, old):
+    """Weighted mean after one member's weight changes by `change`"""
+    denominator = weight + change
+    valid = (weight > 0) & (denominator > 0)
+    return np.where(valid, (total + change * value) / np.where(valid, denominator, 1), old)
+
+def weight_tornado(data, delta=0.25, perturb="both", top=15):
+    """
+    One-at-a-time tornado data: swing in overall force progress (mean objective
+    progress) when each DP or task weight is moved by -/+ delta. Each swing is
+    computed in closed form for all weights at once.
+    """
+    index = build_progress_index(data)
+    n_obj = len(index["labels"]["objective"])
+    if not n_obj:
+        return {"baseline": 0.0, "delta": delta, "bars": []}
+    values = effective_task_values(index)
+    task_weights, dp_weights = index["task_weights"], index["dp_weights"]
+    base = rollup_batch(index, values, task_weights, dp_weights)
+    overall = float(base["objective"].mean())
+
+    entry_slot = index["dp_entry_slot"]
+    entry_obj = index["dp_entry_objective"]
+    e = np.flatnonzero(entry_obj >= 0)
+    o, slot_of_entry = entry_obj[e], entry_slot[e]
+    entry_values = base["dp"][slot_of_entry]
+    obj_weight = np.bincount(o, weights=dp_weights[e], minlength=n_obj)
+    obj_count = np.bincount(o, minlength=n_obj)
+    obj_total = np.bincount(o, weights=dp_weights[e] * entry_values, minlength=n_obj)
+
+    bars = []
+    if perturb in ("dp", "both") and len(e):
+        w, old = dp_weights[e], base["objective"][o]
+        low, high = (
+            overall + (_shifted_mean(obj_total[o], obj_weight[o], entry_values, sign * delta * w, old) - old) / n_obj
+            for sign in (-1, 1)
+        )
+        dp_labels, dp_names = index["labels"]["dp"], index["names"]["dp"]
+        for i, slot in enumerate(slot_of_entry):
+            bars.append({"label": f"DP {dp_labels[slot]}: {dp_names[slot]}", "kind": "DP weight",
+                         "low": float(low[i]), "high": float(high[i])})
+
+    t = np.flatnonzero(index["task_dp"] >= 0)
+    if perturb in ("task", "both") and len(t):
+        # Overall progress is linear in DP values; gradient = d(overall)/d(DP slot)
+        share = np.where(obj_weight[o] > 0, dp_weights[e] / np.where(obj_weight[o] > 0, obj_weight[o], 1),
+                         1.0 / np.maximum(obj_count[o], 1))
+        gradient = np.bincount(slot_of_entry, weights=share, minlength=len(index["labels"]["dp"])) / n_obj
+
+        slot = index["task_dp"][t]
+        w, v, old = task_weights[t], values[t], base["dp"][slot]
+        slot_weight = np.bincount(slot, weights=w, minlength=len(gradient))
+        slot_total = np.bincount(slot, weights=w * v, minlength=len(gradient))
+        low, high = (
+            overall + (_shifted_mean(slot_total[slot], slot_weight[slot], v, sign * delta * w, old) - old) * gradient[slot]
+            for sign in (-1, 1)
+        )
+        tasks = data.get("tasks", [])
+        for i, task_idx in enumerate(t):
+            task = tasks[task_idx]
+            name = task.get("description") or task.get("Name") or f"Task {task_idx+1}"
+            bars.append({"label": f"Task {task.get('Task No', task_idx+1)}: {name}", "kind": "Task weight",
+                         "low": float(low[i]), "high": float(high[i])})
+
+    for bar in bars:
+        bar["swing"] = abs(bar["high"] - bar["low"])
+    bars.sort(key=lambda bar: bar["swing"], reverse=True)
+    return {"baseline": overall, "delta": delta, "bars": bars[:top]}
@@ -0,0 +1,137 @@
+
+import sys
+import pickle
+
+# Session key namespaces: key prefixes and the pages that use them. Keys of a
+# namespace are evicted as soon as the user is on a page that does not use it.
+SESSION_NAMESPACES = {
+    "progress_entry": {
+        "prefixes": ("weight_val_", "progress_val_", "synced_", "weight_slider_", "weight_input_",
+                     "progress_slider_", "progress_input_", "comment_", "intangible_", "sync_weight_",
+                     "sync_progress_", "select_dp_", "progress_grid_editor_", "grid_notice_",
+                     "entry_mode_", "rollup_graph_", "search_goto_", "sitrep_"),
+        "pages": ("Progress Entry", "Force Progress Entry")
+    },
+    "analysis": {
+        "prefixes": ("whatif_", "sens_", "sensitivity_", "tornado_chart_", "dp_chart_", "obj_chart_", "phase_chart_",
+                     "divergence_"),
+        "pages": ("Dashboard", "Force Dashboard")
+    },
+    "theater": {
+        "prefixes": ("drill_", "worst_", "theater_weight_", "force_weight_", "save_theater_weights_"),
+        "pages": ("Theater Command",)
+    },
+    "project_rows": {
+        "prefixes": ("pm_rows_page_",),
+        "pages": ("Project Management",)
+    },
+    # Pairwise comparisons are unsaved work, so KO state survives navigation and
+    # is only dropped for projects other than the active one
+    "ko": {
+        "prefixes": ("ko_",),
+        "pages": None
+    }
+}
+
+def key_namespace(key):
+    for namespace, spec in SESSION_NAMESPACES.items():
+        if str(key).startswith(spec["prefixes"]):
+            return namespace
+    return None
+
+def evict_keys(state, prefixes, keep=()):
+    """Delete keys starting with any of prefixes except those in keep; returns the number removed"""
+    prefixes = tuple(prefixes)
+    keep = set(keep)
+    stale = [key for key in list(state.keys()) if str(key).startswith(prefixes) and key not in keep]
+    for key in stale:
+        del state[key]
+    return len(stale)
+
+def enter_page(state, page, project=None):
+    """
+    Call once per run with the page being shown. Evicts every namespace the page
+    does not use and KO state of other projects. Returns the number of keys removed.
+    """
+    removed = 0
+    for namespace, spec in SESSION_NAMESPACES.items():
+        if spec["pages"] is not None and page not in spec["pages"]:
+            removed += evict_keys(state, spec["prefixes"])
+    if project is not None:
+        ko_prefixes = SESSION_NAMESPACES["ko"]["prefixes"]
+        stale = [key for key in list(state.keys())
+                 if str(key).startswith(ko_prefixes) and f"_{project}_" not in str(key)]
+        for key in stale:
+            del state[key]
+        removed += len(stale)
+    state["_session_evicted"] = state.get("_session_evicted", 0) + removed
+    return removed
+
+def _value_size(value):
+    """Approximate bytes held by a session value (pickled size, falling back to getsizeof)"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+def session_memory_report(state):
+    """Key counts and approximate bytes per namespace, largest first"""
+    totals = {}
+    for key in list(state.keys()):
+        namespace = key_namespace(key) or "other"
+        entry = totals.setdefault(namespace, {"namespace": namespace, "keys": 0, "bytes": 0})
+        entry["keys"] += 1
+        entry["bytes"] += _value_size(state[key])
+    rows = sorted(totals.values(), key=lambda row: row["bytes"], reverse=True)
+    return {
+        "namespaces": rows,
+        "keys": sum(row["keys"] for row in rows),
+        "bytes": sum(row["bytes"] for row in rows),
+        "evicted": state.get("_session_evicted", 0)
+    }
+
+# Wall-clock budget per script run, in ms, from the top of app.py to the end of
+# main(). Pages not listed use DEFAULT_PAGE_BUDGET_MS.
+PAGE_BUDGETS_MS = {
+    "Login": 150,
+    "Phases": 300, "Objectives": 300, "Decisive Points": 300, "Tasks": 400,
+    "Chat": 200, "Force Manager": 200, "Logout": 150,
+    "Progress Entry": 800, "Force Progress Entry": 800, "KO Method": 600,
+    "Dashboard": 1500, "Force Dashboard": 1500, "Theater Command": 1200,
+    "Control Panel": 600, "Project Management": 800
+}
+DEFAULT_PAGE_BUDGET_MS = 500
+# First run in a fresh server process, which also pays for module imports
+COLD_START_BUDGET_MS = 2000
+
+# Process-wide: the first recorded run is the cold start
+_PROCESS_TIMINGS = {"cold_start": None}
+
+def record_page_time(state, page, elapsed_ms):
+    """Add one run of page to the session's timings; the first run in the process is kept as the cold start"""
+    if _PROCESS_TIMINGS["cold_start"] is None:
+        _PROCESS_TIMINGS["cold_start"] = {"page": page, "ms": elapsed_ms}
+    timings = state.setdefault("_page_timings", {})
+    entry = timings.setdefault(page, {"runs": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0, "over_budget": 0})
+    entry["runs"] += 1
+    entry["total_ms"] += elapsed_ms
+    entry["last_ms"] = elapsed_ms
+    entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    if elapsed_ms > PAGE_BUDGETS_MS.get(page, DEFAULT_PAGE_BUDGET_MS):
+        entry["over_budget"] += 1
+    return entry
+
+def page_timing_report(state):
+    """Per-page run times against budget for this session, plus the process cold start"""
+    rows = []
+    for page, entry in state.get("_page_timings", {}).items():
+        budget = PAGE_BUDGETS_MS.get(page, DEFAULT_PAGE_BUDGET_MS)
+        rows.append({"page": page, "runs": entry["runs"], "last_ms": entry["last_ms"],
+                     "mean_ms": entry["total_ms"] / entry["runs"], "max_ms": entry["max_ms"],
+                     "budget_ms": budget, "over_budget": entry["over_budget"]})
+    rows.sort(key=lambda row: row["mean_ms"] / row["budget_ms"], reverse=True)
+    cold = _PROCESS_TIMINGS["cold_start"]
+    return {
+        "pages": rows,
+        "cold_start": dict(cold, budget_ms=COLD_START_BUDGET_MS) if cold else None
+    }
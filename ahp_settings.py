@@ -0,0 +1,77 @@
+
+import os
+import json
+import hmac
+import hashlib
+import secrets
+import threading
+from ahp_backend import read_json_shared, invalidate_json_cache, copy_json
+from ahp_rag import DEFAULT_RAG
+
+# Settings shared by every session: {"pins": {role: hashed pin}, "rag": {project: thresholds}}.
+# Read through the process-wide JSON cache, so a change saved by Control is seen
+# by all sessions on their next run.
+SETTINGS_FILE = "ahp_settings.json"
+DEFAULT_PINS = {"control": "9999"}
+DEFAULT_FORCE_PIN = "0000"
+PIN_ITERATIONS = 100_000
+
+_SETTINGS_LOCK = threading.Lock()
+
+def load_settings():
+    """Shared settings; read-only for callers"""
+    return read_json_shared(SETTINGS_FILE, default={})
+
+def update_settings(change):
+    """Apply change(settings) to a private copy and write it atomically; writers are serialised"""
+    with _SETTINGS_LOCK:
+        settings = copy_json(load_settings())
+        change(settings)
+        tmp_path = f"{SETTINGS_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp_path, SETTINGS_FILE)
+        invalidate_json_cache(SETTINGS_FILE)
+
+def hash_pin(pin, salt=None, iterations=PIN_ITERATIONS):
+    """Salted PBKDF2-SHA256 record for a PIN; the PIN itself is never stored"""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", str(pin).encode(), bytes.fromhex(salt), iterations).hex()
+    return {"salt": salt, "hash": digest, "iterations": iterations}
+
+def verify_pin(role, pin):
+    """True if pin is the role's PIN (the default PIN until one has been set)"""
+    record = load_settings().get("pins", {}).get(role)
+    if record is None:
+        return hmac.compare_digest(str(pin), DEFAULT_PINS.get(role, DEFAULT_FORCE_PIN))
+    expected = hash_pin(pin, record["salt"], record.get("iterations", PIN_ITERATIONS))["hash"]
+    return hmac.compare_digest(expected, record["hash"])
+
+def has_custom_pin(role):
+    return role in load_settings().get("pins", {})
+
+def set_pins(pins):
+    """Store new PINs for {role: pin}; blank entries keep the current PIN. Returns the roles changed."""
+    pins = {role: str(pin).strip() for role, pin in pins.items() if str(pin).strip()}
+    for role, pin in pins.items():
+        if len(pin) < 4:
+            raise ValueError(f"PIN for {role} must be at least 4 characters")
+    if not pins:
+        return []
+    records = {role: hash_pin(pin) for role, pin in pins.items()}
+    update_settings(lambda settings: settings.setdefault("pins", {}).update(records))
+    return sorted(records)
+
+def get_rag_thresholds(project):
+    """The project's RAG thresholds, or the defaults"""
+    rag = load_settings().get("rag", {}).get(project) if project else None
+    return dict(rag) if rag else dict(DEFAULT_RAG)
+
+def set_rag_thresholds(project, red, amber):
+    red, amber = int(red), int(amber)
+    if not (0 <= red <= 100 and 0 <= amber <= 100):
+        raise ValueError("RAG thresholds must be between 0 and 100")
+
+    def change(settings):
+        settings.setdefault("rag", {})[project] = {"red": red, "amber": amber}
+    update_settings(change)
@@ -0,0 +1,120 @@
+
+import numpy as np
+import pandas as pd
+from ahp_backend import get_progress_range, INTANGIBLE_LEVELS
+
+# Accepted sitrep column names, first match wins
+SITREP_COLUMNS = {
+    "Task No": ["Task No", "Task No.", "task no", "task_no", "Task Number"],
+    "DP No": ["DP No", "DP No.", "dp no", "dp_no", "DP"],
+    "Progress": ["Progress", "Achieved %", "Progress %", "progress", "achieved", "Actual Progress"],
+    "Intangible": ["Intangible", "Assessment", "intangible"],
+    "Progress Comment": ["Progress Comment", "Comment", "Remarks", "Notes", "progress_comment"]
+}
+SITREP_REQUIRED = ["Task No", "Progress"]
+
+def read_sitrep(file, filename):
+    """Read a CSV or Excel sitrep into a DataFrame with canonical column names"""
+    if str(filename).lower().endswith(".csv"):
+        df = pd.read_csv(file)
+    else:
+        df = pd.read_excel(file)
+    columns = {str(col).strip(): col for col in df.columns}
+    renamed = {}
+    for canonical, aliases in SITREP_COLUMNS.items():
+        for alias in aliases:
+            if alias in columns:
+                renamed[columns[alias]] = canonical
+                break
+    missing = [col for col in SITREP_REQUIRED if col not in renamed.values()]
+    if missing:
+        raise ValueError(f"Sitrep is missing required column(s): {', '.join(missing)}")
+    return df[list(renamed)].rename(columns=renamed)
+
+def _key_series(values):
+    """Join keys as stripped strings; integral floats from spreadsheets (3.0) become 3"""
+    values = pd.Series(values)
+    if pd.api.types.is_float_dtype(values):
+        integral = values.notna() & (values == np.floor(values))
+        text = values.astype(str)
+        text[integral] = values[integral].astype(np.int64).astype(str)
+        values = text.where(values.notna(), "")
+    return values.fillna("").astype(str).str.strip()
+
+def plan_sitrep_updates(data, sitrep):
+    """
+    Match sitrep rows to tasks on Task No (plus DP No when the sitrep has it)
+    with one merge, and validate progress against each task's tangible/intangible
+    range. Returns {"updates": {task_index: fields}, "errors": [...], "rows": n}.
+    Rows with errors are reported and left out of updates.
+    """
+    tasks = data.get("tasks", [])
+    plan = pd.DataFrame({
+        "task_index": np.arange(len(tasks)),
+        "Task No": _key_series([t.get("Task No", "") for t in tasks]),
+        "DP No": _key_series([t.get("DP No") or t.get("dp_no") or "" for t in tasks]),
+        "tangible": [str(t.get("Type", "T")).upper() == "T" for t in tasks],
+        "current_intangible": [t.get("Intangible", "nil") or "nil" for t in tasks]
+    })
+    report = sitrep.copy()
+    report["row"] = np.arange(len(report)) + 2  # spreadsheet row number, after the header
+    report["Task No"] = _key_series(report["Task No"])
+    keys = ["DP No", "Task No"] if "DP No" in report.columns else ["Task No"]
+    if "DP No" in report.columns:
+        report["DP No"] = _key_series(report["DP No"])
+
+    # Plan keys that are not unique cannot be updated safely from a sitrep
+    plan_dupes = plan.duplicated(keys, keep=False)
+    ambiguous_keys = plan.loc[plan_dupes, keys].drop_duplicates().assign(ambiguous=True)
+    merged = report.merge(plan[~plan_dupes], on=keys, how="left").merge(ambiguous_keys, on=keys, how="left")
+    ambiguous = merged["ambiguous"].notna()
+    unmatched = merged["task_index"].isna() & ~ambiguous
+    repeated = merged.duplicated(keys, keep=False) & ~unmatched & ~ambiguous
+
+    progress = pd.to_numeric(merged["Progress"].astype(str).str.replace("%", "", regex=False).str.strip(), errors="coerce")
+    if "Intangible" in merged.columns:
+        intangible = merged["Intangible"].fillna("").astype(str).str.strip().str.lower()
+        intangible = intangible.where(intangible != "", merged["current_intangible"])
+    else:
+        intangible = merged["current_intangible"]
+    intangible = intangible.fillna("nil")
+    tangible = ~merged["tangible"].eq(False)
+    bad_level = ~tangible & ~intangible.isin(INTANGIBLE_LEVELS)
+
+    ranges = {level: get_progress_range(level)[:2] for level in INTANGIBLE_LEVELS}
+    low = np.where(tangible, 0, intangible.map(lambda level: ranges.get(level, (0, 100))[0]))
+    high = np.where(tangible, 100, intangible.map(lambda level: ranges.get(level, (0, 100))[1]))
+    not_number = progress.isna()
+    out_of_range = ~not_number & ((progress < low) | (progress > high))
+
+    range_issue = "progress must be between " + pd.Series(low, index=merged.index).astype(str) + " and " + pd.Series(high, index=merged.index).astype(str) + "%"
+    checks = [
+        (ambiguous, "Task No matches more than one task in the plan; add a DP No column"),
+        (unmatched, "no task with this Task No" + ("/DP No" if "DP No" in keys else "")),
+        (repeated, "task appears more than once in the sitrep"),
+        (not_number, "progress is not a number"),
+        (bad_level, "assessment must be nil, partial or complete"),
+        (out_of_range, range_issue),
+    ]
+    # Each row reports only its first problem
+    issue = pd.Series("", index=merged.index, dtype=object)
+    for mask, message in checks:
+        first = mask & (issue == "")
+        issue[first] = message[first] if isinstance(message, pd.Series) else message
+    invalid = issue != ""
+    errors = [{"row": int(row), "Task No": task_no, "issue": text}
+              for row, task_no, text in zip(merged.loc[invalid, "row"], merged.loc[invalid, "Task No"], issue[invalid])]
+
+    valid = merged[~invalid]
+    comments = valid["Progress Comment"] if "Progress Comment" in valid.columns else pd.Series(np.nan, index=valid.index)
+    updates = {}
+    for task_index, value, level, is_tangible, comment in zip(valid["task_index"].astype(int), progress[~invalid],
+                                                              intangible[~invalid], tangible[~invalid], comments):
+        update = {"Progress": float(value)}
+        # Tangible tasks carry no assessment; a sitrep level for one is ignored
+        if not is_tangible:
+            update["Intangible"] = level
+        if pd.notna(comment) and str(comment).strip():
+            update["Progress Comment"] = str(comment).strip()
+        updates[task_index] = update
+    return {"updates": updates, "errors": errors, "rows": len(report)}
@@ -0,0 +1,31 @@
+import os
+import threading
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# name -> (file mtime, <style> block), shared by all sessions. It lives here and
+# not in app.py because Streamlit re-executes app.py on every run.
+_STYLESHEETS = {}
+_STYLESHEETS_LOCK = threading.Lock()
+
+def stylesheet_tag(name):
+    """
+    Inline <style> block for static/<name>, read once per process and again only
+    when the file changes. Streamlit's static file server sends .css as
+    text/plain, which browsers will not apply, so the CSS cannot be a <link>;
+    the block is sent with every run, so pages ask only for the sheets they use.
+    """
+    path = os.path.join(STATIC_DIR, name)
+    mtime = os.stat(path).st_mtime_ns
+    with _STYLESHEETS_LOCK:
+        cached = _STYLESHEETS.get(name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        tag = f"<style>{f.read()}</style>"
+    with _STYLESHEETS_LOCK:
+        _STYLESHEETS[name] = (mtime, tag)
+    return tag
+
+def stylesheet_tags(names):
+    return "".join(stylesheet_tag(name) for name in names)
@@ -0,0 +1,320 @@
+
+import os
+import json
+from datetime import datetime
+from ahp_backend import get_project_snapshot, compute_progress, get_data_version, read_json_shared, invalidate_json_cache, copy_json
+from ahp_rollup import build_progress_index, effective_task_values, rollup_batch
+
+THEATER_MODES = {
+    "objectives": "Weighted by objective count",
+    "force_weight": "Weighted by force weight",
+    "theater_weight": "Control-assigned theater weights",
+    "equal": "Equal weight per force"
+}
+DEFAULT_THEATER_MODE = "objectives"
+
+# --- Theater membership storage ---
+# On disk the force -> theater map is the single source of truth; each theater's
+# "forces" list and "unassigned_forces" are derived views rebuilt on load.
+THEATER_CONFIG_VERSION = 2
+
+def get_theater_config_path(project):
+    return f"{project}_theaters.json"
+
+def _derive_membership(config, available_forces):
+    for theater in config["theaters"].values():
+        theater["forces"] = []
+    for force, theater_name in config["assignments"].items():
+        config["theaters"][theater_name]["forces"].append(force)
+    config["unassigned_forces"] = [f for f in available_forces if f not in config["assignments"]]
+    return config
+
+def normalise_theater_config(raw, available_forces):
+    """
+    Validate a stored (or legacy list-based) config in linear time: unknown forces
+    and assignments to missing theaters are dropped, a force keeps its first theater.
+    """
+    available = set(available_forces)
+    theaters = {}
+    for name, theater in raw.get("theaters", {}).items():
+        theaters[name] = {k: v for k, v in theater.items() if k != "forces"}
+        theaters[name].setdefault("created_date", str(datetime.now().date()))
+    if "assignments" in raw:
+        pairs = raw["assignments"].items()
+    else:
+        # Legacy format: lists of forces per theater
+        pairs = ((force, name) for name, theater in raw.get("theaters", {}).items() for force in theater.get("forces", []))
+    assignments = {}
+    for force, theater_name in pairs:
+        if force in available and theater_name in theaters and force not in assignments:
+            assignments[force] = theater_name
+    config = {k: v for k, v in raw.items() if k not in ("theaters", "assignments", "unassigned_forces", "version")}
+    config.update({"version": THEATER_CONFIG_VERSION, "theaters": theaters, "assignments": assignments})
+    return _derive_membership(config, available_forces)
+
+def read_theater_config(project, available_forces):
+    path = get_theater_config_path(project)
+    # Private copy: the normalised config shares nested dicts with its input
+    return normalise_theater_config(copy_json(read_json_shared(path, default={})), available_forces)
+
+def write_theater_config(project, config):
+    """Atomically persist the config without its derived membership lists"""
+    stored = {k: v for k, v in config.items() if k != "unassigned_forces"}
+    stored["theaters"] = {name: {k: v for k, v in theater.items() if k != "forces"}
+                          for name, theater in config["theaters"].items()}
+    path = get_theater_config_path(project)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stored, f, indent=2)
+    os.replace(tmp_path, path)
+    invalidate_json_cache(path)
+
+def create_theater(config, name, forces=()):
+    if not name or name in config["theaters"]:
+        raise ValueError(f"Theater '{name}' already exists" if name else "Theater name is required")
+    config["theaters"][name] = {"created_date": str(datetime.now().date()), "forces": []}
+    for force in forces:
+        assign_force(config, force, name)
+
+def assign_force(config, force, theater_name):
+    """Add an unassigned force to a theater, or move it from its current theater"""
+    if theater_name not in config["theaters"]:
+        raise ValueError(f"Unknown theater '{theater_name}'")
+    current = config["assignments"].get(force)
+    if current == theater_name:
+        return
+    if current is not None:
+        config["theaters"][current]["forces"].remove(force)
+        config["theaters"][current].get("weights", {}).pop(force, None)
+    elif force in config["unassigned_forces"]:
+        config["unassigned_forces"].remove(force)
+    else:
+        raise ValueError(f"Unknown force '{force}'")
+    # Re-insert so the map keeps the same member order as the derived lists
+    config["assignments"].pop(force, None)
+    config["assignments"][force] = theater_name
+    config["theaters"][theater_name]["forces"].append(force)
+
+def unassign_force(config, force):
+    theater_name = config["assignments"].pop(force, None)
+    if theater_name is None:
+        return
+    config["theaters"][theater_name]["forces"].remove(force)
+    config["theaters"][theater_name].get("weights", {}).pop(force, None)
+    config["unassigned_forces"].append(force)
+
+def delete_theater(config, name):
+    for force in list(config["theaters"].get(name, {}).get("forces", [])):
+        unassign_force(config, force)
+    config["theaters"].pop(name, None)
+
+# (project, force) -> rollup summary, rebuilt when the force's data version changes
+_FORCE_ROLLUPS = {}
+
+def get_force_rollup(project, force):
+    """Control-side compute_progress result for one force, cached until the project file is saved"""
+    version = get_data_version(project, force)
+    cached = _FORCE_ROLLUPS.get((project, force))
+    if cached and cached["version"] == version:
+        return cached
+    data = get_project_snapshot(project, force)
+    if version[1] is None:
+        # The snapshot load just created the file
+        version = get_data_version(project, force)
+    progress = compute_progress(data)
+    objective_values = list(progress["objective"].values())
+    cached = {
+        "version": version,
+        "data": data,
+        "progress": progress,
+        "objective_count": len(objective_values),
+        "objective_mean": sum(objective_values) / len(objective_values) if objective_values else 0
+    }
+    _FORCE_ROLLUPS[(project, force)] = cached
+    return cached
+
+def get_theater_mode(theater_config):
+    mode = theater_config.get("mode", DEFAULT_THEATER_MODE)
+    return mode if mode in THEATER_MODES else DEFAULT_THEATER_MODE
+
+def _force_weight(theater_config, theater, force, rollup, mode):
+    if mode == "objectives":
+        return float(rollup["objective_count"])
+    if mode == "force_weight":
+        return float(theater_config.get("force_weights", {}).get(force, 1))
+    if mode == "theater_weight":
+        return float(theater.get("weights", {}).get(force, 1))
+    return 1.0
+
+def calculate_theaters(project, theater_config, mode=None):
+    """
+    Progress for every theater in one pass. Each force is rolled up at most once
+    (and only re-read after it has been saved); forces without objectives are skipped.
+    """
+    mode = mode or get_theater_mode(theater_config)
+    if mode not in THEATER_MODES:
+        raise ValueError(f"Unknown theater aggregation mode '{mode}'")
+    theaters = theater_config.get("theaters", {})
+    forces = {force for theater in theaters.values() for force in theater.get("forces", [])}
+    rollups = {force: get_force_rollup(project, force) for force in forces}
+
+    results = {}
+    for name, theater in theaters.items():
+        breakdown = {}
+        weighted_sum = total_weight = 0.0
+        for force in theater.get("forces", []):
+            rollup = rollups[force]
+            if not rollup["objective_count"]:
+                continue
+            weight = _force_weight(theater_config, theater, force, rollup, mode)
+            breakdown[force] = {
+                "progress": rollup["objective_mean"],
+                "objectives": rollup["objective_count"],
+                "weight": weight
+            }
+            weighted_sum += weight * rollup["objective_mean"]
+            total_weight += weight
+        results[name] = {
+            "progress": weighted_sum / total_weight if total_weight > 0 else 0,
+            "forces": breakdown
+        }
+    return results
+
+def calculate_theater_progress(project, theater_forces, mode=DEFAULT_THEATER_MODE, weights=None):
+    """Progress for one ad-hoc list of forces; `weights` maps force -> weight for weighted modes"""
+    config = {
+        "theaters": {"_": {"forces": list(theater_forces), "weights": weights or {}}},
+        "force_weights": weights or {}
+    }
+    return calculate_theaters(project, config, mode)["_"]["progress"]
+
+# --- Aggregate tree: theater -> force -> phase -> objective -> DP -> task ---
+TREE_LEVELS = ("theater", "force", "phase", "objective", "dp", "task")
+UNASSIGNED = "(Unassigned)"
+
+# project -> {"key", "tree"}; only the latest data version is kept
+_THEATER_TREES = {}
+
+def _add_node(tree, parent_id, key, level, name, progress):
+    node_id = parent_id + (key,)
+    node = tree["nodes"].get(node_id)
+    if node is None:
+        node = {"id": node_id, "level": level, "name": name, "progress": progress, "children": []}
+        tree["nodes"][node_id] = node
+        tree["nodes"][parent_id]["children"].append(node_id)
+    return node_id
+
+def _add_force_subtree(tree, force_id, rollup):
+    """Attach phases/objectives/DPs/tasks of one force using the compute_progress matching rules"""
+    data = rollup["data"]
+    tasks = data.get("tasks", [])
+    index = build_progress_index(data)
+    values = effective_task_values(index)
+    levels = rollup_batch(index, values)
+    labels, names = index["labels"], index["names"]
+
+    # Orphans (no matching parent) are grouped under "(Unassigned)" buckets
+    phase_ids = {}
+    def phase_node(slot):
+        if slot not in phase_ids:
+            if slot < 0:
+                phase_ids[slot] = _add_node(tree, force_id, UNASSIGNED, "phase", UNASSIGNED, None)
+            else:
+                phase_ids[slot] = _add_node(tree, force_id, labels["phase"][slot], "phase",
+                                            str(labels["phase"][slot]), float(levels["phase"][slot]))
+        return phase_ids[slot]
+
+    obj_ids = {}
+    for obj_slot, phase_slot in zip(index["obj_entry_slot"], index["obj_entry_phase"]):
+        obj_ids.setdefault(obj_slot, []).append(_add_node(
+            tree, phase_node(phase_slot), labels["objective"][obj_slot], "objective",
+            str(labels["objective"][obj_slot]), float(levels["objective"][obj_slot])))
+    # Objectives that are only referenced by DPs still need a node
+    def objective_nodes(slot):
+        if slot < 0 or slot not in obj_ids:
+            parent = phase_node(-1)
+            key = UNASSIGNED if slot < 0 else labels["objective"][slot]
+            progress = None if slot < 0 else float(levels["objective"][slot])
+            obj_ids[slot] = [_add_node(tree, parent, key, "objective", str(key), progress)]
+        return obj_ids[slot]
+
+    dp_ids = {}
+    for dp_slot, obj_slot in zip(index["dp_entry_slot"], index["dp_entry_objective"]):
+        for parent in objective_nodes(obj_slot):
+            dp_ids.setdefault(dp_slot, []).append(_add_node(
+                tree, parent, labels["dp"][dp_slot], "dp",
+                f"DP {labels['dp'][dp_slot]}: {names['dp'][dp_slot]}", float(levels["dp"][dp_slot])))
+    for task_idx, dp_slot in enumerate(index["task_dp"]):
+        task = tasks[task_idx]
+        if dp_slot < 0:
+            parents = dp_ids.setdefault(-1, [_add_node(tree, objective_nodes(-1)[0], UNASSIGNED, "dp", UNASSIGNED, None)])
+        else:
+            parents = dp_ids[dp_slot]
+        name = task.get("description") or task.get("Name") or ""
+        for parent in parents:
+            _add_node(tree, parent, task_idx, "task", f"Task {task.get('Task No', task_idx + 1)}: {name}",
+                      float(values[task_idx]))
+
+def _fill_bucket_progress(tree, node_id):
+    """Unassigned buckets take the mean of their children"""
+    node = tree["nodes"][node_id]
+    for child in node["children"]:
+        _fill_bucket_progress(tree, child)
+    if node["progress"] is None:
+        children = [tree["nodes"][c]["progress"] for c in node["children"]]
+        children = [p for p in children if p is not None]
+        node["progress"] = sum(children) / len(children) if children else 0
+
+def build_theater_tree(project, theater_config, mode=None):
+    """
+    Precomputed theater -> force -> phase -> objective -> DP -> task tree.
+    Rebuilt only when a force's data version, the theater config or the mode
+    changes; drill-down and worst-N queries are then dictionary lookups.
+    Node ids are tuples of keys along the path from the root ().
+    """
+    mode = mode or get_theater_mode(theater_config)
+    theaters = theater_config.get("theaters", {})
+    forces = sorted({force for theater in theaters.values() for force in theater.get("forces", [])})
+    key = (mode, json.dumps(theater_config, sort_keys=True, default=str),
+           tuple((force, get_data_version(project, force)) for force in forces))
+    cached = _THEATER_TREES.get(project)
+    if cached and cached["key"] == key:
+        return cached["tree"]
+
+    results = calculate_theaters(project, theater_config, mode)
+    tree = {"mode": mode, "nodes": {(): {"id": (), "level": "root", "name": project, "progress": None, "children": []}}}
+    for theater_name, theater in theaters.items():
+        theater_id = _add_node(tree, (), theater_name, "theater", theater_name, results[theater_name]["progress"])
+        for force in theater.get("forces", []):
+            rollup = get_force_rollup(project, force)
+            force_id = _add_node(tree, theater_id, force, "force", force.capitalize(), rollup["objective_mean"])
+            tree["nodes"][force_id]["weight"] = results[theater_name]["forces"].get(force, {}).get("weight", 0)
+            _add_force_subtree(tree, force_id, rollup)
+    _fill_bucket_progress(tree, ())
+
+    # Worst-first ordering per theater and level (None = all theaters)
+    ranked = {}
+    for node_id, node in tree["nodes"].items():
+        if node_id:
+            for scope in (node_id[0], None):
+                ranked.setdefault(scope, {}).setdefault(node["level"], []).append(node_id)
+    for scope_levels in ranked.values():
+        for ids in scope_levels.values():
+            ids.sort(key=lambda node_id: tree["nodes"][node_id]["progress"])
+    tree["ranked"] = ranked
+
+    _THEATER_TREES[project] = {"key": key, "tree": tree}
+    return tree
+
+def get_tree_node(tree, node_id=()):
+    return tree["nodes"].get(tuple(node_id))
+
+def get_tree_children(tree, node_id=()):
+    node = get_tree_node(tree, node_id)
+    return [tree["nodes"][child] for child in node["children"]] if node else []
+
+def worst_nodes(tree, level, theater=None, n=10, best=False):
+    """e.g. worst_nodes(tree, "dp", "North") -> the 10 lowest-progress DPs in theater North"""
+    ids = tree["ranked"].get(theater, {}).get(level, [])
+    ids = ids[::-1][:n] if best else ids[:n]
+    return [tree["nodes"][node_id] for node_id in ids]
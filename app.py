@@ -1,11 +1,21 @@
+import time
+_RUN_STARTED = time.perf_counter()
 
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
 import os
 import json
 from datetime import datetime
 from ahp_backend import *
+from ahp_integrity import summarise_integrity
+from ahp_search import search_project
+from ahp_styles import stylesheet_tag, stylesheet_tags
+from ahp_rag import build_rag_table, rag_counts, level_average, get_rag_table
+from ahp_settings import verify_pin, has_custom_pin, set_pins, get_rag_thresholds, set_rag_thresholds
+from ahp_session import (PAGE_BUDGETS_MS, enter_page, evict_keys, session_memory_report,
+                         record_page_time, page_timing_report)
+# pandas, plotly and the numpy analysis modules (ahp_group, ahp_sensitivity,
+# ahp_scenario, ahp_divergence, ahp_sitrep, ahp_rollup, ahp_theater) are imported
+# inside the functions that use them, so login and light pages do not pay for them.
 
 st.set_page_config(
     page_title="COPP AHP Military Planner", 
@@ -13,41 +23,29 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Hide Streamlit default elements with CSS immediately after page config
-st.markdown("""
-<style>
-/* Hide the Deploy button, hamburger menu, and header */
-#MainMenu {visibility: hidden;}
-header {visibility: hidden;}
-footer {visibility: hidden;}
-.stDeployButton {display: none;}
-button[kind="header"] {display: none;}
-[data-testid="stToolbar"] {display: none;}
-.css-14xtw13.e8zbici0 {display: none;}
-section[data-testid="stSidebar"] > div:first-child {padding-top: 0rem;}
-</style>
-""", unsafe_allow_html=True)
+# Hide Streamlit default elements immediately after page config
+st.markdown(stylesheet_tag("base.css"), unsafe_allow_html=True)
 
 FORCES_FILE = "forces.json"
 AHP_TEAM_FILE = "ahp_team.json"
 
 def load_forces():
-    if os.path.exists(FORCES_FILE):
-        with open(FORCES_FILE, "r") as f:
-            return json.load(f)
-    return []  # No default forces
+    # Parsed once per change and shared by all sessions; callers get their own list
+    forces = read_json_shared(FORCES_FILE)
+    return list(forces) if forces is not None else []  # No default forces
 
 def save_forces(sides):
     with open(FORCES_FILE, "w") as f:
         json.dump(sides, f)
+    invalidate_json_cache(FORCES_FILE)
 
 def load_ahp_team():
-    if os.path.exists(AHP_TEAM_FILE):
-        try:
-            with open(AHP_TEAM_FILE, "r") as f:
-                return json.load(f)
-        except:
-            pass
+    try:
+        team = read_json_shared(AHP_TEAM_FILE)
+        if team is not None:
+            return copy_json(team)
+    except:
+        pass
     return [
         {"name": "Cdr A Kumar", "role": "Lead Architect"},
         {"name": "Lt B Singh", "role": "Backend Developer"},
@@ -58,130 +56,51 @@ def load_ahp_team():
 def save_ahp_team(team_data):
     with open(AHP_TEAM_FILE, "w") as f:
         json.dump(team_data, f, indent=2)
+    invalidate_json_cache(AHP_TEAM_FILE)
 
 def load_independent_project(project, force):
-    """Load independent force data (completely separate from control data)"""
+    """Load a force's independent view: Control's structure with the force's own progress overlay"""
     try:
-        independent_file = f"{project}_{force}_independent.json"
-        
-        if os.path.exists(independent_file):
-            # Load the complete independent data
-            with open(independent_file, "r") as f:
-                independent_data = json.load(f)
-            
-            # Ensure we have the complete structure by merging with base data if needed
-            base_data = load_project(project, force)
-            
-            # Preserve independent progress but ensure we have all structural data
-            merged_data = base_data.copy()
-            
-            # Update with independent task progress
-            if "tasks" in independent_data and "tasks" in merged_data:
-                for i, base_task in enumerate(merged_data["tasks"]):
-                    # Find matching task in independent data
-                    for ind_task in independent_data.get("tasks", []):
-                        if (base_task.get("description") == ind_task.get("description") and
-                            base_task.get("Name") == ind_task.get("Name")):
-                            # Update with independent progress values
-                            base_task.update({
-                                "progress": ind_task.get("progress", 0),
-                                "Progress": ind_task.get("Progress", 0),
-                                "Actual Progress": ind_task.get("Actual Progress", 0),
-                                "achieved": ind_task.get("achieved", 0),
-                                "Achieved %": ind_task.get("Achieved %", 0),
-                                "Progress %": ind_task.get("Progress %", 0),
-                                "Intangible": ind_task.get("Intangible", "nil")
-                            })
-                            break
-            
-            return merged_data
-        else:
-            # First time - create independent copy from base structure
-            base_data = load_project(project, force)
-            independent_data = base_data.copy()
-            
-            # Reset only progress-related fields to start fresh, keep all structure
-            if "tasks" in independent_data:
-                for task in independent_data["tasks"]:
-                    # Reset progress fields to 0 for independent tracking
-                    task["progress"] = 0
-                    task["Progress"] = 0
-                    task["Actual Progress"] = 0
-                    task["achieved"] = 0
-                    task["Achieved %"] = 0
-                    task["Progress %"] = 0
-                    task["Intangible"] = "nil"
-                    # Keep all other fields including weights, descriptions, DPs, etc.
-            
-            # Save this initial independent version
-            save_independent_project(project, force, independent_data)
-            return independent_data
-            
+        return load_independent_data(project, force)
     except Exception as e:
         st.error(f"Error loading independent data: {str(e)}")
         # Fallback to base data but reset progress
-        base_data = load_project(project, force)
-        if "tasks" in base_data:
-            for task in base_data["tasks"]:
-                task["progress"] = 0
-                task["Progress"] = 0
-                task["Actual Progress"] = 0
-                task["achieved"] = 0
-                task["Achieved %"] = 0
-                task["Progress %"] = 0
-                task["Intangible"] = "nil"
-        return base_data
+        return merge_independent_overlay(load_project(project, force), {})
 
-def save_independent_project(project, force, data):
-    """Save complete independent force data (completely separate from control data)"""
+def get_force_rag_table(project, force, independent=False):
+    """Cached RAG table (sorted progress per level) for Control's data or the force's independent view"""
     try:
-        independent_file = f"{project}_{force}_independent.json"
-        
-        # Save the complete data structure for full independence
-        with open(independent_file, "w") as f:
-            json.dump(data, f, indent=2)
-            
+        return get_rag_table(project, force, independent)
+    except Exception as e:
+        st.error(f"Error loading progress for {force}: {str(e)}")
+        return build_rag_table(compute_progress(load_project(project, force)))
+
+def save_independent_project(project, force, data, task_indices=None):
+    """Save independent progress; pass task_indices to write only the tasks that changed"""
+    try:
+        if task_indices is None:
+            save_independent_data(project, force, data)
+        else:
+            tasks = data.get("tasks", [])
+            task_ids = get_task_ids(tasks)
+            update_independent_tasks(project, force, {task_ids[i]: tasks[i] for i in task_indices})
     except Exception as e:
         st.error(f"Error saving independent data: {str(e)}")
 
 def load_theater_config(project):
     """Load theater configurations for the project"""
+    from ahp_theater import read_theater_config, normalise_theater_config
     try:
-        theater_file = f"{project}_theaters.json"
-        if os.path.exists(theater_file):
-            with open(theater_file, "r") as f:
-                config = json.load(f)
-                
-                # Ensure all available forces are either in theaters or unassigned
-                available_forces = get_available_forces(project)
-                assigned_forces = [force for theater in config["theaters"].values() for force in theater["forces"]]
-                
-                # Add any new forces to unassigned list
-                for force in available_forces:
-                    if force not in assigned_forces and force not in config.get("unassigned_forces", []):
-                        config.setdefault("unassigned_forces", []).append(force)
-                
-                # Remove forces that no longer exist
-                config["unassigned_forces"] = [f for f in config.get("unassigned_forces", []) if f in available_forces]
-                
-                return config
-        else:
-            # Default theater structure with all available forces as unassigned
-            available_forces = get_available_forces(project)
-            return {
-                "theaters": {},
-                "unassigned_forces": available_forces
-            }
+        return read_theater_config(project, get_available_forces(project))
     except Exception as e:
         st.error(f"Error loading theater config: {str(e)}")
-        return {"theaters": {}, "unassigned_forces": []}
+        return normalise_theater_config({}, get_available_forces(project))
 
 def save_theater_config(project, theater_config):
     """Save theater configurations for the project"""
+    from ahp_theater import write_theater_config
     try:
-        theater_file = f"{project}_theaters.json"
-        with open(theater_file, "w") as f:
-            json.dump(theater_config, f, indent=2)
+        write_theater_config(project, theater_config)
     except Exception as e:
         st.error(f"Error saving theater config: {str(e)}")
 
@@ -192,80 +111,29 @@ def get_available_forces(project):
         SIDES = load_forces()  # Reload if needed
     return SIDES.copy()  # Return a copy of the forces list
 
-def calculate_theater_progress(project, theater_forces):
-    """Calculate average objective progress for forces in the theater from Control's perspective"""
-    if not theater_forces:
+def calculate_theater_progress(project, theater_forces, mode=None, weights=None):
+    """Calculate objective progress for forces in the theater from Control's perspective"""
+    from ahp_theater import DEFAULT_THEATER_MODE, calculate_theater_progress as compute_theater_progress
+    try:
+        return compute_theater_progress(project, theater_forces, mode or DEFAULT_THEATER_MODE, weights)
+    except Exception as e:
+        st.error(f"Error calculating theater progress: {str(e)}")
         return 0
-    
-    total_progress = 0
-    valid_forces = 0
-    
-    for force in theater_forces:
-        try:
-            # Load the Control's data for this specific force (not independent data)
-            force_data = load_project(project, force)
-            
-            if not force_data:
-                continue
-                
-            # Use compute_progress to get calculated progress values (same as Control dashboard)
-            progress = compute_progress(force_data)
-            
-            if progress and "objective" in progress:
-                obj_progress_dict = progress["objective"]
-                if obj_progress_dict:
-                    # Calculate average objective progress for this force
-                    obj_progress_values = list(obj_progress_dict.values())
-                    if obj_progress_values:
-                        force_obj_progress = sum(obj_progress_values) / len(obj_progress_values)
-                        total_progress += force_obj_progress
-                        valid_forces += 1
-                    
-        except Exception as e:
-            st.error(f"Error calculating progress for force {force}: {str(e)}")
-            continue
-    
-    # Return average objective progress across all forces in the theater
-    return total_progress / valid_forces if valid_forces > 0 else 0
-
-def sort_dps_numerically(dps):
-    """Sort DPs numerically by DP No"""
-    return sorted(dps, key=lambda dp: int(dp.get('DP No', 0)) if str(dp.get('DP No', '')).isdigit() else float('inf'))
-
-def sort_phases_numerically(phases):
-    """Sort phases numerically by Phase No"""
-    return sorted(phases, key=lambda phase: int(phase.get('Phase No', 0)) if str(phase.get('Phase No', '')).isdigit() else float('inf'))
 
-def sort_objectives_numerically(objectives):
-    """Sort objectives numerically by Objective No"""
-    return sorted(objectives, key=lambda obj: int(obj.get('Objective No', 0)) if str(obj.get('Objective No', '')).isdigit() else float('inf'))
-
-def sort_tasks_numerically(tasks):
-    """Sort tasks numerically by Task No"""
-    return sorted(tasks, key=lambda task: int(task.get('Task No', 0)) if str(task.get('Task No', '')).isdigit() else float('inf'))
-
-def get_numeric_sort_key(item, field_name):
-    """Generic function to get numeric sort key for any field"""
-    value = item.get(field_name, 0)
+def calculate_all_theater_progress(project, theater_config):
+    """Progress for every theater in one batch using the configured aggregation mode"""
+    from ahp_theater import calculate_theaters
     try:
-        return int(value) if str(value).isdigit() else float('inf')
-    except:
-        return float('inf')
+        return calculate_theaters(project, theater_config)
+    except Exception as e:
+        st.error(f"Error calculating theater progress: {str(e)}")
+        return {name: {"progress": 0, "forces": {}} for name in theater_config.get("theaters", {})}
 
 # ==================== CHAT SYSTEM FUNCTIONS ====================
 def load_messages(project):
     """Load all messages for a project"""
     try:
-        messages_file = f"{project}_messages.json"
-        if os.path.exists(messages_file):
-            with open(messages_file, "r") as f:
-                return json.load(f)
-        else:
-            # Default structure
-            return {
-                "conversations": {},  # Format: {"control_to_blue": [...], "blue_to_control": [...]}
-                "last_updated": ""
-            }
+        return read_messages(project)
     except Exception as e:
         st.error(f"Error loading messages: {str(e)}")
         return {"conversations": {}, "last_updated": ""}
@@ -273,36 +141,8 @@ def load_messages(project):
 def save_message(project, sender, recipient, message_text):
     """Save a new message to the chat system"""
     try:
-        # Load existing messages
-        messages_data = load_messages(project)
-        
-        # Create conversation key
-        conversation_key = f"{sender}_to_{recipient}"
-        
-        # Initialize conversation if it doesn't exist
-        if conversation_key not in messages_data["conversations"]:
-            messages_data["conversations"][conversation_key] = []
-        
-        # Create new message
-        new_message = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "sender": sender,
-            "recipient": recipient,
-            "message": message_text,
-            "message_id": len(messages_data["conversations"][conversation_key]) + 1
-        }
-        
-        # Add message to conversation
-        messages_data["conversations"][conversation_key].append(new_message)
-        messages_data["last_updated"] = new_message["timestamp"]
-        
-        # Save to file
-        messages_file = f"{project}_messages.json"
-        with open(messages_file, "w") as f:
-            json.dump(messages_data, f, indent=2)
-        
+        append_message(project, sender, recipient, message_text)
         return True
-        
     except Exception as e:
         st.error(f"Error saving message: {str(e)}")
         return False
@@ -310,25 +150,7 @@ def save_message(project, sender, recipient, message_text):
 def get_conversation(project, participant1, participant2):
     """Get all messages between two participants (bidirectional)"""
     try:
-        messages_data = load_messages(project)
-        
-        # Get messages from both directions
-        conv1_key = f"{participant1}_to_{participant2}"
-        conv2_key = f"{participant2}_to_{participant1}"
-        
-        messages = []
-        
-        if conv1_key in messages_data["conversations"]:
-            messages.extend(messages_data["conversations"][conv1_key])
-        
-        if conv2_key in messages_data["conversations"]:
-            messages.extend(messages_data["conversations"][conv2_key])
-        
-        # Sort by timestamp
-        messages.sort(key=lambda x: x["timestamp"])
-        
-        return messages
-        
+        return read_conversation(project, participant1, participant2)
     except Exception as e:
         st.error(f"Error loading conversation: {str(e)}")
         return []
@@ -378,184 +200,34 @@ FORCE_COLORS = {
 
 # --- Custom CSS Injection ---
 def inject_css(role):
+    """Application stylesheet plus the role's accent colour"""
     accent = FORCE_COLORS.get(role, "#0f172a")
-    # Indian Navy themed background with tricolor inspiration
-    bg = "linear-gradient(135deg, #ff9933 0%, #ffffff 20%, #ffffff 80%, #138808 100%)"
-    st.markdown(f"""
-<style>
-body {{ background: {bg}; }}
-.tricolor-strip {{
-    height: 6px;
-    background: linear-gradient(to right, #ff9933 33.33%, #ffffff 33.33%, #ffffff 66.66%, #138808 66.66%);
-    width: 100%;
-    margin: 10px 0;
-}}
-.footer {{ 
-    background: linear-gradient(45deg, #000080, #1e40af); 
-    color: #fff; 
-    text-align: center; 
-    padding: 12px; 
-    font-size: 18px; 
-    font-weight: bold;
-    border-top: 3px solid #fbbf24;
-}}
-.sidebar .sidebar-content {{ 
-    background: linear-gradient(180deg, {accent} 0%, #001122 100%) !important; 
-    border-right: 3px solid #fbbf24;
-}}
-.sidebar .sidebar-content .block-container {{
-    padding-top: 2rem;
-    padding-bottom: 2rem;
-}}
-.stRadio > div {{
-    background: rgba(255, 255, 255, 0.1);
-    border-radius: 12px;
-    padding: 8px 12px;
-    margin: 4px 0;
-    border: 1px solid rgba(251, 191, 36, 0.3);
-    backdrop-filter: blur(10px);
-    display: flex !important;
-    align-items: center !important;
-}}
-.stRadio > div:hover {{
-    background: rgba(251, 191, 36, 0.2);
-    border-color: #fbbf24;
-    transform: translateX(5px);
-    transition: all 0.3s ease;
-}}
-.stRadio > div > label {{
-    color: #ffffff !important;
-    font-weight: 600 !important;
-    font-size: 0.9rem !important;
-    padding: 4px 8px !important;
-    display: flex !important;
-    align-items: center !important;
-    border-radius: 8px !important;
-    width: 100% !important;
-}}
-.stRadio > div > label > span {{
-    margin-left: 8px !important;
-}}
-.stRadio > div > label:hover {{
-    background: rgba(255, 255, 255, 0.1) !important;
-}}
-.stRadio > div[data-checked="true"] {{
-    background: linear-gradient(45deg, #fbbf24, #f59e42) !important;
-    border-color: #fbbf24 !important;
-    box-shadow: 0 4px 12px rgba(251, 191, 36, 0.4);
-}}
-.stRadio > div[data-checked="true"] > label {{
-    color: #000080 !important;
-    font-weight: 700 !important;
-}}
-.stRadio input[type="radio"] {{
-    margin-right: 8px !important;
-}}
-
-.role-badge {{
-    display: inline-block;
-    background: linear-gradient(45deg, #fbbf24, #f59e42);
-    color: #000080;
-    padding: 4px 12px;
-    border-radius: 20px;
-    font-size: 0.8rem;
-    font-weight: 700;
-    text-transform: uppercase;
-    margin: 8px auto;
-    text-align: center;
-    box-shadow: 0 2px 8px rgba(251, 191, 36, 0.4);
-    border: 2px solid #ffffff;
-}}
-.stButton>button {{ 
-    background: linear-gradient(90deg, #000080 0%, {accent} 50%, #fbbf24 100%); 
-    color: white; 
-    font-weight: 700; 
-    border-radius: 12px; 
-    box-shadow: 0 4px 16px rgba(0,0,0,0.3); 
-    border: 2px solid #fbbf24;
-    transition: all 0.3s ease;
-}}
-.stButton>button:hover {{
-    transform: translateY(-2px);
-    box-shadow: 0 6px 20px rgba(0,0,0,0.4);
-}}
-.stTable, .stDataFrame, .stTable th, .stTable td, .stDataFrame th, .stDataFrame td {{
-    color: #ffffff !important;
-    border-color: #000080 !important;
-}}
-.blue-force-table .stDataFrame, .blue-force-table .stTable {{
-    background: linear-gradient(135deg, #1e3a8a 0%, #3b82f6 100%) !important;
-}}
-.blue-force-table .stDataFrame th, .blue-force-table .stDataFrame td, 
-.blue-force-table .stTable th, .blue-force-table .stTable td {{
-    background: rgba(30, 58, 138, 0.8) !important;
-    color: #ffffff !important;
-    border-color: #60a5fa !important;
-}}
-.red-force-table .stDataFrame, .red-force-table .stTable {{
-    background: linear-gradient(135deg, #dc2626 0%, #ef4444 100%) !important;
-}}
-.red-force-table .stDataFrame th, .red-force-table .stDataFrame td,
-.red-force-table .stTable th, .red-force-table .stTable td {{
-    background: rgba(220, 38, 38, 0.8) !important;
-    color: #ffffff !important;
-    border-color: #f87171 !important;
-}}
-.control-table .stDataFrame, .control-table .stTable {{
-    background: #fffbf0 !important;
-}}
-.control-table .stDataFrame th, .control-table .stDataFrame td,
-.control-table .stTable th, .control-table .stTable td {{
-    background: #fffbf0 !important;
-    color: #000080 !important;
-    border-color: #000080 !important;
-}}
-.stTabs [data-baseweb="tab"] {{ 
-    background: linear-gradient(45deg, #000080, {accent}); 
-    color: #fff; 
-    border-radius: 8px;
-    margin: 2px;
-}}
-h1, h2, h3, h4 {{ 
-    color: #ffffff; 
-    text-shadow: 0 0 10px #fbbf24, 0 0 20px #f59e0b, 0 0 30px #d97706; 
-    font-weight: bold;
-    text-decoration: none;
-}}
-.main .block-container {{
-    padding-top: 1rem;
-    padding-bottom: 1rem;
-    max-height: 100vh;
-    overflow-y: auto;
-}}
-body {{
-    overflow: hidden;
-}}
-.stApp {{
-    height: 100vh;
-    max-height: 100vh;
-}}
-/* Hide the Deploy button and main menu */
-#MainMenu {{visibility: hidden !important;}}
-header {{visibility: hidden !important;}}
-footer {{visibility: hidden !important;}}
-.stDeployButton {{display: none !important;}}
-button[kind="header"] {{display: none !important;}}
-[data-testid="stToolbar"] {{display: none !important;}}
-.viewerBadge_container__1QSob {{display: none !important;}}
-.styles_viewerBadge__1yB5_ {{display: none !important;}}
-.viewerBadge_link__1S137 {{display: none !important;}}
-.viewerBadge_text__1JaDK {{display: none !important;}}
-header[data-testid="stHeader"] {{display: none !important;}}
-div[data-testid="stToolbar"] {{display: none !important;}}
-div[data-testid="stDecoration"] {{display: none !important;}}
-div[data-testid="stStatusWidget"] {{display: none !important;}}
-</style>
-""", unsafe_allow_html=True)
+    st.markdown(f"{stylesheet_tag('ahp.css')}<style>:root {{ --ahp-accent: {accent}; }}</style>",
+                unsafe_allow_html=True)
 
 # --- Force-specific table display ---
-def display_force_table(df, use_container_width=True, force_type=None):
-    """Display dataframe with force-specific background color using HTML tables"""
+# Force table themes in static/tables.css (.ft-<force>); unknown forces use green
+FORCE_TABLE_THEMES = ("blue", "red", "yellow", "green", "orange", "purple")
+FORCE_TABLE_PAGE_SIZE = 100
+
+def force_table_rows_html(df):
+    """<tr> markup for a dataframe, built column-wise with vectorised string concatenation"""
+    import pandas as pd
+    cells = df.astype(object).where(df.notna(), "").astype(str)
+    rows = pd.Series("<tr>", index=cells.index)
+    for col in cells.columns:
+        rows = rows + "<td>" + cells[col] + "</td>"
+    return "".join(rows + "</tr>")
+
+def display_force_table(df, use_container_width=True, force_type=None, key=None):
+    """
+    Display dataframe as a force-coloured HTML table. Styling comes from the
+    force-table classes in static/tables.css; tables longer than
+    FORCE_TABLE_PAGE_SIZE rows are paged so only the visible rows are sent.
+    key names the table's place on the page (section and force) and is required
+    for paging, so the page selector keeps its value and never clashes with
+    another table rendered in the same run.
+    """
     current_role = st.session_state.get("role", "control")
     
     # If force_type is specified (for control view), use that; otherwise use current role
@@ -565,87 +237,26 @@ def display_force_table(df, use_container_width=True, force_type=None):
         st.info("No data available")
         return
     
-    # Define color schemes for each force
-    force_colors = {
-        "blue": {
-            "gradient": "linear-gradient(135deg, #1e40af 0%, #3b82f6 50%, #60a5fa 100%)",
-            "header_bg": "#1e3a8a",
-            "th_bg": "#1e40af",
-            "border": "#60a5fa",
-            "row_bg": "rgba(59, 130, 246, 0.8)",
-            "cell_bg": "rgba(30, 64, 175, 0.7)"
-        },
-        "red": {
-            "gradient": "linear-gradient(135deg, #dc2626 0%, #ef4444 50%, #f87171 100%)",
-            "header_bg": "#b91c1c", 
-            "th_bg": "#dc2626",
-            "border": "#f87171",
-            "row_bg": "rgba(239, 68, 68, 0.8)",
-            "cell_bg": "rgba(220, 38, 38, 0.7)"
-        },
-        "yellow": {
-            "gradient": "linear-gradient(135deg, #d97706 0%, #f59e0b 50%, #fbbf24 100%)",
-            "header_bg": "#92400e",
-            "th_bg": "#d97706", 
-            "border": "#fbbf24",
-            "row_bg": "rgba(245, 158, 11, 0.9)",
-            "cell_bg": "rgba(217, 119, 6, 0.8)"
-        },
-        "green": {
-            "gradient": "linear-gradient(135deg, #059669 0%, #10b981 50%, #34d399 100%)",
-            "header_bg": "#047857",
-            "th_bg": "#059669",
-            "border": "#34d399", 
-            "row_bg": "rgba(16, 185, 129, 0.8)",
-            "cell_bg": "rgba(5, 150, 105, 0.7)"
-        },
-        "orange": {
-            "gradient": "linear-gradient(135deg, #ea580c 0%, #f97316 50%, #fb923c 100%)",
-            "header_bg": "#c2410c",
-            "th_bg": "#ea580c",
-            "border": "#fb923c",
-            "row_bg": "rgba(249, 115, 22, 0.8)", 
-            "cell_bg": "rgba(234, 88, 12, 0.7)"
-        },
-        "purple": {
-            "gradient": "linear-gradient(135deg, #7c3aed 0%, #8b5cf6 50%, #a78bfa 100%)",
-            "header_bg": "#6d28d9",
-            "th_bg": "#7c3aed",
-            "border": "#a78bfa",
-            "row_bg": "rgba(139, 92, 246, 0.8)",
-            "cell_bg": "rgba(124, 58, 237, 0.7)"
-        }
-    }
-    
-    # Get colors for the display force (default to green if not found)
-    colors = force_colors.get(display_force, force_colors["green"])
-    
-    # Generate HTML table with force-specific colors
-    html_table = f"""
-    <div style="width: 100%; overflow-x: auto; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.2);">
-        <table style="width: 100%; border-collapse: collapse; background: {colors['gradient']}; font-family: Arial, sans-serif;">
-            <thead>
-                <tr style="background: {colors['header_bg']};">
-                    {"".join([f'<th style="padding: 12px; text-align: left; color: white; font-weight: bold; border: 2px solid {colors["border"]}; background: {colors["th_bg"]};">{col}</th>' for col in df.columns])}
-                </tr>
-            </thead>
-            <tbody>
-    """
+    theme = display_force if display_force in FORCE_TABLE_THEMES else "green"
+    page_rows = df
+    if len(df) > FORCE_TABLE_PAGE_SIZE:
+        pages = -(-len(df) // FORCE_TABLE_PAGE_SIZE)
+        if key is None:
+            raise ValueError(f"display_force_table needs a key to page a table of {len(df)} rows")
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"force_table_page_{key}")
+        start = (page - 1) * FORCE_TABLE_PAGE_SIZE
+        page_rows = df.iloc[start:start + FORCE_TABLE_PAGE_SIZE]
+        with col2:
+            st.caption(f"Rows {start + 1}–{start + len(page_rows)} of {len(df)} · page {page} of {pages}")
     
-    for _, row in df.iterrows():
-        html_table += f'<tr style="background: {colors["row_bg"]};">'
-        for col in df.columns:
-            value = str(row[col]) if pd.notna(row[col]) else ""
-            html_table += f'<td style="padding: 10px; color: white; font-weight: 500; border: 1px solid {colors["border"]}; background: {colors["cell_bg"]};">{value}</td>'
-        html_table += '</tr>'
-        
-    html_table += """
-            </tbody>
-        </table>
-    </div>
-    <br>
-    """
-    st.markdown(html_table, unsafe_allow_html=True)
+    header = "".join(f"<th>{col}</th>" for col in df.columns)
+    st.markdown(
+        f'<div class="force-table-wrap"><table class="force-table ft-{theme}"><thead><tr>{header}</tr></thead>'
+        f'<tbody>{force_table_rows_html(page_rows)}</tbody></table></div>',
+        unsafe_allow_html=True
+    )
 
 # --- Banner & Footer ---
 def show_banner():
@@ -669,6 +280,21 @@ def show_footer():
     </div>
     ''', unsafe_allow_html=True)
 
+# --- Dashboard cards (classes in static/cards.css) ---
+def tint_style(color, bg="20", border="40"):
+    """Inline custom properties for the status-coloured components: the colour and hex-alpha tints of it"""
+    return f"--status: {color}; --status-bg: {color}{bg}; --status-border: {color}{border};"
+
+def force_card_html(side, color, value, caption, independent=False):
+    return (f'<div class="force-card{" independent" if independent else ""}" style="--force: {color};">'
+            f'<h4>{get_force_emoji(side)} {side.capitalize()}</h4><h2>{value:.1f}%</h2><p>{caption}</p></div>')
+
+def status_card_html(side, color, control_avg, force_avg, status_text):
+    """Control view vs force assessment for one force"""
+    return (f'<div class="status-card" style="{tint_style(color)}"><h5>{get_force_emoji(side)} {side.capitalize()}</h5>'
+            f'<p>Control View: {control_avg:.1f}%</p><p>Force Assessment: {force_avg:.1f}%</p>'
+            f'<p class="status">{status_text}</p></div>')
+
 # --- Session State ---
 def clear_session():
     for k in list(st.session_state.keys()):
@@ -676,185 +302,38 @@ def clear_session():
     st.rerun()
 
 # --- Login System ---
+# Darker shades of the force colours for role button hover states
+FORCE_HOVER_COLORS = {
+    "#3b82f6": "#2563eb",  # Blue -> darker blue
+    "#ef4444": "#dc2626",  # Red -> darker red
+    "#eab308": "#ca8a04",  # Yellow -> darker yellow
+    "#22c55e": "#16a34a",  # Green -> darker green
+    "#f97316": "#ea580c",  # Orange -> darker orange
+    "#a855f7": "#9333ea",  # Purple -> darker purple
+    "#8b5cf6": "#7c3aed"   # Violet -> darker violet
+}
+
+def login_theme_css(sides):
+    """Role button colours for the configured forces; everything else is in static/login.css"""
+    rules = []
+    for side in sides:
+        color = FORCE_COLORS.get(side, "#8b5cf6")
+        hover = FORCE_HOVER_COLORS.get(color, "#6b7280")
+        button = f'.stButton > button[data-testid="role_btn_{side}"]'
+        rules.append(f"{button},{button}:focus,{button}:active,{button}:focus:not(:active)"
+                     f"{{background:{color}!important;color:white!important;border:2px solid rgba(255,255,255,0.3)!important;"
+                     f"font-weight:600!important;box-shadow:0 0 10px {color}80!important}}")
+        rules.append(f"{button}:hover{{background:{hover}!important;border-color:rgba(255,255,255,0.5)!important;"
+                     f"transform:translateY(-2px)!important;box-shadow:0 4px 15px {color}99!important}}")
+    return f"<style>{''.join(rules)}</style>" if rules else ""
+
 def login():
     # Initialize modal state to False if not set
     if "show_team_view_modal" not in st.session_state:
         st.session_state["show_team_view_modal"] = False
     
     # Compact AHP login with tricolor theme
-    st.markdown("""
-    <style>
-    .stApp {
-        background: linear-gradient(135deg, #0f172a, #1e293b);
-    }
-    
-    .login-container {
-        max-width: 1200px;
-        margin: 0 auto;
-        padding: 10px 15px 15px 15px;
-    }
-    
-    .tricolor-header {
-        background: linear-gradient(to bottom, #ff6600 33.33%, #ffffff 33.33%, #ffffff 66.66%, #138808 66.66%);
-        padding: 4px;
-        border-radius: 12px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 15px rgba(0, 0, 0, 0.2);
-        margin-top: 0px;
-    }
-    
-    .header-content {
-        background: rgba(0, 0, 0, 0.7);
-        backdrop-filter: blur(10px);
-        padding: 25px;
-        border-radius: 8px;
-        text-align: center;
-        margin: 5px;
-    }
-    
-    .main-title {
-        font-size: 2.8rem;
-        font-weight: 700;
-        color: #ffffff;
-        margin-bottom: 12px;
-        text-shadow: 3px 3px 6px rgba(0, 0, 0, 0.9);
-        line-height: 1.1;
-    }
-    
-    .subtitle {
-        font-size: 1.4rem;
-        color: #ffffff;
-        margin-bottom: 8px;
-        text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.8);
-    }
-    
-    .organization {
-        font-size: 1.6rem;
-        color: #ffffff;
-        font-weight: 600;
-        margin-bottom: 10px;
-        text-shadow: 3px 3px 6px rgba(0, 0, 0, 0.9);
-    }
-    
-    .motto {
-        font-size: 1.3rem;
-        color: #fbbf24;
-        font-style: italic;
-        font-weight: 600;
-        text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.9);
-    }
-    
-    .roles-container {
-        display: flex;
-        flex-direction: row;
-        flex-wrap: nowrap;
-        gap: 8px;
-        justify-content: center;
-        align-items: center;
-        margin: 0 auto 20px auto;
-        width: fit-content;
-        padding: 0 10px;
-        overflow-x: auto;
-    }
-    
-    .role-card {
-        border-radius: 8px;
-        padding: 8px 6px;
-        text-align: center;
-        cursor: pointer;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        border: 2px solid rgba(255, 255, 255, 0.2);
-        position: relative;
-        overflow: hidden;
-        box-shadow: 0 4px 16px rgba(0, 0, 0, 0.3);
-        width: 60px;
-        height: 60px;
-        min-width: 60px;
-        flex-shrink: 0;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-    }
-    
-    .role-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: linear-gradient(135deg, rgba(255,255,255,0.1) 0%, rgba(255,255,255,0) 50%, rgba(255,255,255,0.1) 100%);
-        border-radius: 15px;
-        pointer-events: none;
-    }
-    
-    .role-card:hover {
-        transform: translateY(-4px) scale(1.05);
-        box-shadow: 0 8px 20px rgba(0, 0, 0, 0.4);
-        border-color: rgba(255, 255, 255, 0.4);
-    }
-    
-    .role-card.selected {
-        border-color: #fbbf24;
-        box-shadow: 0 0 15px rgba(251, 191, 36, 0.8), 0 4px 16px rgba(0, 0, 0, 0.3);
-        transform: translateY(-2px);
-    }
-    
-    .role-title {
-        font-size: 0.7rem;
-        font-weight: 800;
-        color: white;
-        margin-bottom: 2px;
-        text-shadow: 0 1px 2px rgba(0, 0, 0, 0.8);
-        position: relative;
-        z-index: 1;
-        line-height: 1;
-    }
-    
-    .role-desc {
-        font-size: 0.5rem;
-        color: rgba(255, 255, 255, 0.95);
-        margin: 0;
-        font-weight: 600;
-        text-shadow: 0 1px 2px rgba(0, 0, 0, 0.6);
-        position: relative;
-        z-index: 1;
-        line-height: 1;
-    }
-    
-    .auth-panel {
-        background: rgba(255, 255, 255, 0.95);
-        border-radius: 10px;
-        padding: 15px;
-        border: 2px solid #000080;
-        margin-bottom: 10px;
-    }
-    
-    .auth-title {
-        font-size: 1.1rem;
-        font-weight: 600;
-        color: #000080;
-        text-align: center;
-        margin-bottom: 12px;
-    }
-    
-    .team-btn {
-        background: linear-gradient(135deg, #6366f1, #8b5cf6);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 6px 12px;
-        font-size: 0.8rem;
-        cursor: pointer;
-        transition: all 0.3s ease;
-    }
-    
-    .team-btn:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3);
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(stylesheet_tag("login.css") + login_theme_css(SIDES), unsafe_allow_html=True)
     
     # Main login container
     st.markdown('<div class="login-container">', unsafe_allow_html=True)
@@ -925,67 +404,6 @@ def login():
                     st.button("⚠️ NO FORCES", disabled=True, use_container_width=True,
                             help="Add forces in Force Manager first")
     
-    # Color-coordinate buttons with force colors - override all states
-    st.markdown("""
-    <style>
-    /* Control button - multi-colored gradient (all states) */
-    .stButton > button[data-testid="role_btn_control"],
-    .stButton > button[data-testid="role_btn_control"]:focus,
-    .stButton > button[data-testid="role_btn_control"]:active,
-    .stButton > button[data-testid="role_btn_control"]:focus:not(:active) {
-        background: linear-gradient(135deg, #22c55e, #16a34a, #15803d) !important;
-        color: white !important;
-        border: 2px solid rgba(255, 255, 255, 0.3) !important;
-        font-weight: 600 !important;
-        box-shadow: 0 0 10px rgba(34, 197, 94, 0.5) !important;
-    }
-    
-    .stButton > button[data-testid="role_btn_control"]:hover {
-        background: linear-gradient(135deg, #16a34a, #15803d, #166534) !important;
-        border-color: rgba(255, 255, 255, 0.5) !important;
-        transform: translateY(-2px) !important;
-        box-shadow: 0 4px 15px rgba(34, 197, 94, 0.6) !important;
-    }""", unsafe_allow_html=True)
-    
-    # Add force-specific button colors
-    for side in SIDES:
-        force_color = FORCE_COLORS.get(side, "#8b5cf6")
-        
-        # Create darker shade for hover
-        color_variants = {
-            "#3b82f6": "#2563eb",  # Blue -> darker blue
-            "#ef4444": "#dc2626",  # Red -> darker red  
-            "#eab308": "#ca8a04",  # Yellow -> darker yellow
-            "#22c55e": "#16a34a",  # Green -> darker green
-            "#f97316": "#ea580c",  # Orange -> darker orange
-            "#a855f7": "#9333ea",  # Purple -> darker purple
-            "#8b5cf6": "#7c3aed"   # Violet -> darker violet
-        }
-        hover_color = color_variants.get(force_color, "#6b7280")
-        
-        st.markdown(f"""
-        <style>
-        /* {side.upper()} force button - all states */
-        .stButton > button[data-testid="role_btn_{side}"],
-        .stButton > button[data-testid="role_btn_{side}"]:focus,
-        .stButton > button[data-testid="role_btn_{side}"]:active,
-        .stButton > button[data-testid="role_btn_{side}"]:focus:not(:active) {{
-            background: {force_color} !important;
-            color: white !important;
-            border: 2px solid rgba(255, 255, 255, 0.3) !important;
-            font-weight: 600 !important;
-            box-shadow: 0 0 10px {force_color}80 !important;
-        }}
-        
-        .stButton > button[data-testid="role_btn_{side}"]:hover {{
-            background: {hover_color} !important;
-            border-color: rgba(255, 255, 255, 0.5) !important;
-            transform: translateY(-2px) !important;
-            box-shadow: 0 4px 15px {force_color}99 !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
-    
     # Simple PIN authentication (center-aligned)
     role = st.session_state.get("login_role")
     if role and role != "info":
@@ -998,12 +416,8 @@ def login():
                                    help="Default: Control=9999, Forces=0000", label_visibility="collapsed")
             with col2:
                 if st.button("🚀 LOGIN", key="login_btn", help="Authenticate"):
-                    valid = False
-                    if role == "control":
-                        valid = (pin == st.session_state.get("pin_control", "9999"))
-                    elif role in SIDES:
-                        default_pin = "0000"
-                        valid = (pin == st.session_state.get(f"pin_{role}", default_pin))
+                    # PINs are checked against the shared settings store (hashed)
+                    valid = (role == "control" or role in SIDES) and verify_pin(role, pin)
                     
                     if valid:
                         st.session_state["role"] = role
@@ -1029,29 +443,6 @@ def login():
             st.write("**Capt Swaminathan** - Conceptualized by")
             st.write("**Cdr Kaki Rohit Raju** - Software Designed by")
     
-    # Style the team credits button
-    st.markdown("""
-    <style>
-    .stButton > button[data-testid="ahp_team_view_btn"] {
-        background: linear-gradient(135deg, #6366f1, #8b5cf6) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 6px 12px !important;
-        font-size: 0.8rem !important;
-        cursor: pointer !important;
-        transition: all 0.3s ease !important;
-        width: auto !important;
-        height: auto !important;
-    }
-    
-    .stButton > button[data-testid="ahp_team_view_btn"]:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 4px 15px rgba(99, 102, 241, 0.3) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
     # Footer banner
     show_footer()
 
@@ -1141,6 +532,7 @@ def sidebar():
 
 # --- Project Management ---
 def project_management():
+    import pandas as pd
     st.header("Project Management")
     projects = list_projects()
     selected = st.selectbox("Select Project", projects)
@@ -1175,7 +567,7 @@ def project_management():
             st.download_button("Download Red JSON", open(path, "rb"), file_name=path)
     with col3:
         if st.button("Export ZIP"):
-            path = export_project_zip(selected)
+            path = export_project_zip(selected, SIDES)
             st.download_button("Download ZIP", open(path, "rb"), file_name=path)
     st.write("Upload Excel Sheets (Control Only):")
     if st.session_state.get("role") == "control":
@@ -1186,8 +578,13 @@ def project_management():
                 try:
                     with open(tmp_path, "wb") as f:
                         f.write(uploaded.read())
-                    import_excel_to_project(selected, side, tmp_path)
+                    report = import_excel_to_project(selected, side, tmp_path)
                     st.success(f"Imported {side} Excel.")
+                    if report:
+                        st.warning(f"⚠️ {len(report)} value(s) in the {side} sheet needed correcting during import.")
+                        with st.expander(f"📋 {side.capitalize()} Validation Report"):
+                            st.dataframe(pd.DataFrame(report), use_container_width=True, hide_index=True)
+                    show_integrity_report(selected, side, expanded=True)
                 except Exception as e:
                     st.error(f"Error importing {side} Excel: {str(e)}")
                 finally:
@@ -1203,22 +600,62 @@ def project_management():
                                 time.sleep(0.5)  # Wait 500ms before retry
                             else:
                                 st.warning(f"Could not delete temporary file {tmp_path}. Please delete it manually if it persists.")
-        # Show summary of uploaded data for each force
+        # Counts and integrity per force come from a cached summary; rows are only loaded on request
         st.markdown("### Project Data Summary")
         for side in SIDES:
-            data = load_project(selected, side)
-            st.subheader(f"{side.capitalize()} Data")
-            st.write("Phases:")
-            st.table(sort_phases_numerically(data.get("phases", [])))
-            st.write("Objectives:")
-            st.table(sort_objectives_numerically(data.get("objectives", [])))
-            st.write("DPs:")
-            st.table(sort_dps_numerically(data.get("dps", [])))
-            st.write("Tasks:")
-            st.table(data.get("tasks", []))
+            summary = get_project_summary(selected, side)
+            st.subheader(f"{get_force_emoji(side)} {side.capitalize()} Data")
+            cols = st.columns(len(SUMMARY_SECTIONS) + 1)
+            for col, section in zip(cols, SUMMARY_SECTIONS):
+                col.metric(SUMMARY_LABELS[section], summary["counts"][section])
+            cols[-1].metric("Integrity", f"{summary['integrity']['error']} ⛔ / {summary['integrity']['warning']} ⚠️")
+            if summary["integrity"]["error"] or summary["integrity"]["warning"]:
+                show_integrity_report(selected, side)
+        show_project_rows(selected)
+
+SUMMARY_LABELS = {"phases": "Phases", "objectives": "Objectives", "dps": "DPs", "tasks": "Tasks"}
+SUMMARY_PAGE_SIZE = 50
+
+def show_project_rows(project):
+    """Page through one section of one force; nothing is loaded until rows are requested"""
+    import pandas as pd
+    if not st.toggle("📄 Browse rows", key="pm_browse_rows"):
+        return
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        side = st.selectbox("Force", SIDES, format_func=lambda f: f.capitalize(), key="pm_rows_side")
+    with col2:
+        section = st.selectbox("Section", SUMMARY_SECTIONS, format_func=lambda s: SUMMARY_LABELS[s], key="pm_rows_section")
+    total = get_project_summary(project, side)["counts"][section]
+    if not total:
+        st.info(f"No {SUMMARY_LABELS[section].lower()} for {side.capitalize()}.")
+        return
+    pages = -(-total // SUMMARY_PAGE_SIZE)
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"pm_rows_page_{side}_{section}")
+    # Read-only: the page is sliced from the shared snapshot, not a private copy
+    data = get_project_snapshot(project, side)
+    start = (page - 1) * SUMMARY_PAGE_SIZE
+    order = get_sort_order(data, section)[start:start + SUMMARY_PAGE_SIZE]
+    items = data.get(section, [])
+    st.caption(f"Rows {start + 1}–{start + len(order)} of {total}")
+    st.dataframe(pd.DataFrame([items[i] for i in order]), use_container_width=True, hide_index=True)
+
+def show_integrity_report(project, side, data=None, expanded=False):
+    """Orphan / duplicate / weight-sum findings for the project as it is on disk"""
+    import pandas as pd
+    issues = get_integrity_report(project, side, data)
+    if not issues:
+        st.caption(f"✅ {side.capitalize()} plan integrity: no issues found.")
+        return
+    summary = summarise_integrity(issues)
+    with st.expander(f"🧩 {side.capitalize()} Plan Integrity: {summary['error']} error(s), {summary['warning']} warning(s)", expanded=expanded):
+        st.caption("Errors are links the progress rollup cannot resolve, so the affected items are silently reported as 0%.")
+        st.dataframe(pd.DataFrame(issues), use_container_width=True, hide_index=True)
 
 # --- Objectives Tab ---
 def objectives_tab():
+    import pandas as pd
     st.header("🎯 Objectives")
     project = st.session_state.get("project")
     role = st.session_state.get("role")
@@ -1236,8 +673,8 @@ def objectives_tab():
                 # Display current objectives in sequential order
                 st.subheader(f"{force.capitalize()} Force Objectives")
                 
-                # Sort objectives numerically
-                sorted_objectives = sort_objectives_numerically(objectives)
+                # Objectives in Objective No order (sorted once per change)
+                sorted_objectives = get_sorted_items(data, "objectives")
                 
                 objective_data = []
                 for obj_idx, obj in enumerate(sorted_objectives):
@@ -1252,7 +689,7 @@ def objectives_tab():
                     })
                 
                 df = pd.DataFrame(objective_data)
-                display_force_table(df, use_container_width=True, force_type=force)
+                display_force_table(df, use_container_width=True, force_type=force, key=f"objectives_{force}")
                 
                 # Manage objectives
                 st.markdown("---")
@@ -1274,7 +711,7 @@ def objectives_tab():
                             data["objectives"] = []
                         data["objectives"].append({"Name": new_name, "Phase": new_phase})
                         # Sort objectives after adding to maintain sequential order
-                        data["objectives"] = sort_objectives_numerically(data["objectives"])
+                        data["objectives"] = get_sorted_items(data, "objectives")
                         save_project(project, force, data)
                         st.success(f"✅ Objective '{new_name}' added to {force} force")
                         st.rerun()
@@ -1282,13 +719,12 @@ def objectives_tab():
                 with col_edit:
                     st.markdown("**✏️ Edit Objective**")
                     if objectives:
-                        sorted_objectives = sort_objectives_numerically(objectives)
-                        obj_to_original_idx = {id(obj): objectives.index(obj) for obj in objectives}
+                        obj_order = get_sort_order(data, "objectives")
+                        sorted_objectives = [objectives[i] for i in obj_order]
                         obj_options = [f"{obj.get('Objective No', i+1)}. {obj.get('Name', 'Unnamed')}" for i, obj in enumerate(sorted_objectives)]
                         selected_sorted_idx = st.selectbox("Select Objective to Edit", range(len(sorted_objectives)), 
                                                        format_func=lambda x: obj_options[x], key=f"edit_obj_sel_{force}")
-                        selected_obj = sorted_objectives[selected_sorted_idx]
-                        selected_obj_idx = obj_to_original_idx[id(selected_obj)]
+                        selected_obj_idx = obj_order[selected_sorted_idx]
                         current_obj = objectives[selected_obj_idx]
                         
                         edit_obj_name = st.text_input("Objective Name", value=current_obj.get("Name", ""), key=f"edit_obj_name_{force}")
@@ -1313,14 +749,13 @@ def objectives_tab():
                     st.markdown("**🗑️ Delete Objective**")
                     if objectives:
                         # Sort objectives and create mapping for deletion
-                        sorted_objectives = sort_objectives_numerically(objectives)
-                        obj_to_original_idx = {id(obj): objectives.index(obj) for obj in objectives}
+                        obj_order = get_sort_order(data, "objectives")
+                        sorted_objectives = [objectives[i] for i in obj_order]
                         
                         obj_options = [f"{obj.get('Objective No', i+1)}. {obj.get('Name', 'Unnamed')}" for i, obj in enumerate(sorted_objectives)]
                         selected_sorted_idx = st.selectbox("Select Objective", range(len(sorted_objectives)), 
                                                        format_func=lambda x: obj_options[x], key=f"del_obj_{force}")
-                        selected_obj = sorted_objectives[selected_sorted_idx]
-                        selected_obj_idx = obj_to_original_idx[id(selected_obj)]
+                        selected_obj_idx = obj_order[selected_sorted_idx]
                         
                         if st.button(f"🗑️ Delete from {force.capitalize()}", type="secondary", key=f"delete_obj_{force}"):
                             obj_name = objectives[selected_obj_idx].get("Name")
@@ -1352,7 +787,7 @@ def objectives_tab():
             })
         
         df = pd.DataFrame(objective_data)
-        display_force_table(df, use_container_width=True)
+        display_force_table(df, use_container_width=True, key=f"objectives_{side}")
         
         # Manage objectives
         st.markdown("---")
@@ -1374,7 +809,7 @@ def objectives_tab():
                     data["objectives"] = []
                 data["objectives"].append({"Name": name, "Phase": phase})
                 # Sort objectives after adding to maintain sequential order
-                data["objectives"] = sort_objectives_numerically(data["objectives"])
+                data["objectives"] = get_sorted_items(data, "objectives")
                 save_project(project, side, data)
                 st.success(f"✅ Objective '{name}' added")
                 st.rerun()
@@ -1425,6 +860,7 @@ def objectives_tab():
                 st.info("No objectives to delete")
 
 def phases_tab():
+    import pandas as pd
     st.header("⏱️ Phases")
     project = st.session_state.get("project")
     role = st.session_state.get("role")
@@ -1442,15 +878,15 @@ def phases_tab():
                 # Display current phases in sequential order
                 st.subheader(f"{force.capitalize()} Force Phases")
                 
-                # Sort phases appropriately
-                sorted_phases = sort_phases_numerically(phases)
+                # Phases in Phase No order (sorted once per change)
+                sorted_phases = get_sorted_items(data, "phases")
                 
                 df = pd.DataFrame({
                     "No": [phase.get("Phase No", idx + 1) for idx, phase in enumerate(sorted_phases)],
                     "Phase Name": [p.get("Name") or p.get("Phase") for p in sorted_phases]
                 })
                 
-                display_force_table(df, use_container_width=True, force_type=force)
+                display_force_table(df, use_container_width=True, force_type=force, key=f"phases_{force}")
                 
                 # Manage phases
                 st.markdown("---")
@@ -1465,7 +901,7 @@ def phases_tab():
                             data["phases"] = []
                         data["phases"].append({"Name": new_name})
                         # Sort phases after adding to maintain sequential order
-                        data["phases"] = sort_phases_numerically(data["phases"])
+                        data["phases"] = get_sorted_items(data, "phases")
                         save_project(project, force, data)
                         st.success(f"✅ Phase '{new_name}' added to {force} force")
                         st.rerun()
@@ -1473,13 +909,12 @@ def phases_tab():
                 with col_edit:
                     st.markdown("**✏️ Edit Phase**")
                     if phases:
-                        sorted_phases = sort_phases_numerically(phases)
-                        phase_to_original_idx = {id(phase): phases.index(phase) for phase in phases}
+                        phase_order = get_sort_order(data, "phases")
+                        sorted_phases = [phases[i] for i in phase_order]
                         phase_options = [f"{phase.get('Phase No', i+1)}. {phase.get('Name', 'Unnamed')}" for i, phase in enumerate(sorted_phases)]
                         selected_sorted_idx = st.selectbox("Select Phase to Edit", range(len(sorted_phases)), 
                                                          format_func=lambda x: phase_options[x], key=f"edit_phase_sel_{force}")
-                        selected_phase = sorted_phases[selected_sorted_idx]
-                        selected_phase_idx = phase_to_original_idx[id(selected_phase)]
+                        selected_phase_idx = phase_order[selected_sorted_idx]
                         current_phase = phases[selected_phase_idx]
                         
                         edit_phase_name = st.text_input("Phase Name", value=current_phase.get("Name", ""), key=f"edit_phase_name_{force}")
@@ -1497,14 +932,13 @@ def phases_tab():
                     st.markdown("**🗑️ Delete Phase**")
                     if phases:
                         # Sort phases and create mapping for deletion
-                        sorted_phases = sort_phases_numerically(phases)
-                        phase_to_original_idx = {id(phase): phases.index(phase) for phase in phases}
+                        phase_order = get_sort_order(data, "phases")
+                        sorted_phases = [phases[i] for i in phase_order]
                         
                         phase_options = [f"{phase.get('Phase No', i+1)}. {phase.get('Name', 'Unnamed')}" for i, phase in enumerate(sorted_phases)]
                         selected_sorted_idx = st.selectbox("Select Phase", range(len(sorted_phases)), 
                                                          format_func=lambda x: phase_options[x], key=f"del_phase_{force}")
-                        selected_phase = sorted_phases[selected_sorted_idx]
-                        selected_phase_idx = phase_to_original_idx[id(selected_phase)]
+                        selected_phase_idx = phase_order[selected_sorted_idx]
                         
                         if st.button(f"🗑️ Delete from {force.capitalize()}", type="secondary", key=f"delete_phase_{force}"):
                             phase_name = phases[selected_phase_idx].get("Name")
@@ -1529,7 +963,7 @@ def phases_tab():
             "Phase Name": [p.get("Name") or p.get("Phase") for p in phases]
         })
         
-        display_force_table(df, use_container_width=True)
+        display_force_table(df, use_container_width=True, key=f"phases_{side}")
         
         # Manage phases
         st.markdown("---")
@@ -1544,7 +978,7 @@ def phases_tab():
                     data["phases"] = []
                 data["phases"].append({"Name": name})
                 # Sort phases after adding to maintain sequential order
-                data["phases"] = sort_phases_numerically(data["phases"])
+                data["phases"] = get_sorted_items(data, "phases")
                 save_project(project, side, data)
                 st.success(f"✅ Phase '{name}' added")
                 st.rerun()
@@ -1586,6 +1020,7 @@ def phases_tab():
             else:
                 st.info("No phases to delete")
 def dps_tab():
+    import pandas as pd
     st.header("🎯 Decisive Points (DPs)")
     project = st.session_state.get("project")
     role = st.session_state.get("role")
@@ -1619,7 +1054,7 @@ def dps_tab():
                 else:
                     df = pd.DataFrame(columns=["DP No", "DP Name", "DP weightage", "Objective", "Phase", "Force Group"])
                 
-                display_force_table(df, use_container_width=True, force_type=force)
+                display_force_table(df, use_container_width=True, force_type=force, key=f"dps_{force}")
                 
                 # Manage DPs
                 st.markdown("---")
@@ -1672,7 +1107,7 @@ def dps_tab():
                             "Force Group": new_force_group
                         })
                         # Sort DPs after adding to maintain sequential order
-                        data["dps"] = sort_dps_numerically(data["dps"])
+                        data["dps"] = get_sorted_items(data, "dps")
                         save_project(project, force, data)
                         st.success(f"✅ DP '{new_dp_name}' added to {force} force")
                         st.rerun()
@@ -1680,7 +1115,7 @@ def dps_tab():
                 with col_edit:
                     st.markdown("**✏️ Edit DP**")
                     if dps:
-                        sorted_dps = sorted(enumerate(dps), key=lambda x: int(x[1].get('DP No', 0)) if str(x[1].get('DP No', '')).isdigit() else float('inf'))
+                        sorted_dps = [(i, dps[i]) for i in get_sort_order(data, "dps")]
                         dp_options = [f"DP {dps[original_idx].get('DP No', 'N/A')}: {dps[original_idx].get('Name', 'Unnamed')}" for original_idx, dp in sorted_dps]
                         sorted_indices = [original_idx for original_idx, dp in sorted_dps]
                         
@@ -1705,7 +1140,7 @@ def dps_tab():
                         else:
                             edit_phase = st.text_input("Phase", value=current_dp.get("Phase", ""), key=f"edit_dp_phase_manual_{force}")
                         
-                        edit_weight = st.slider("Weight", 1, 5, int(float(str(current_dp.get("Weight", 3)))), key=f"edit_dp_weight_{force}")
+                        edit_weight = st.slider("Weight", 1, 5, int(current_dp.get("Weight", 3)), key=f"edit_dp_weight_{force}")
                         edit_force_group = st.text_input("Force Group", value=current_dp.get("Force Group", ""), key=f"edit_dp_fg_{force}")
                         
                         if st.button(f"💾 Save Changes", type="primary", key=f"save_edit_dp_{force}"):
@@ -1725,7 +1160,7 @@ def dps_tab():
                     st.markdown("**🗑️ Delete DP**")
                     if dps:
                         # Sort DPs numerically by DP No for display
-                        sorted_dps = sorted(enumerate(dps), key=lambda x: int(x[1].get('DP No', 0)) if str(x[1].get('DP No', '')).isdigit() else float('inf'))
+                        sorted_dps = [(i, dps[i]) for i in get_sort_order(data, "dps")]
                         dp_options = [f"DP {dps[original_idx].get('DP No', 'N/A')}: {dps[original_idx].get('Name', 'Unnamed')}" for original_idx, dp in sorted_dps]
                         sorted_indices = [original_idx for original_idx, dp in sorted_dps]
                         
@@ -1773,7 +1208,7 @@ def dps_tab():
         else:
             df = pd.DataFrame(columns=["DP No", "DP Name", "DP weightage", "Objective", "Phase", "Force Group"])
         
-        display_force_table(df, use_container_width=True)
+        display_force_table(df, use_container_width=True, key=f"dps_{side}")
         
         # Manage DPs
         st.markdown("---")
@@ -1826,7 +1261,7 @@ def dps_tab():
                     "Force Group": force_group
                 })
                 # Sort DPs after adding to maintain sequential order
-                data["dps"] = sort_dps_numerically(data["dps"])
+                data["dps"] = get_sorted_items(data, "dps")
                 save_project(project, side, data)
                 st.success(f"✅ DP '{dp_name}' added")
                 st.rerun()
@@ -1834,7 +1269,7 @@ def dps_tab():
         with col_edit:
             st.markdown("**✏️ Edit DP**")
             if dps:
-                sorted_dps = sorted(enumerate(dps), key=lambda x: int(x[1].get('DP No', 0)) if str(x[1].get('DP No', '')).isdigit() else float('inf'))
+                sorted_dps = [(i, dps[i]) for i in get_sort_order(data, "dps")]
                 dp_options = [f"DP {dps[original_idx].get('DP No', 'N/A')}: {dps[original_idx].get('Name', 'Unnamed')}" for original_idx, dp in sorted_dps]
                 sorted_indices = [original_idx for original_idx, dp in sorted_dps]
                 
@@ -1859,7 +1294,7 @@ def dps_tab():
                 else:
                     edit_phase = st.text_input("Phase", value=current_dp.get("Phase", ""), key="edit_dp_phase_manual_single")
                 
-                edit_weight = st.slider("Weight", 1, 5, int(float(str(current_dp.get("Weight", 3)))), key="edit_dp_weight_single")
+                edit_weight = st.slider("Weight", 1, 5, int(current_dp.get("Weight", 3)), key="edit_dp_weight_single")
                 edit_force_group = st.text_input("Force Group", value=current_dp.get("Force Group", ""), key="edit_dp_fg_single")
                 
                 if st.button("💾 Save Changes", type="primary", key="save_edit_dp_single"):
@@ -1879,7 +1314,7 @@ def dps_tab():
             st.markdown("**🗑️ Delete DP**")
             if dps:
                 # Sort DPs numerically by DP No for display
-                sorted_dps = sorted(enumerate(dps), key=lambda x: int(x[1].get('DP No', 0)) if str(x[1].get('DP No', '')).isdigit() else float('inf'))
+                sorted_dps = [(i, dps[i]) for i in get_sort_order(data, "dps")]
                 dp_options = [f"DP {dps[original_idx].get('DP No', 'N/A')}: {dps[original_idx].get('Name', 'Unnamed')}" for original_idx, dp in sorted_dps]
                 sorted_indices = [original_idx for original_idx, dp in sorted_dps]
                 
@@ -1905,6 +1340,7 @@ def dps_tab():
                 st.info("No DPs to delete")
 
 def tasks_tab():
+    import pandas as pd
     st.header("📋 Tasks")
     project = st.session_state.get("project")
     role = st.session_state.get("role")
@@ -1919,63 +1355,28 @@ def tasks_tab():
             st.info(f"No tasks found for {force_name}.")
             return
         
-        # Group tasks by DP
+        # Group tasks by DP, walking the pre-sorted task order so each group is already in Task No order
         tasks_by_dp = {}
-        for task in tasks:
-            # Get task name - handle different column names from Excel
-            task_name = (task.get("description") or task.get("Desc") or task.get("Name") or 
-                        task.get("Task Name") or task.get("desc") or task.get("name") or 
-                        task.get("task name") or task.get("Task") or task.get("task") or
-                        task.get("Description") or f"Task {task.get('Task No', '')}")
-            
+        for task in get_sorted_items(data, "tasks"):
             dp_no = task.get("dp_no") or task.get("DP No") or task.get("dp no") or task.get("DP") or task.get("dp") or "Unassigned"
-            
-            if str(dp_no) not in tasks_by_dp:
-                tasks_by_dp[str(dp_no)] = []
-            
-            # Prepare task data with proper column handling
-            weight_val = task.get("stated") or task.get("Weight") or task.get("weight") or task.get("Wt") or task.get("wt")
-            progress_val = task.get("achieved") or task.get("Achieved %") or task.get("progress") or task.get("Progress") or task.get("achieved %") or task.get("Progress %")
-            
-            task_data = {
-                "Task Name": str(task_name).strip() if task_name else "Unknown Task",
-                "Weight": str(weight_val).strip() if weight_val and str(weight_val).lower() != 'nan' else "Not Set",
-                "Progress (%)": str(progress_val).strip() if progress_val and str(progress_val).lower() != 'nan' else "0",
-                "Type": task.get("Type", ""),
-                "Force Group": task.get("Force Group", ""),
-                "Criteria": task.get("Criteria", "")
-            }
-            tasks_by_dp[str(dp_no)].append(task_data)
+            tasks_by_dp.setdefault(str(dp_no), []).append(task)
         
-        # Display tasks grouped by DP - sort numerically by DP number
-        def sort_dp_key(item):
-            dp_no = item[0]
-            try:
-                return int(dp_no) if dp_no.isdigit() else float('inf')
-            except:
-                return float('inf')
+        dp_details = {}
+        for dp in dps:
+            dp_details.setdefault(str(dp.get("DP No", "") or dp.get("dp_no", "")), dp)
         
-        for dp_no, dp_tasks in sorted(tasks_by_dp.items(), key=sort_dp_key):
+        # Display tasks grouped by DP, in DP number order
+        for dp_no in get_dp_group_order(data, tasks_by_dp):
+            dp_tasks = tasks_by_dp[dp_no]
             # Find DP details
-            dp_name = "Unknown DP"
-            dp_objective = "Unknown Objective"
-            for dp in dps:
-                if str(dp.get("DP No", "") or dp.get("dp_no", "")) == str(dp_no):
-                    dp_name = dp.get("Name", f"DP {dp_no}")
-                    dp_objective = dp.get("Objective", "Unknown Objective")
-                    break
+            dp = dp_details.get(dp_no)
+            dp_name = dp.get("Name", f"DP {dp_no}") if dp else "Unknown DP"
+            dp_objective = dp.get("Objective", "Unknown Objective") if dp else "Unknown Objective"
             
             with st.expander(f"📋 DP {dp_no}: {dp_name} (Objective: {dp_objective}) - {len(dp_tasks)} Tasks", expanded=True):
                 if dp_tasks:
-                    # Get original tasks for sorting by Task No
-                    dp_original_tasks = [task for task in tasks if str(task.get("dp_no") or task.get("DP No") or task.get("dp no") or task.get("DP") or task.get("dp") or "Unassigned") == str(dp_no)]
-                    
-                    # Sort tasks by Task No
-                    sorted_original_tasks = sort_tasks_numerically(dp_original_tasks)
-                    
-                    # Rebuild dp_tasks in sorted order
                     sorted_dp_tasks = []
-                    for task in sorted_original_tasks:
+                    for task in dp_tasks:
                         task_name = (task.get("description") or task.get("Desc") or task.get("Name") or 
                                    task.get("Task Name") or task.get("desc") or task.get("name") or 
                                    task.get("task name") or task.get("Task") or task.get("task") or
@@ -1996,7 +1397,7 @@ def tasks_tab():
                         sorted_dp_tasks.append(task_data)
                     
                     df = pd.DataFrame(sorted_dp_tasks)
-                    display_force_table(df, use_container_width=True, force_type=force_name)
+                    display_force_table(df, use_container_width=True, force_type=force_name, key=f"tasks_{force_name}_{dp_no}")
                 else:
                     st.info(f"No tasks assigned to DP {dp_no}")
     
@@ -2066,7 +1467,7 @@ def tasks_tab():
                                 "Criteria": task_criteria
                             })
                             # Sort tasks after adding to maintain sequential order
-                            data["tasks"] = sort_tasks_numerically(data["tasks"])
+                            data["tasks"] = get_sorted_items(data, "tasks")
                             save_project(project, force, data)
                             st.success(f"✅ Task '{task_name}' added to {force} force")
                             st.rerun()
@@ -2190,7 +1591,7 @@ def ko_tab():
     st.markdown("*Advanced analytical hierarchy process for priority weightage calculation*")
     
     # Create tabs for different comparison types
-    tab1, tab2 = st.tabs(["🎯 DP Comparison", "✅ Task Comparison"])
+    tab1, tab2, tab3 = st.tabs(["🎯 DP Comparison", "✅ Task Comparison", "👥 Group Consensus"])
     
     s = st.session_state
     project = s.get("project")
@@ -2202,6 +1603,9 @@ def ko_tab():
     
     with tab2:
         task_comparison_tab(s, project, side, data)
+    
+    with tab3:
+        group_consensus_tab(s, project, side, data)
 
 def dp_comparison_tab(s, project, side, data):
     """Tab for comparing DPs within an objective"""
@@ -2222,15 +1626,13 @@ def dp_comparison_tab(s, project, side, data):
     # Step 1: Objective Selection
     st.markdown("#### 📋 Step 1: Select Objective")
     
-    # Sort objectives numerically and create mapping
-    sorted_objectives = sort_objectives_numerically(objectives)
-    obj_to_original_idx = {id(obj): objectives.index(obj) for obj in objectives}
-    
+    # Objectives in Objective No order, mapped to their index in the plan
     obj_options = {}
-    for i, obj in enumerate(sorted_objectives):
+    for i, obj_idx in enumerate(get_sort_order(data, "objectives")):
+        obj = objectives[obj_idx]
         obj_no = obj.get("Objective No", i+1)
         obj_name = obj.get("Name", obj.get("name", f"Objective {obj_no}"))
-        obj_options[f"Obj {obj_no}: {obj_name}"] = obj
+        obj_options[f"Obj {obj_no}: {obj_name}"] = obj_idx
     
     selected_obj_display = st.selectbox(
         "Select objective for DP comparison:",
@@ -2238,10 +1640,8 @@ def dp_comparison_tab(s, project, side, data):
         help="Choose the objective whose DPs you want to compare"
     )
     
-    selected_objective = obj_options[selected_obj_display]
-    
-    # Get the index of the selected objective
-    selected_obj_idx = obj_to_original_idx[id(selected_objective)]
+    selected_obj_idx = obj_options[selected_obj_display]
+    selected_objective = objectives[selected_obj_idx]
     
     # Find DPs for selected objective
     objective_name = selected_objective.get("Name", selected_objective.get("name", ""))
@@ -2307,9 +1707,9 @@ def task_comparison_tab(s, project, side, data):
     # Step 1: DP Selection
     st.markdown("#### 🎯 Step 1: Select Decision Point")
     
-    # Create DP options with names and numbers - sort numerically
+    # Create DP options with names and numbers, in DP No order
     dp_list = []
-    for dp in dps:
+    for dp in get_sorted_items(data, "dps"):
         dp_no = get_dp_no(dp)
         dp_name = dp.get("Name", dp.get("name", f"DP {dp_no}"))
         if dp_no is not None:
@@ -2319,9 +1719,6 @@ def task_comparison_tab(s, project, side, data):
         st.error("❌ No valid DPs found. Please ensure DPs have proper DP No assigned.")
         return
     
-    # Sort numerically by DP number
-    dp_list.sort(key=lambda x: int(x[0]) if str(x[0]).isdigit() else float('inf'))
-    
     # Create options dictionary in sorted order
     dp_options = {display: dp_no for dp_no, display in dp_list}
     
@@ -2384,6 +1781,7 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
     """
     Generic KO comparison function for both DPs and tasks
     """
+    from ahp_group import SAATY_SCALE, judgments_to_matrix, submit_planner_judgments
     import itertools
     
     if len(items) < 2:
@@ -2396,16 +1794,29 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
     if f"{key_prefix}_idx" not in s:
         s[f"{key_prefix}_idx"] = 0
         s[f"{key_prefix}_scores"] = {i: 1 for i in range(len(items))}
+        s[f"{key_prefix}_judgments"] = {}
     
     # Reset if identifier changed
     current_key = f"{key_prefix}_current"
     if s.get(current_key) != identifier:
         s[f"{key_prefix}_idx"] = 0
         s[f"{key_prefix}_scores"] = {i: 1 for i in range(len(items))}
+        s[f"{key_prefix}_judgments"] = {}
         s[current_key] = identifier
     
     idx = s[f"{key_prefix}_idx"]
     scores = s[f"{key_prefix}_scores"]
+    # Pairwise judgments (a_ij on the Saaty scale) kept for group consensus
+    judgments = s.setdefault(f"{key_prefix}_judgments", {})
+    
+    # Get item names based on type
+    def get_item_name(item, idx, item_type):
+        if item_type == "task":
+            return (item.get("description") or item.get("Desc") or item.get("Name") or 
+                   item.get("Task Name") or item.get("desc") or item.get("name") or 
+                   f"Task {idx+1}")
+        else:  # DP
+            return (item.get("Name") or item.get("name") or f"DP {idx+1}")
     
     st.markdown("#### ⚖️ Pairwise Comparison")
     
@@ -2415,15 +1826,6 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
         item_a = items[a_idx]
         item_b = items[b_idx]
         
-        # Get item names based on type
-        def get_item_name(item, idx, item_type):
-            if item_type == "task":
-                return (item.get("description") or item.get("Desc") or item.get("Name") or 
-                       item.get("Task Name") or item.get("desc") or item.get("name") or 
-                       f"Task {idx+1}")
-            else:  # DP
-                return (item.get("Name") or item.get("name") or f"DP {idx+1}")
-        
         item_a_name = get_item_name(item_a, a_idx, item_type)
         item_b_name = get_item_name(item_b, b_idx, item_type)
         
@@ -2431,6 +1833,15 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
         comparison_question = f"*Which {item_type} is more important/critical for achieving the {parent_name} objective?*" if item_type == "task" else f"*Which DP has higher priority within the {parent_name} objective?*"
         st.markdown(comparison_question)
         
+        intensity = st.select_slider(
+            "Strength of preference",
+            options=list(SAATY_SCALE.keys()),
+            value=3,
+            format_func=lambda v: f"{v} - {SAATY_SCALE[v]}",
+            key=f"{key_prefix}_intensity_{idx}",
+            help="How strongly the chosen option outranks the other (Saaty 1-9 scale, used for group consensus)"
+        )
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -2443,6 +1854,7 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
             
             if st.button(f"🅰️ Choose {item_label} A", key=f"{item_type}_a_{idx}_{identifier}", type="primary"):
                 scores[a_idx] += 1
+                judgments[(a_idx, b_idx)] = intensity
                 s[f"{key_prefix}_idx"] += 1
                 st.rerun()
         
@@ -2456,6 +1868,7 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
             
             if st.button(f"🅱️ Choose {item_label} B", key=f"{item_type}_b_{idx}_{identifier}", type="primary"):
                 scores[b_idx] += 1
+                judgments[(a_idx, b_idx)] = 1.0 / intensity
                 s[f"{key_prefix}_idx"] += 1
                 st.rerun()
         
@@ -2562,6 +1975,23 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
         
         st.divider()
         
+        # Submit this planner's judgments to the group consensus pool
+        st.markdown("#### 👥 Submit to Group Consensus")
+        if len(judgments) == len(pairs):
+            planner = st.text_input("Planner Name", key=f"{key_prefix}_planner", placeholder="e.g. Lt Cdr Rao",
+                                    help="Judgments are stored per planner; resubmitting replaces your earlier entry")
+            if st.button("📨 Submit My Judgments", key=f"submit_group_{item_type}_{identifier}") and planner.strip():
+                group_items = [{"key": get_ko_item_key(item, i, item_type), "name": get_item_name(item, i, item_type)}
+                               for i, item in enumerate(items)]
+                matrix = judgments_to_matrix(len(items), judgments)
+                submit_planner_judgments(data, item_type, identifier, parent_name, group_items, planner.strip(), matrix)
+                save_project(project, side, data)
+                st.success(f"✅ Judgments submitted for {planner.strip()}. See the Group Consensus tab.")
+        else:
+            st.info("ℹ️ Restart this comparison to record judgments for group consensus.")
+        
+        st.divider()
+        
         # Control buttons
         col1, col2 = st.columns(2)
         
@@ -2570,6 +2000,7 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
             if st.button(f"🔄 Restart KO for this {item_label}", key=restart_key, type="secondary"):
                 s[f"{key_prefix}_idx"] = 0
                 s[f"{key_prefix}_scores"] = {i: 1 for i in range(len(items))}
+                s[f"{key_prefix}_judgments"] = {}
                 st.rerun()
         
         with col2:
@@ -2582,6 +2013,113 @@ def perform_ko_comparison(s, project, side, data, items, item_type, identifier,
                     del s[key]
                 st.rerun()
 
+def get_ko_item_key(item, idx, item_type):
+    """Stable key used to match KO items back to DPs/tasks when applying group weights"""
+    if item_type == "task":
+        key = item.get("Task No") or item.get("task_no") or item.get("description") or item.get("Name")
+    else:  # DP
+        key = item.get("DP No") or item.get("dp_no") or item.get("Name")
+    return str(key if key is not None else idx)
+
+def group_consensus_tab(s, project, side, data):
+    """Tab for aggregating several planners' KO judgments into consensus weights"""
+    import pandas as pd
+    from ahp_group import GROUP_METHODS, CONSISTENCY_THRESHOLD, remove_planner_judgments, compute_group_session
+    st.subheader("👥 Group Consensus")
+    st.markdown("*Combine pairwise judgments submitted by several planners into one set of weights*")
+    
+    sessions = data.get("ko", {}).get("group", {})
+    sessions = {key: session for key, session in sessions.items() if session.get("judgments")}
+    if not sessions:
+        st.info("📝 No planner judgments submitted yet. Complete a DP or Task comparison and submit it under your name.")
+        return
+    
+    session_options = {}
+    for key, session in sessions.items():
+        if session["item_type"] == "dp":
+            label = f"🎯 DPs in objective '{session.get('parent', '')}'"
+        else:
+            label = f"✅ Tasks in DP {session['identifier']}: {session.get('parent', '')}"
+        session_options[f"{label} ({len(session['judgments'])} planners)"] = key
+    
+    selected_label = st.selectbox("Select comparison set:", list(session_options.keys()), key="group_session_select")
+    session_key = session_options[selected_label]
+    session = sessions[session_key]
+    
+    method = st.radio("Aggregation method", list(GROUP_METHODS.keys()), format_func=GROUP_METHODS.get,
+                      horizontal=True, key="group_method",
+                      help="AIJ combines judgments before deriving weights; AIP combines each planner's own weights")
+    
+    try:
+        result = compute_group_session(session, method)
+    except ValueError as e:
+        st.error(f"❌ Could not aggregate judgments: {str(e)}")
+        return
+    
+    # Per-planner consistency
+    st.markdown("#### 🧑‍✈️ Planner Consistency")
+    planner_rows = []
+    for planner_result in result["planners"]:
+        planner_rows.append({
+            "Planner": planner_result["planner"],
+            "Consistency Ratio": f"{planner_result['cr']:.3f}",
+            "Status": "✅ Consistent" if planner_result["consistent"] else "⚠️ Review judgments",
+            "Submitted": session["judgments"][planner_result["planner"]].get("submitted", "")[:16].replace("T", " ")
+        })
+    display_force_table(pd.DataFrame(planner_rows), use_container_width=True, force_type=side, key=f"group_planners_{side}_{session_key}")
+    
+    inconsistent = [p["planner"] for p in result["planners"] if not p["consistent"]]
+    if inconsistent:
+        st.warning(f"⚠️ CR above {CONSISTENCY_THRESHOLD:.2f} for: {', '.join(inconsistent)}")
+    
+    # Consensus weights alongside each planner's own weights
+    st.markdown("#### ⚖️ Consensus Weights")
+    weight_rows = []
+    for i, item in enumerate(result["items"]):
+        row = {"Item": item["name"], "Consensus (%)": round(result["weights"][i], 2)}
+        for planner_result in result["planners"]:
+            row[planner_result["planner"]] = round(planner_result["weights"][i], 2)
+        weight_rows.append(row)
+    display_force_table(pd.DataFrame(weight_rows), use_container_width=True, force_type=side, key=f"group_weights_{side}_{session_key}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Planners", len(result["planners"]))
+    with col2:
+        if result["group_cr"] is not None:
+            st.metric("Group Consistency Ratio", f"{result['group_cr']:.3f}")
+    
+    col_apply, col_remove = st.columns(2)
+    
+    with col_apply:
+        if st.button("✅ Apply Consensus Weights", key=f"apply_group_{session_key}", type="primary"):
+            consensus = {item["key"]: round(result["weights"][i], 2) for i, item in enumerate(result["items"])}
+            if session["item_type"] == "dp":
+                for i, dp in enumerate(data.get("dps", [])):
+                    key = get_ko_item_key(dp, i, "dp")
+                    if dp.get("Objective") == session.get("parent") and key in consensus:
+                        dp["Weight"] = consensus[key]
+                        dp["weight"] = consensus[key]
+            else:
+                for i, task in enumerate(data.get("tasks", [])):
+                    key = get_ko_item_key(task, i, "task")
+                    task_dp = task.get("DP No") or task.get("dp_no")
+                    if str(task_dp) == str(session["identifier"]) and key in consensus:
+                        task["Weight"] = consensus[key]
+                        task["weight"] = consensus[key]
+                        task["stated"] = consensus[key]
+                        task["Stated %"] = consensus[key]
+            save_project(project, side, data)
+            st.success("✅ Consensus weights applied")
+    
+    with col_remove:
+        planner_to_remove = st.selectbox("Remove planner", sorted(session["judgments"].keys()), key=f"remove_planner_{session_key}")
+        if st.button("🗑️ Remove Judgments", key=f"remove_group_{session_key}", type="secondary"):
+            remove_planner_judgments(data, session["item_type"], session["identifier"], planner_to_remove)
+            save_project(project, side, data)
+            st.success(f"Removed judgments from {planner_to_remove}")
+            st.rerun()
+
 # --- Progress Entry Tab (Control Only) ---
 def progress_entry_tab():
     st.header("📊 Progress Entry (Control Only)")
@@ -2593,6 +2131,9 @@ def progress_entry_tab():
         st.warning("⚠️ No forces configured. Please use Force Manager to add forces first.")
         return
     
+    show_plan_search(project)
+    show_sitrep_import(project)
+    
     # Force-based tabs for progress entry
     if len(SIDES) == 1:
         # Single force - show directly
@@ -2607,8 +2148,177 @@ def progress_entry_tab():
             with tabs[i]:
                 show_force_progress_entry(project, force)
 
+PLAN_SEARCH_LIMIT = 30
+
+def show_plan_search(project):
+    """Search box over tasks, criteria, progress comments, DPs and objectives of every force"""
+    query = st.text_input("🔍 Search plan", key="plan_search_query",
+                          placeholder="e.g. bridge, recon patrol, convoy secur...",
+                          help="Matches whole words, word prefixes and close misspellings across all forces")
+    if not query.strip():
+        return
+    results = search_project(project, SIDES, query, limit=PLAN_SEARCH_LIMIT)
+    if not results:
+        st.info(f"No matches for '{query}'.")
+        return
+    st.caption(f"Best {len(results)} match(es)" if len(results) == PLAN_SEARCH_LIMIT else f"{len(results)} match(es)")
+    for i, result in enumerate(results):
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"{get_force_emoji(result['force'])} **{result['force'].capitalize()}** · "
+                        f"{result['label']}{' · DP ' + result['dp'] if result['kind'] == 'task' else ''} — {result['title']}")
+        with col2:
+            if result["dp"] and st.button("Go to DP", key=f"search_goto_{i}", use_container_width=True):
+                st.session_state[f"selected_dp_{result['force']}"] = result["dp"]
+                if len(SIDES) > 1:
+                    st.session_state["search_jump_notice"] = f"DP {result['dp']} selected in the {result['force'].capitalize()} tab."
+                st.rerun()
+    if st.session_state.get("search_jump_notice"):
+        st.success(st.session_state.pop("search_jump_notice"))
+
+def get_data_version_for(project, force, independent=False):
+    return get_independent_version(project, force) if independent else get_data_version(project, force)
+
+def get_progress_graph(project, force, data, independent=False):
+    """Incremental rollup graph kept across reruns; rebuilt only if the file changed elsewhere"""
+    from ahp_rollup import build_rollup_graph
+    key = f"rollup_graph_{project}_{force}_{'independent' if independent else 'control'}"
+    version = get_data_version_for(project, force, independent)
+    cached = st.session_state.get(key)
+    if not cached or cached["version"] != version:
+        cached = {"version": version, "graph": build_rollup_graph(data)}
+        st.session_state[key] = cached
+    return cached
+
+PROGRESS_ENTRY_MODES = {
+    "cards": "🃏 Task cards (auto-save)",
+    "dp_grid": "🧮 Grid · selected DP",
+    "force_grid": "📋 Grid · whole force"
+}
+GRID_FIELDS = ["Weight", "Progress", "Intangible", "Progress Comment"]
+# Session keys of the per-task card widgets; cleared after a grid commit so cards re-read saved values
+TASK_WIDGET_PREFIXES = ["weight_val_", "progress_val_", "synced_", "weight_slider_", "weight_input_",
+                        "progress_slider_", "progress_input_", "comment_", "intangible_", "sync_weight_", "sync_progress_"]
+
+def reset_task_widgets(force, tasks, task_indices):
+    """Drop card widget state for tasks saved elsewhere so the cards show the saved values"""
+    for idx in task_indices:
+        unique_key = f"progress_{force}_{str(tasks[idx].get('DP No') or tasks[idx].get('dp_no') or 'Unassigned')}_{idx}"
+        for prefix in TASK_WIDGET_PREFIXES:
+            st.session_state.pop(f"{prefix}{unique_key}", None)
+
+def show_sitrep_import(project):
+    """Progress-only bulk import of a field unit's CSV/Excel sitrep into one force, saved as one batch"""
+    import pandas as pd
+    from ahp_sitrep import read_sitrep, plan_sitrep_updates
+    with st.expander("📥 Import Sitrep (CSV / Excel)"):
+        st.caption("Columns: Task No and Progress (required); DP No, Intangible and Progress Comment (optional). "
+                   "Rows are matched to tasks by Task No, plus DP No when present.")
+        force = st.selectbox("Force", SIDES, format_func=lambda f: f"{get_force_emoji(f)} {f.capitalize()}", key="sitrep_force")
+        uploaded = st.file_uploader("Sitrep file", type=["csv", "xlsx"], key="sitrep_file")
+        if not uploaded:
+            return
+        try:
+            data = load_project(project, force)
+            plan = plan_sitrep_updates(data, read_sitrep(uploaded, uploaded.name))
+        except Exception as e:
+            st.error(f"Error reading sitrep: {str(e)}")
+            return
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows", plan["rows"])
+        col2.metric("Ready to apply", len(plan["updates"]))
+        col3.metric("Rejected", len(plan["errors"]))
+        if plan["errors"]:
+            st.warning("⚠️ Fix the rejected rows and upload again; the sitrep is only applied when every row is valid.")
+            st.dataframe(pd.DataFrame(plan["errors"]), use_container_width=True, hide_index=True)
+            return
+        if st.button(f"✅ Apply {len(plan['updates'])} update(s) to {force.capitalize()}", type="primary", key="sitrep_apply"):
+            try:
+                changed = apply_progress_updates(data["tasks"], plan["updates"])
+            except ValueError as e:
+                st.error(f"Nothing was saved: {str(e)}")
+                return
+            if changed:
+                save_project(project, force, data)
+                reset_task_widgets(force, data["tasks"], changed)
+            st.success(f"Applied sitrep: {len(changed)} task(s) changed in one save.")
+
+def show_progress_grid(project, force, data, task_indices, rollup_state, independent=False, scope="whole force"):
+    """Spreadsheet-style entry: edits stay in a form until committed as one validated, batched save"""
+    import pandas as pd
+    from ahp_rollup import update_graph_task
+    tasks = data.get("tasks", [])
+    mode_key = "independent" if independent else "control"
+    notice_key = f"grid_notice_{force}_{mode_key}"
+    if st.session_state.get(notice_key):
+        st.success(st.session_state.pop(notice_key))
+    
+    rows = pd.DataFrame([{
+        "Task No": str(tasks[i].get("Task No", i + 1)),
+        "DP No": str(tasks[i].get("DP No") or tasks[i].get("dp_no") or ""),
+        "Task": (tasks[i].get("description") or tasks[i].get("Name") or tasks[i].get("Task") or f"Task {tasks[i].get('Task No', i + 1)}"),
+        "Type": "Tangible" if str(tasks[i].get("Type", "T")).upper() == "T" else "Intangible",
+        "Weight": get_task_weight(tasks[i]),
+        "Progress": tasks[i].get("Progress", tasks[i].get("progress", 0)) or 0,
+        "Intangible": tasks[i].get("Intangible", "nil") or "nil",
+        "Progress Comment": tasks[i].get("Progress Comment", tasks[i].get("progress_comment", "")) or ""
+    } for i in task_indices], index=list(task_indices), columns=["Task No", "DP No", "Task", "Type"] + GRID_FIELDS)
+    
+    editor_key = f"progress_grid_editor_{force}_{mode_key}_{scope}"
+    with st.form(f"progress_grid_{force}_{mode_key}_{scope}"):
+        st.caption(f"Edit {len(rows)} task(s) for the {scope}; nothing is saved until you commit. "
+                   "Intangible tasks: nil 0–33%, partial 34–66%, complete 67–100%.")
+        edited = st.data_editor(
+            rows,
+            key=editor_key,
+            use_container_width=True,
+            hide_index=True,
+            num_rows="fixed",
+            # Independent assessments overlay progress only; weights belong to Control's plan
+            disabled=["Task No", "DP No", "Task", "Type"] + (["Weight"] if independent else []),
+            column_config={
+                "Weight": st.column_config.NumberColumn("Weight %", min_value=0, max_value=100, step=1),
+                "Progress": st.column_config.NumberColumn("Progress %", min_value=0, max_value=100, step=1),
+                "Intangible": st.column_config.SelectboxColumn("Assessment", options=INTANGIBLE_LEVELS),
+                "Progress Comment": st.column_config.TextColumn("Progress Notes")
+            }
+        )
+        submitted = st.form_submit_button(f"💾 Commit changes ({scope})", type="primary")
+    if not submitted:
+        return
+    
+    updates = {}
+    for idx in rows.index:
+        # Cleared cells come back as NaN, never equal the original and are rejected by validation
+        after = edited.loc[idx, GRID_FIELDS].to_dict()
+        if after != rows.loc[idx, GRID_FIELDS].to_dict():
+            updates[idx] = after
+    if not updates:
+        st.info("No changes to commit.")
+        return
+    try:
+        changed = apply_progress_updates(tasks, updates)
+    except ValueError as e:
+        st.error(f"Nothing was saved: {str(e)}")
+        return
+    
+    if changed:
+        data["tasks"] = tasks
+        if independent:
+            save_independent_project(project, force, data, task_indices=changed)
+        else:
+            save_project(project, force, data)
+        for idx in changed:
+            update_graph_task(rollup_state["graph"], idx, tasks[idx])
+        reset_task_widgets(force, tasks, changed)
+        rollup_state["version"] = get_data_version_for(project, force, independent)
+    st.session_state.pop(editor_key, None)
+    st.session_state[notice_key] = f"✅ Committed {len(changed)} task update(s) in one save."
+    st.rerun()
+
 def show_force_progress_entry(project, force, independent=False):
     """Show progress entry interface for a specific force"""
+    from ahp_rollup import update_graph_task, get_graph_value
     
     # Load data using appropriate method based on mode
     if independent:
@@ -2617,24 +2327,23 @@ def show_force_progress_entry(project, force, independent=False):
         data = load_project(project, force)
         
     tasks = data.get("tasks", [])
+    rollup_state = get_progress_graph(project, force, data, independent)
+    progress_graph = rollup_state["graph"]
     dps = data.get("dps", [])
     
     if not tasks:
         st.info(f"📝 No tasks found for {force} force. Please add tasks in the Tasks tab first.")
         return
     
-    # Group tasks by DP for organized display
+    # Group tasks by DP, walking the pre-sorted task order so each group is already in Task No order
     tasks_by_dp = {}
-    for i, task in enumerate(tasks):
+    for i in get_sort_order(data, "tasks"):
+        task = tasks[i]
         dp_no = task.get("DP No") or task.get("dp_no") or "Unassigned"
         if str(dp_no) not in tasks_by_dp:
             tasks_by_dp[str(dp_no)] = []
         tasks_by_dp[str(dp_no)].append((i, task))
     
-    # Sort tasks within each DP by Task No
-    for dp_no in tasks_by_dp:
-        tasks_by_dp[dp_no].sort(key=lambda x: get_numeric_sort_key(x[1], "Task No"))
-    
     # Summary statistics
     total_tasks = len(tasks)
     completed_tasks = sum(1 for task in tasks if (task.get("Progress", task.get("progress", task.get("achieved", 0))) or 0) >= 100)
@@ -2651,22 +2360,21 @@ def show_force_progress_entry(project, force, independent=False):
     
     st.divider()
     
-    # DP Selection - Card-based interface
-    def sort_dp_key(item):
-        dp_no = item[0]
-        try:
-            return int(dp_no) if dp_no.isdigit() else float('inf')
-        except:
-            return float('inf')
+    entry_mode = st.radio("Entry mode", list(PROGRESS_ENTRY_MODES), format_func=PROGRESS_ENTRY_MODES.get,
+                          horizontal=True, key=f"entry_mode_{force}_{'independent' if independent else 'control'}")
+    if entry_mode == "force_grid":
+        show_progress_grid(project, force, data, get_sort_order(data, "tasks"), rollup_state, independent, "whole force")
+        return
     
-    sorted_dps = sorted(tasks_by_dp.items(), key=sort_dp_key)
+    # DP Selection - Card-based interface, in DP number order
+    sorted_dps = [(dp_no, tasks_by_dp[dp_no]) for dp_no in get_dp_group_order(data, tasks_by_dp)]
     
     if not sorted_dps:
         st.info("No tasks available for progress entry")
         return
     
-    # Initialize selected DP in session state
-    if f"selected_dp_{force}" not in st.session_state:
+    # Initialize selected DP in session state (a search jump may point at a DP without tasks)
+    if st.session_state.get(f"selected_dp_{force}") not in tasks_by_dp:
         st.session_state[f"selected_dp_{force}"] = sorted_dps[0][0]
     
     # Display DP cards for selection
@@ -2689,34 +2397,17 @@ def show_force_progress_entry(project, force, independent=False):
                     dp_objective = dp.get("Objective", "Unknown Objective")
                     break
             
-            # Calculate DP progress
-            dp_progress = sum(task.get("Progress", task.get("progress", 0)) or 0 for _, task in dp_tasks) / len(dp_tasks) if dp_tasks else 0
+            # DP progress from the incremental rollup graph (same rules as compute_progress)
+            dp_progress = get_graph_value(progress_graph, "dp", dp_no)
             
             # Check if this DP is selected
             is_selected = st.session_state[f"selected_dp_{force}"] == dp_no
             
             with cols[idx]:
-                # Card styling based on selection
-                if is_selected:
-                    card_color = "#667eea"
-                    border_style = "border: 3px solid #4c51bf;"
-                else:
-                    card_color = "#6b7280"
-                    border_style = "border: 1px solid #d1d5db;"
-                
-                # DP Card - show full name with text wrapping
-                st.markdown(f"""
-                <div style="background: {card_color}; {border_style}
-                     padding: 15px; border-radius: 10px; margin-bottom: 10px; cursor: pointer;
-                     box-shadow: 0 4px 6px rgba(0,0,0,0.1); transition: all 0.3s; min-height: 120px;">
-                    <h4 style="color: white; margin: 0; font-size: 16px;">🎯 DP {dp_no}</h4>
-                    <p style="color: white; opacity: 0.9; margin: 8px 0; font-size: 13px; 
-                       word-wrap: break-word; overflow-wrap: break-word;">{dp_name}</p>
-                    <p style="color: white; opacity: 0.8; margin: 5px 0 0 0; font-size: 12px;">
-                        📋 {len(dp_tasks)} tasks | 📈 {int(dp_progress)}%
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
+                # DP Card - show full name with text wrapping, highlighted when selected
+                st.markdown(f'<div class="dp-card{" selected" if is_selected else ""}"><h4>🎯 DP {dp_no}</h4>'
+                            f'<p class="name">{dp_name}</p><p class="meta">📋 {len(dp_tasks)} tasks | 📈 {int(dp_progress)}%</p></div>',
+                            unsafe_allow_html=True)
                 
                 if st.button(f"Select DP {dp_no}", key=f"select_dp_{dp_no}_{force}", use_container_width=True):
                     st.session_state[f"selected_dp_{force}"] = dp_no
@@ -2727,6 +2418,9 @@ def show_force_progress_entry(project, force, independent=False):
     # Display selected DP with all tasks
     selected_dp_no = st.session_state[f"selected_dp_{force}"]
     dp_tasks = tasks_by_dp[selected_dp_no]
+    # Card widget state is only kept for the DP on screen; values are already saved
+    evict_keys(st.session_state, [f"{prefix}progress_{force}_" for prefix in TASK_WIDGET_PREFIXES],
+               keep={f"{prefix}progress_{force}_{selected_dp_no}_{i}" for prefix in TASK_WIDGET_PREFIXES for i, _ in dp_tasks})
     
     # Find DP details
     dp_name = "Unknown DP"
@@ -2742,11 +2436,15 @@ def show_force_progress_entry(project, force, independent=False):
     <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
          padding: 20px; border-radius: 10px; margin: 20px 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
         <h3 style="color: white; margin: 0;">🎯 DP {selected_dp_no}: {dp_name}</h3>
-        <p style="color: white; opacity: 0.9; margin: 8px 0 0 0;">📌 {dp_objective}</p>
-        <p style="color: white; opacity: 0.8; margin: 8px 0 0 0; font-size: 14px;">Tasks: {len(dp_tasks)}</p>
+        <p style="color: white; opacity: 0.9; margin: 8px 0 0 0;">📌 {dp_objective} · {get_graph_value(progress_graph, "objective", dp_objective):.1f}%</p>
+        <p style="color: white; opacity: 0.8; margin: 8px 0 0 0; font-size: 14px;">Tasks: {len(dp_tasks)} | DP Progress: {get_graph_value(progress_graph, "dp", selected_dp_no):.1f}%</p>
     </div>
     """, unsafe_allow_html=True)
     
+    if entry_mode == "dp_grid":
+        show_progress_grid(project, force, data, [i for i, _ in dp_tasks], rollup_state, independent, f"DP {selected_dp_no}")
+        return
+    
     # Display all tasks for this DP
     for task_idx, (original_idx, task) in enumerate(dp_tasks):
         # Get task name and details
@@ -2756,22 +2454,13 @@ def show_force_progress_entry(project, force, independent=False):
                    task.get("Description") or f"Task {task.get('Task No', task_idx+1)}")
         
         # Get current progress
+        # Weights and progress are typed numbers once the project is loaded (normalise_numeric_fields)
         current_progress = task.get("Progress", task.get("progress", task.get("achieved", 0))) or 0
-        try:
-            current_progress = float(str(current_progress).replace('%', ''))
-        except:
-            current_progress = 0
         
         task_no = task.get("Task No", task_idx+1)
         
         # Current values with proper handling
-        current_weight = task.get("stated") or task.get("Weight") or task.get("weight") or task.get("Wt") or task.get("wt") or 0
-        
-        # Handle string percentages
-        try:
-            current_weight = float(str(current_weight).replace('%', ''))
-        except:
-            current_weight = 0
+        current_weight = get_task_weight(task)
         
         # Progress update controls
         unique_key = f"progress_{force}_{selected_dp_no}_{original_idx}"
@@ -2796,8 +2485,8 @@ def show_force_progress_entry(project, force, independent=False):
             st.session_state[f"progress_val_{unique_key}"] = int(round(current_progress))
         
         # Always sync from saved values on first load to ensure consistency
-        saved_weight_val = int(round(float(str(task.get("Weight", task.get("weight", 0))).replace('%', ''))))
-        saved_progress_val = int(round(float(str(task.get("Progress", task.get("progress", 0))).replace('%', ''))))
+        saved_weight_val = int(round(task.get("Weight", task.get("weight", 0))))
+        saved_progress_val = int(round(task.get("Progress", task.get("progress", 0))))
         
         # Update session state if it doesn't match saved value (e.g., after page reload)
         if f"synced_{unique_key}" not in st.session_state:
@@ -2810,12 +2499,8 @@ def show_force_progress_entry(project, force, independent=False):
         
         # Task header with LIVE progress value
         task_color = "#38a169" if live_progress >= 75 else "#e53e3e" if live_progress < 25 else "#d69e2e"
-        st.markdown(f"""
-        <div style="background: {task_color}; color: white; padding: 15px; border-radius: 8px; margin: 20px 0;">
-            <h4 style="color: white; margin: 0;">🔹 Task {task_no}: {task_name}</h4>
-            <p style="margin: 5px 0 0 0; opacity: 0.9;">Current Progress: {live_progress}%</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(f'<div class="task-header" style="--force: {task_color};"><h4>🔹 Task {task_no}: {task_name}</h4>'
+                    f'<p>Current Progress: {live_progress}%</p></div>', unsafe_allow_html=True)
         
         # Two-column layout for task editing
         col1, col2 = st.columns([1, 1])
@@ -2945,8 +2630,8 @@ def show_force_progress_entry(project, force, independent=False):
                 )
             
             # AUTO-SAVE: Check if values have changed from saved values
-            saved_weight = int(round(float(str(task.get("Weight", task.get("weight", 0))).replace('%', ''))))
-            saved_progress = int(round(float(str(task.get("Progress", task.get("progress", 0))).replace('%', ''))))
+            saved_weight = int(round(task.get("Weight", task.get("weight", 0))))
+            saved_progress = int(round(task.get("Progress", task.get("progress", 0))))
             saved_intangible = task.get("Intangible", "nil")
             saved_comment = task.get("Progress Comment", task.get("progress_comment", ""))
             
@@ -2954,34 +2639,18 @@ def show_force_progress_entry(project, force, independent=False):
             if (new_weight != saved_weight or new_progress != saved_progress or 
                 intangible != saved_intangible or progress_comment != saved_comment):
                 
-                # Update task with new values (as whole numbers)
-                tasks[original_idx]["Weight"] = new_weight
-                tasks[original_idx]["weight"] = new_weight
-                tasks[original_idx]["stated"] = new_weight
-                tasks[original_idx]["Stated %"] = new_weight
-                
-                tasks[original_idx]["Progress"] = new_progress
-                tasks[original_idx]["progress"] = new_progress
-                tasks[original_idx]["achieved"] = new_progress
-                tasks[original_idx]["Achieved %"] = new_progress
-                tasks[original_idx]["Progress %"] = new_progress
-                
-                # Force intangible to nil for tangible tasks
-                if task_type_for_intangible == 'T':
-                    tasks[original_idx]["Intangible"] = 'nil'
-                else:
-                    tasks[original_idx]["Intangible"] = intangible
-                
-                # Save progress comment
-                tasks[original_idx]["Progress Comment"] = progress_comment
-                tasks[original_idx]["progress_comment"] = progress_comment
+                # Update task with new values (as whole numbers); tangible tasks keep intangible at nil
+                set_task_progress(tasks[original_idx], new_weight, new_progress, intangible, progress_comment)
                 
                 # Save to file
                 data["tasks"] = tasks
                 if independent:
-                    save_independent_project(project, force, data)
+                    save_independent_project(project, force, data, task_indices=[original_idx])
                 else:
                     save_project(project, force, data)
+                # Only this task's DP -> objective -> phase path is recomputed on the next read
+                update_graph_task(progress_graph, original_idx, tasks[original_idx])
+                rollup_state["version"] = get_data_version_for(project, force, independent)
         
         with col2:
             st.markdown("**📝 Task Information**")
@@ -3028,7 +2697,7 @@ def show_force_progress_entry(project, force, independent=False):
         if f"weight_val_{unique_key}" in st.session_state:
             dp_total_weight += st.session_state[f"weight_val_{unique_key}"]
         else:
-            saved_weight = float(str(task_data.get("Weight", task_data.get("weight", 0))).replace('%', ''))
+            saved_weight = task_data.get("Weight", task_data.get("weight", 0))
             dp_total_weight += saved_weight
     
     dp_total_weight = int(round(dp_total_weight))
@@ -3056,7 +2725,7 @@ def dashboard_tab():
     st.markdown("*Real-time operational status and progress monitoring for all forces*")
     
     project = st.session_state.get("project")
-    rag = st.session_state.get("rag", {"red": 40, "amber": 70})
+    rag = get_rag_thresholds(project)
     if not SIDES:
         st.warning("⚠️ No forces configured yet. Please use Force Manager to add forces first.")
         return
@@ -3087,6 +2756,19 @@ def dashboard_tab():
                 show_force_dashboard(side, project, rag)
 
 # --- Chat Tab ---
+def chat_html(messages, me):
+    """Chat bubbles for a conversation as one block of class-based markup; me's messages align right"""
+    bubbles = []
+    for message in messages:
+        sender = message["sender"]
+        is_control = sender == "control"
+        icon = "🎯" if is_control else get_force_emoji(sender)
+        bubbles.append(
+            f'<div class="chat-row{" mine" if sender == me else ""}"><div class="chat-bubble{" control" if is_control else ""}">'
+            f'<div class="chat-meta">{icon} {sender.title()} - {message["timestamp"]}</div>'
+            f'<div class="chat-text">{message["message"]}</div></div></div>')
+    return "".join(bubbles)
+
 def chat_tab():
     """Dedicated chat interface in navigation panel"""
     project = st.session_state.get("project")
@@ -3115,27 +2797,8 @@ def chat_tab():
             
             # Display messages in a chat-like interface
             if conversation:
-                chat_container = st.container()
-                with chat_container:
-                    for message in conversation[-15:]:  # Show last 15 messages
-                        is_control = message["sender"] == "control"
-                        alignment = "flex-end" if is_control else "flex-start"
-                        bg_color = "#e3f2fd" if is_control else "#f5f5f5"
-                        sender_icon = "🎯" if is_control else get_force_emoji(message["sender"])
-                        
-                        st.markdown(f"""
-                        <div style="display: flex; justify-content: {alignment}; margin: 10px 0;">
-                            <div style="background: {bg_color}; padding: 10px 15px; border-radius: 15px; 
-                                        max-width: 70%; border: 1px solid #ddd; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                                <div style="font-size: 0.8em; color: #666; margin-bottom: 5px;">
-                                    {sender_icon} {message["sender"].title()} - {message["timestamp"]}
-                                </div>
-                                <div style="color: #333;">
-                                    {message["message"]}
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                # Last 15 messages in one element
+                st.markdown(chat_html(conversation[-15:], "control"), unsafe_allow_html=True)
             else:
                 st.info(f"No messages yet with {selected_force.capitalize()}")
             
@@ -3166,19 +2829,12 @@ def chat_tab():
         all_messages.sort(key=lambda x: x["timestamp"], reverse=True)
         
         if all_messages:
-            for message in all_messages[:8]:  # Show last 8 queries
-                force_color = FORCE_COLORS.get(message["sender"], "#64748b")
-                st.markdown(f"""
-                <div style="background: {force_color}10; border-left: 4px solid {force_color}; 
-                            padding: 12px; margin: 10px 0; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                    <div style="font-weight: bold; color: {force_color}; font-size: 1.05em;">
-                        {get_force_emoji(message["sender"])} {message["sender"].capitalize()} - {message["timestamp"]}
-                    </div>
-                    <div style="margin-top: 6px; color: #333;">
-                        {message["message"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            # Last 8 queries in one element
+            st.markdown("".join(
+                f'<div class="chat-query" style="{tint_style(FORCE_COLORS.get(message["sender"], "#64748b"), "10")}">'
+                f'<div class="chat-meta">{get_force_emoji(message["sender"])} {message["sender"].capitalize()} - {message["timestamp"]}</div>'
+                f'<div class="chat-text">{message["message"]}</div></div>'
+                for message in all_messages[:8]), unsafe_allow_html=True)
         else:
             st.info("📭 No recent queries from forces")
     
@@ -3197,27 +2853,8 @@ def chat_tab():
         conversation = get_conversation(project, force, "control")
         
         if conversation:
-            chat_container = st.container()
-            with chat_container:
-                for message in conversation[-15:]:  # Show last 15 messages
-                    is_control = message["sender"] == "control"
-                    alignment = "flex-start" if is_control else "flex-end"
-                    bg_color = "#e3f2fd" if is_control else "#f5f5f5"
-                    sender_icon = "🎯" if is_control else get_force_emoji(force)
-                    
-                    st.markdown(f"""
-                    <div style="display: flex; justify-content: {alignment}; margin: 10px 0;">
-                        <div style="background: {bg_color}; padding: 10px 15px; border-radius: 15px; 
-                                    max-width: 80%; border: 1px solid #ddd; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                            <div style="font-size: 0.8em; color: #666; margin-bottom: 5px;">
-                                {sender_icon} {message["sender"].title()} - {message["timestamp"]}
-                            </div>
-                            <div style="color: #333;">
-                                {message["message"]}
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # Last 15 messages in one element
+            st.markdown(chat_html(conversation[-15:], force), unsafe_allow_html=True)
         else:
             st.info("📭 No messages yet with Control")
         
@@ -3246,6 +2883,7 @@ def get_force_emoji(force_name):
 
 def show_overview_dashboard(project, rag):
     """Show high-level overview of all forces"""
+    from ahp_theater import THEATER_MODES, get_theater_mode
 
     dp_tab, phase_tab, obj_tab, theater_tab = st.tabs(["🎯 DP Progress", "⏱️ Phase Progress", "🎖️ Objective Progress", "🏛️ Theater Progress"])
 
@@ -3259,21 +2897,18 @@ def show_overview_dashboard(project, rag):
         overall_dp_stats = {"total_items": 0, "red_count": 0, "amber_count": 0, "green_count": 0}
         
         for idx, side in enumerate(SIDES):
-            data = load_project(project, side)
-            progress = compute_progress(data)
+            table = get_force_rag_table(project, side)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate DP summary
-                dp_progress = list(progress["dp"].values()) if progress["dp"] else [0]
-                avg_progress = sum(dp_progress) / len(dp_progress) if dp_progress else 0
-                total_items = len(dp_progress)
-                
+                counts = rag_counts(table["dp"], rag)
+                avg_progress = counts["average"]
+                total_items = counts["total"]
+
                 # Count RAG status
-                red_count = sum(1 for v in dp_progress if v < rag["red"])
-                amber_count = sum(1 for v in dp_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in dp_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Update overall stats
                 overall_dp_stats["total_items"] += total_items
@@ -3282,13 +2917,7 @@ def show_overview_dashboard(project, rag):
                 overall_dp_stats["green_count"] += green_count
                 
                 # Force status card
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">Average DP Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "Average DP Progress"), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Status Breakdown:**")
@@ -3309,21 +2938,18 @@ def show_overview_dashboard(project, rag):
         overall_phase_stats = {"total_items": 0, "red_count": 0, "amber_count": 0, "green_count": 0}
         
         for idx, side in enumerate(SIDES):
-            data = load_project(project, side)
-            progress = compute_progress(data)
+            table = get_force_rag_table(project, side)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate Phase summary
-                phase_progress = list(progress["phase"].values()) if progress["phase"] else [0]
-                avg_progress = sum(phase_progress) / len(phase_progress) if phase_progress else 0
-                total_items = len(phase_progress)
-                
+                counts = rag_counts(table["phase"], rag)
+                avg_progress = counts["average"]
+                total_items = counts["total"]
+
                 # Count RAG status
-                red_count = sum(1 for v in phase_progress if v < rag["red"])
-                amber_count = sum(1 for v in phase_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in phase_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Update overall stats
                 overall_phase_stats["total_items"] += total_items
@@ -3332,13 +2958,7 @@ def show_overview_dashboard(project, rag):
                 overall_phase_stats["green_count"] += green_count
                 
                 # Force status card
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">Average Phase Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "Average Phase Progress"), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Status Breakdown:**")
@@ -3359,21 +2979,18 @@ def show_overview_dashboard(project, rag):
         overall_obj_stats = {"total_items": 0, "red_count": 0, "amber_count": 0, "green_count": 0}
         
         for idx, side in enumerate(SIDES):
-            data = load_project(project, side)
-            progress = compute_progress(data)
+            table = get_force_rag_table(project, side)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate Objective summary
-                obj_progress = list(progress["objective"].values()) if progress["objective"] else [0]
-                avg_progress = sum(obj_progress) / len(obj_progress) if obj_progress else 0
-                total_items = len(obj_progress)
-                
+                counts = rag_counts(table["objective"], rag)
+                avg_progress = counts["average"]
+                total_items = counts["total"]
+
                 # Count RAG status
-                red_count = sum(1 for v in obj_progress if v < rag["red"])
-                amber_count = sum(1 for v in obj_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in obj_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Update overall stats
                 overall_obj_stats["total_items"] += total_items
@@ -3382,13 +2999,7 @@ def show_overview_dashboard(project, rag):
                 overall_obj_stats["green_count"] += green_count
                 
                 # Force status card
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">Average Objective Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "Average Objective Progress"), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Status Breakdown:**")
@@ -3414,30 +3025,21 @@ def show_overview_dashboard(project, rag):
             if theater_config["theaters"]:
                 # Display theater status (same as Theater Command tab)
                 theater_names = list(theater_config["theaters"].keys())
+                theater_results = calculate_all_theater_progress(project, theater_config)
+                st.caption(f"Aggregation: {THEATER_MODES[get_theater_mode(theater_config)]}")
                 if theater_names:
                     cols = st.columns(len(theater_names))
                     for idx, (theater_name, theater_data) in enumerate(theater_config["theaters"].items()):
                         with cols[idx]:
-                            # Calculate theater progress
-                            theater_progress = calculate_theater_progress(project, theater_data["forces"])
+                            theater_progress = theater_results[theater_name]["progress"]
                             
                             # Progress color coding
                             progress_color = "#ef4444" if theater_progress < 30 else "#f59e0b" if theater_progress < 70 else "#10b981"
                             
-                            st.markdown(f"""
-                            <div style="background:linear-gradient(135deg, {progress_color}15, {progress_color}05); 
-                                        border:1px solid {progress_color}40; border-radius:12px; padding:1rem; margin-bottom:1rem;">
-                                <h4 style="color:{progress_color}; margin:0; text-align:center; font-weight:600;">🏛️ {theater_name}</h4>
-                                <div style="text-align:center; margin:0.5rem 0;">
-                                    <span style="font-size:2rem; font-weight:bold; color:{progress_color};">{theater_progress:.1f}%</span><br>
-                                    <span style="color:#666; font-size:0.9rem;">Average Progress</span>
-                                </div>
-                                <div style="color:#666; font-size:0.85rem; text-align:center;">
-                                    Forces: {len(theater_data["forces"])}<br>
-                                    {", ".join([f.capitalize() for f in theater_data["forces"]])}
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
+                            st.markdown(f"""<div class="theater-card" style="{tint_style(progress_color, "15")}">
+<h4>🏛️ {theater_name}</h4><span class="value">{theater_progress:.1f}%</span><span class="caption">Average Progress</span>
+<div class="forces">Forces: {len(theater_data["forces"])}<br>{", ".join([f.capitalize() for f in theater_data["forces"]])}</div>
+</div>""", unsafe_allow_html=True)
             else:
                 st.info("ℹ️ No theaters configured yet. Go to Theater Command tab to create theaters.")
                 
@@ -3448,12 +3050,8 @@ def show_overview_dashboard(project, rag):
                 for idx, force in enumerate(theater_config["unassigned_forces"]):
                     with unassigned_cols[idx]:
                         color = FORCE_COLORS.get(force, "#64748b")
-                        st.markdown(f"""
-                        <div style="background:{color}20; border:1px solid {color}60; 
-                                    border-radius:8px; padding:0.5rem; text-align:center; color:{color};">
-                            <strong>{force.capitalize()}</strong>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        st.markdown(f'<div class="force-chip" style="{tint_style(color, border="60")}"><strong>{force.capitalize()}</strong></div>',
+                                    unsafe_allow_html=True)
 
 
                 
@@ -3473,7 +3071,7 @@ def show_force_monitoring_dashboard(project, rag):
     st.markdown("*Monitor progress assessments as reported by individual forces (independent tracking)*")
     
     # Create tabs for different progress types
-    dp_tab, phase_tab, obj_tab = st.tabs([" DP Progress (Forces)", " Phase Progress (Forces)", " Objective Progress (Forces)"])
+    dp_tab, phase_tab, obj_tab, divergence_tab = st.tabs([" DP Progress (Forces)", " Phase Progress (Forces)", " Objective Progress (Forces)", "🔀 Divergence"])
     
     # DP Progress Tab - Force Independent View
     with dp_tab:
@@ -3484,33 +3082,21 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 4))  # Max 4 columns
         
         for idx, side in enumerate(SIDES):
-            # Load independent force data (what forces are reporting)
-            independent_data = load_independent_project(project, side)
-            if not independent_data:
-                independent_data = load_project(project, side)  # Fallback to base data
-            
-            progress = compute_progress(independent_data)
+            # Independent force data (what forces are reporting)
+            table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate DP summary from force's independent assessment
-                dp_progress = list(progress["dp"].values()) if progress["dp"] else [0]
-                avg_progress = sum(dp_progress) / len(dp_progress) if dp_progress else 0
-                
+                counts = rag_counts(table["dp"], rag)
+                avg_progress = counts["average"]
+
                 # Count RAG status
-                red_count = sum(1 for v in dp_progress if v < rag["red"])
-                amber_count = sum(1 for v in dp_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in dp_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Force status card with indicator of independent assessment
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px; border: 2px solid #fbbf24;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">DP Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "DP Progress", independent=True), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Force''s Assessment:**")
@@ -3529,28 +3115,14 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 2))  # Max 2 columns for better comparison view
         
         for idx, side in enumerate(SIDES):
-            # Load Control's master data
-            control_data = load_project(project, side)
-            control_progress = compute_progress(control_data)
-            
-            # Load Force's independent assessment
-            force_data = load_independent_project(project, side)
-            if not force_data:
-                force_data = load_project(project, side)
-            force_progress = compute_progress(force_data)
+            # Control's master data and the force's independent assessment
+            control_table = get_force_rag_table(project, side)
+            force_table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
-                # Calculate Control's DP average
-                if control_progress.get("dp"):
-                    control_dp_avg = sum(control_progress["dp"].values()) / len(control_progress["dp"].values())
-                else:
-                    control_dp_avg = 0
-                
-                # Calculate Force's DP average
-                if force_progress.get("dp"):
-                    force_dp_avg = sum(force_progress["dp"].values()) / len(force_progress["dp"].values())
-                else:
-                    force_dp_avg = 0
+                # Control's and the force's DP averages
+                control_dp_avg = level_average(control_table, "dp")
+                force_dp_avg = level_average(force_table, "dp")
                 
                 # Comparison indicator
                 diff = force_dp_avg - control_dp_avg
@@ -3564,14 +3136,7 @@ def show_force_monitoring_dashboard(project, rag):
                     status_color = "#ef4444"
                     status_text = "📉 Force Lower"
                 
-                st.markdown(f"""
-                <div style="background: {status_color}20; border: 1px solid {status_color}40; border-radius: 8px; padding: 12px; margin-bottom: 10px;">
-                    <h5 style="margin: 0; color: {status_color};">{get_force_emoji(side)} {side.capitalize()}</h5>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Control View: {control_dp_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Force Assessment: {force_dp_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-weight: bold; color: {status_color};">{status_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(status_card_html(side, status_color, control_dp_avg, force_dp_avg, status_text), unsafe_allow_html=True)
     
     # Phase Progress Tab - Force Independent View
     with phase_tab:
@@ -3582,33 +3147,21 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 4))  # Max 4 columns
         
         for idx, side in enumerate(SIDES):
-            # Load independent force data (what forces are reporting)
-            independent_data = load_independent_project(project, side)
-            if not independent_data:
-                independent_data = load_project(project, side)  # Fallback to base data
-            
-            progress = compute_progress(independent_data)
+            # Independent force data (what forces are reporting)
+            table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate Phase summary from force's independent assessment
-                phase_progress = list(progress["phase"].values()) if progress["phase"] else [0]
-                avg_progress = sum(phase_progress) / len(phase_progress) if phase_progress else 0
-                
+                counts = rag_counts(table["phase"], rag)
+                avg_progress = counts["average"]
+
                 # Count RAG status
-                red_count = sum(1 for v in phase_progress if v < rag["red"])
-                amber_count = sum(1 for v in phase_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in phase_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Force status card with indicator of independent assessment
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px; border: 2px solid #fbbf24;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">Phase Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "Phase Progress", independent=True), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Force's Assessment:**")
@@ -3627,28 +3180,14 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 2))  # Max 2 columns for better comparison view
         
         for idx, side in enumerate(SIDES):
-            # Load Control's master data
-            control_data = load_project(project, side)
-            control_progress = compute_progress(control_data)
-            
-            # Load Force's independent assessment
-            force_data = load_independent_project(project, side)
-            if not force_data:
-                force_data = load_project(project, side)
-            force_progress = compute_progress(force_data)
+            # Control's master data and the force's independent assessment
+            control_table = get_force_rag_table(project, side)
+            force_table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
-                # Calculate Control's Phase average
-                if control_progress.get("phase"):
-                    control_phase_avg = sum(control_progress["phase"].values()) / len(control_progress["phase"].values())
-                else:
-                    control_phase_avg = 0
-                
-                # Calculate Force's Phase average
-                if force_progress.get("phase"):
-                    force_phase_avg = sum(force_progress["phase"].values()) / len(force_progress["phase"].values())
-                else:
-                    force_phase_avg = 0
+                # Control's and the force's Phase averages
+                control_phase_avg = level_average(control_table, "phase")
+                force_phase_avg = level_average(force_table, "phase")
                 
                 # Comparison indicator
                 diff = force_phase_avg - control_phase_avg
@@ -3662,14 +3201,7 @@ def show_force_monitoring_dashboard(project, rag):
                     status_color = "#ef4444"
                     status_text = "📉 Force Lower"
                 
-                st.markdown(f"""
-                <div style="background: {status_color}20; border: 1px solid {status_color}40; border-radius: 8px; padding: 12px; margin-bottom: 10px;">
-                    <h5 style="margin: 0; color: {status_color};">{get_force_emoji(side)} {side.capitalize()}</h5>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Control View: {control_phase_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Force Assessment: {force_phase_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-weight: bold; color: {status_color};">{status_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(status_card_html(side, status_color, control_phase_avg, force_phase_avg, status_text), unsafe_allow_html=True)
     
     # Objective Progress Tab - Force Independent View
     with obj_tab:
@@ -3680,33 +3212,21 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 4))  # Max 4 columns
         
         for idx, side in enumerate(SIDES):
-            # Load independent force data (what forces are reporting)
-            independent_data = load_independent_project(project, side)
-            if not independent_data:
-                independent_data = load_project(project, side)  # Fallback to base data
-            
-            progress = compute_progress(independent_data)
+            # Independent force data (what forces are reporting)
+            table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
                 # Calculate Objective summary from force's independent assessment
-                obj_progress = list(progress["objective"].values()) if progress["objective"] else [0]
-                avg_progress = sum(obj_progress) / len(obj_progress) if obj_progress else 0
-                
+                counts = rag_counts(table["objective"], rag)
+                avg_progress = counts["average"]
+
                 # Count RAG status
-                red_count = sum(1 for v in obj_progress if v < rag["red"])
-                amber_count = sum(1 for v in obj_progress if rag["red"] <= v < rag["amber"])
-                green_count = sum(1 for v in obj_progress if v >= rag["amber"])
+                red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
                 
                 # Force status card with indicator of independent assessment
-                st.markdown(f"""
-                <div style="background: {color}; color: white; padding: 16px; border-radius: 10px; margin-bottom: 10px; border: 2px solid #fbbf24;">
-                    <h4 style="margin: 0; color: white;">{get_force_emoji(side)} {side.capitalize()}</h4>
-                    <h2 style="margin: 5px 0; color: white;">{avg_progress:.1f}%</h2>
-                    <p style="margin: 0; color: white; opacity: 0.9;">Objective Progress</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(force_card_html(side, color, avg_progress, "Objective Progress", independent=True), unsafe_allow_html=True)
                 
                 # RAG status breakdown
                 st.markdown("**Force's Assessment:**")
@@ -3726,30 +3246,16 @@ def show_force_monitoring_dashboard(project, rag):
         cols = st.columns(min(len(SIDES), 2))  # Max 2 columns for better comparison view
         
         for idx, side in enumerate(SIDES):
-            # Load Control's master data
-            control_data = load_project(project, side)
-            control_progress = compute_progress(control_data)
-            
-            # Load Force's independent assessment
-            force_data = load_independent_project(project, side)
-            if not force_data:
-                force_data = load_project(project, side)  # Fallback to base data
-            force_progress = compute_progress(force_data)
+            # Control's master data and the force's independent assessment
+            control_table = get_force_rag_table(project, side)
+            force_table = get_force_rag_table(project, side, independent=True)
             
             with cols[idx % len(cols)]:
                 color = FORCE_COLORS.get(side, "#8b5cf6")
                 
-                # Calculate Control's objective average
-                if control_progress.get("objective"):
-                    control_obj_avg = sum(control_progress["objective"].values()) / len(control_progress["objective"].values()) if control_progress.get("objective") else 0
-                else:
-                    control_obj_avg = 0
-                
-                # Calculate Force's objective average
-                if force_progress.get("objective"):
-                    force_obj_avg = sum(force_progress["objective"].values()) / len(force_progress["objective"].values()) if force_progress.get("objective") else 0
-                else:
-                    force_obj_avg = 0
+                # Control's and the force's objective averages
+                control_obj_avg = level_average(control_table, "objective")
+                force_obj_avg = level_average(force_table, "objective")
                 
                 # Comparison indicator
                 diff = force_obj_avg - control_obj_avg
@@ -3763,14 +3269,55 @@ def show_force_monitoring_dashboard(project, rag):
                     status_color = "#ef4444"
                     status_text = "📉 Force Lower"
                 
-                st.markdown(f"""
-                <div style="background: {status_color}20; border: 1px solid {status_color}40; border-radius: 8px; padding: 12px; margin-bottom: 10px;">
-                    <h5 style="margin: 0; color: {status_color};">{get_force_emoji(side)} {side.capitalize()}</h5>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Control View: {control_obj_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-size: 0.9rem;">Force Assessment: {force_obj_avg:.1f}%</p>
-                    <p style="margin: 2px 0; font-weight: bold; color: {status_color};">{status_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(status_card_html(side, status_color, control_obj_avg, force_obj_avg, status_text), unsafe_allow_html=True)
+
+    with divergence_tab:
+        show_divergence_analysis(project)
+
+def show_divergence_analysis(project):
+    """Rank the largest Control-vs-Force disagreements across all forces"""
+    import pandas as pd
+    from ahp_divergence import divergence_report
+    st.subheader("🔀 Control vs Force Divergence")
+    st.markdown("*Every task aligned by ID across Control's data and each force's independent assessment (force minus Control)*")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        level = st.selectbox("Level", ["dp", "task", "objective"],
+                             format_func=lambda k: {"task": "Tasks", "dp": "Decisive Points", "objective": "Objectives"}[k],
+                             key="divergence_level")
+    with col2:
+        top = st.number_input("Show top", min_value=5, max_value=200, value=20, step=5, key="divergence_top")
+    with col3:
+        threshold = st.number_input("Ignore differences up to (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.5, key="divergence_threshold")
+    
+    try:
+        report = divergence_report(project, SIDES, top=int(top), threshold=threshold)
+    except Exception as e:
+        st.error(f"Error computing divergence: {str(e)}")
+        return
+    
+    display_force_table(pd.DataFrame([{
+        "Force": f"{get_force_emoji(force)} {force.capitalize()}",
+        "Tasks Reported": f"{summary['reported']}/{summary['tasks']}",
+        "Mean |Δ| Task": f"{summary['mean_abs_task_delta']:.1f}",
+        "Mean |Δ| DP": f"{summary['mean_abs_dp_delta']:.1f}",
+        "Objective Δ": f"{summary['objective_delta']:+.1f}"
+    } for force, summary in report["forces"].items()]), key="divergence_forces")
+    
+    rows = report["ranked"][level]
+    if not rows:
+        st.success("✅ Control and forces are aligned at this level.")
+        return
+    st.markdown("**⚠️ Largest Disagreements**")
+    display_force_table(pd.DataFrame([{
+        "Force": row["force"].capitalize(),
+        "Item": row["item"],
+        "Control %": f"{row['control']:.1f}",
+        "Force %": f"{row['force_value']:.1f}",
+        "Δ": f"{row['delta']:+.1f}",
+        "Status": "📈 Force Higher" if row["delta"] > 0 else "📉 Force Lower"
+    } for row in rows]), key="divergence_items")
 
 def show_force_dashboard(side, project, rag, independent=False):
     """Show detailed dashboard for a specific force"""
@@ -3780,12 +3327,13 @@ def show_force_dashboard(side, project, rag, independent=False):
     else:
         st.subheader(f"{get_force_emoji(side)} {side.capitalize()} Force - Detailed Analysis")
     
-    # Load data using appropriate method based on mode
+    # Load data using appropriate method based on mode; progress comes from the cached RAG table
     if independent:
         data = load_independent_project(project, side)
     else:
         data = load_project(project, side)
-    progress = compute_progress(data)
+    rag_table = get_force_rag_table(project, side, independent)
+    progress = rag_table["progress"]
     
     if not any([progress.get("dp"), progress.get("objective"), progress.get("phase")]):
         if independent:
@@ -3801,80 +3349,270 @@ def show_force_dashboard(side, project, rag, independent=False):
         return
     
     # Create sub-tabs for different chart types
-    chart_tab1, chart_tab2, chart_tab3, chart_tab4 = st.tabs(["🎯 Decisive Points", "🎖️ Objectives", "⏱️ Phases", "📋 Summary"])
+    chart_tab1, chart_tab2, chart_tab3, chart_tab4, chart_tab5, chart_tab6 = st.tabs(["🎯 Decisive Points", "🎖️ Objectives", "⏱️ Phases", "📋 Summary", "🎲 Sensitivity", "🔮 What-If"])
     
+    # Charts are reused until the force's data changes
+    data_version = get_data_version_for(project, side, independent)
+    version = (project, independent, data_version)
     with chart_tab1:
-        show_dp_analysis(progress, data, rag, side)
+        show_dp_analysis(progress, data, rag, side, version, rag_table)
     
     with chart_tab2:
-        show_objective_analysis(progress, side)
+        show_objective_analysis(progress, side, version, rag_table)
     
     with chart_tab3:
-        show_phase_analysis(progress, side)
+        show_phase_analysis(progress, side, version, rag_table)
     
     with chart_tab4:
         show_force_summary(progress, data, side)
+    
+    with chart_tab5:
+        show_sensitivity_analysis(data, side, project, independent, data_version)
+    
+    with chart_tab6:
+        show_whatif_projection(data, side, project, rag, independent, data_version)
 
-def show_dp_analysis(progress, data, rag, side):
-    """Show DP analysis charts"""
-    if not progress.get("dp"):
-        st.info("No Decisive Points configured for this force.")
+def get_analysis_result(key, version):
+    """A stored analysis result, dropped once the data it was run on has changed"""
+    result = st.session_state.get(key)
+    if result and result.get("version") != version:
+        del st.session_state[key]
+        return None
+    return result
+
+def show_whatif_projection(data, side, project, rag, independent=False, version=None):
+    """Project where DPs, objectives and phases land if tasks reach given targets"""
+    import pandas as pd
+    import plotly.graph_objects as go
+    from ahp_scenario import project_scenario
+    st.markdown("### 🔮 What-If Progress Projection")
+    st.caption("Set a target or a low / likely / high range for any task. Tasks left unchanged stay at their current progress.")
+    
+    tasks = data.get("tasks", [])
+    if not tasks:
+        st.info("No tasks configured for this force.")
         return
     
-    # Sort DP data numerically by DP number for display
-    dp_items = list(progress["dp"].items())
-    dp_items.sort(key=lambda x: int(x[0]) if str(x[0]).isdigit() else float('inf'))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        horizon = st.text_input("Projection horizon", value="H+24", key=f"whatif_horizon_{side}")
+    with col2:
+        draws = st.select_slider("Monte Carlo draws", options=[1000, 5000, 10000, 20000, 50000], value=10000, key=f"whatif_draws_{side}")
+    with col3:
+        level = st.selectbox("Level", ["objective", "phase", "dp"],
+                             format_func=lambda k: {"dp": "Decisive Points", "objective": "Objectives", "phase": "Phases"}[k],
+                             key=f"whatif_level_{side}")
+    
+    # Control and independent runs are kept apart and dropped when the data changes
+    mode = "independent" if independent else "control"
+    result_key = f"whatif_{project}_{side}_{mode}"
+    current = [parse_numeric(t.get("Achieved %", 0)) for t in tasks]
+    editor_df = pd.DataFrame({
+        "Task No": [str(t.get("Task No", i + 1)) for i, t in enumerate(tasks)],
+        "DP No": [str(t.get("DP No", "")) for t in tasks],
+        "Task": [t.get("description") or t.get("Name") or "" for t in tasks],
+        "Current %": current,
+        "Low %": current,
+        "Likely %": current,
+        "High %": current
+    })
+    edited = st.data_editor(
+        editor_df,
+        disabled=["Task No", "DP No", "Task", "Current %"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"whatif_editor_{project}_{side}_{mode}"
+    )
     
-    dp_numbers = [item[0] for item in dp_items]
-    dp_vals = [item[1] for item in dp_items]
+    if st.button("🔮 Run Projection", key=f"whatif_run_{side}", type="primary"):
+        targets = {}
+        for i, row in enumerate(edited.itertuples(index=False)):
+            low, likely, high = (parse_numeric(v, current[i]) for v in (row[4], row[5], row[6]))
+            if (low, likely, high) != (current[i], current[i], current[i]):
+                targets[i] = (low, likely, high)
+        try:
+            with st.spinner("Running projection..."):
+                st.session_state[result_key] = {
+                    "version": version,
+                    "horizon": horizon,
+                    "targets": len(targets),
+                    "result": project_scenario(data, targets, draws=draws, rag=rag)
+                }
+        except ValueError as e:
+            st.error(f"❌ {e}")
+    
+    run = get_analysis_result(result_key, version)
+    if not run:
+        return
     
-    # Get DP names from the data and create clean labels
-    dps_data = data.get("dps", [])
-    dp_labels = []
-    for dp_no in dp_numbers:
-        dp_name = "Unknown DP"
-        for dp in dps_data:
-            if str(dp.get("DP No", "") or dp.get("dp_no", "")) == str(dp_no):
-                dp_name = dp.get("Name", f"DP {dp_no}")
-                break
-        clean_name = dp_name[:40] + "..." if len(dp_name) > 40 else dp_name
-        dp_labels.append(f"DP {dp_no}: {clean_name}")
-    
-    # Enhanced RAG coloring
-    rag_colors = []
-    for v in dp_vals:
-        if v < rag["red"]:
-            rag_colors.append("#dc2626")  # Red
-        elif v < rag["amber"]:
-            rag_colors.append("#f59e0b")  # Amber
-        else:
-            rag_colors.append("#16a34a")  # Green
-    
-    fig = go.Figure([go.Bar(
-        y=dp_labels, 
-        x=dp_vals, 
-        orientation='h',
-        marker_color=rag_colors,
-        text=[f"{v:.1f}%" for v in dp_vals],
-        textposition='inside',
-        textfont=dict(color='white', size=11, family='Arial Black')
-    )])
+    result = run["result"]
+    stats = result["levels"][level]
+    st.caption(f"Projection at {run['horizon']}: {run['targets']} task target(s), {result['draws']:,} draws, "
+               f"🔴 <{result['rag']['red']}% | 🟡 <{result['rag']['amber']}% | 🟢 ≥{result['rag']['amber']}%")
+    if not stats["labels"]:
+        st.info("Nothing to project at this level.")
+        return
+    
+    names = [f"DP {l}: {n}" if level == "dp" else str(n) for l, n in zip(stats["labels"], stats["names"])]
+    display_force_table(pd.DataFrame({
+        "Name": names,
+        "Current %": [f"{v:.1f}" for v in stats["current"]],
+        "P5 %": [f"{v:.1f}" for v in stats["p5"]],
+        "Median %": [f"{v:.1f}" for v in stats["p50"]],
+        "P95 %": [f"{v:.1f}" for v in stats["p95"]],
+        "🔴 Red": [f"{v*100:.0f}%" for v in stats["prob_red"]],
+        "🟡 Amber": [f"{v*100:.0f}%" for v in stats["prob_amber"]],
+        "🟢 Green": [f"{v*100:.0f}%" for v in stats["prob_green"]]
+    }), force_type=side, key=f"whatif_{side}")
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=names, x=[h - l for l, h in zip(stats["p5"], stats["p95"])], base=stats["p5"],
+                         orientation='h', name="P5-P95", marker_color="rgba(59, 130, 246, 0.35)"))
+    fig.add_trace(go.Bar(y=names, x=[h - l for l, h in zip(stats["p25"], stats["p75"])], base=stats["p25"],
+                         orientation='h', name="P25-P75", marker_color="rgba(59, 130, 246, 0.8)"))
+    fig.add_trace(go.Scatter(y=names, x=stats["p50"], mode="markers", name="Median",
+                             marker=dict(color="white", size=10, line=dict(color="black", width=1))))
+    fig.add_trace(go.Scatter(y=names, x=stats["current"], mode="markers", name="Current",
+                             marker=dict(color="#fbbf24", size=10, symbol="diamond")))
+    fig.add_vline(x=rag["red"], line_dash="dot", line_color="#dc2626")
+    fig.add_vline(x=rag["amber"], line_dash="dot", line_color="#16a34a")
     fig.update_layout(
-        title=f"DP Progress - RAG Status (🔴 <{rag['red']}% | 🟡 <{rag['amber']}% | 🟢 ≥{rag['amber']}%)", 
-        xaxis_title="Progress (%)", 
-        yaxis_title="Decisive Points",
-        height=max(400, len(dp_labels) * 50),
-        margin=dict(l=200, r=50, t=70, b=50),
-        yaxis=dict(automargin=True),
-        font=dict(size=11)
+        barmode='overlay',
+        title=f"Projected progress bands at {run['horizon']}",
+        xaxis=dict(title="Progress (%)", range=[0, 100]),
+        height=max(350, len(names) * 45),
+        margin=dict(l=200, r=50, t=60, b=50),
+        yaxis=dict(automargin=True)
     )
+    st.plotly_chart(fig, use_container_width=True, key=f"whatif_chart_{side}")
+
+def show_sensitivity_analysis(data, side, project, independent=False, version=None):
+    """Show how robust the weighted rollups and rankings are to KO weight changes"""
+    import pandas as pd
+    import plotly.graph_objects as go
+    from ahp_sensitivity import PERTURB_OPTIONS, weight_sensitivity, weight_tornado
+    st.markdown("### 🎲 Weight Sensitivity Analysis")
+    st.caption("Perturbs the stored DP and task weights and re-runs the weighted rollup to show how stable progress figures and rankings are.")
+    
+    if not data.get("dps") or not data.get("tasks"):
+        st.info("Sensitivity analysis needs DPs and tasks with weights.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        perturb = st.selectbox("Perturb", list(PERTURB_OPTIONS.keys()),
+                               format_func=lambda k: PERTURB_OPTIONS[k], key=f"sens_perturb_{side}")
+    with col2:
+        spread = st.slider("Weight spread (±%)", 5, 75, 25, step=5, key=f"sens_spread_{side}")
+    with col3:
+        draws = st.select_slider("Monte Carlo draws", options=[200, 500, 1000, 2000, 5000], value=1000, key=f"sens_draws_{side}")
+    with col4:
+        level = st.selectbox("Level", ["objective", "dp", "phase"],
+                             format_func=lambda k: {"dp": "Decisive Points", "objective": "Objectives", "phase": "Phases"}[k],
+                             key=f"sens_level_{side}")
+    
+    # Control and independent runs are kept apart and dropped when the data changes
+    result_key = f"sensitivity_{project}_{side}_{'independent' if independent else 'control'}"
+    if st.button("▶️ Run Sensitivity Analysis", key=f"sens_run_{side}", type="primary"):
+        with st.spinner("Running Monte Carlo draws..."):
+            st.session_state[result_key] = {
+                "version": version,
+                "mc": weight_sensitivity(data, draws=draws, spread=spread / 100, perturb=perturb),
+                "tornado": weight_tornado(data, delta=spread / 100, perturb=perturb)
+            }
+    
+    result = get_analysis_result(result_key, version)
+    if not result:
+        st.info("Choose the settings above and click **Run Sensitivity Analysis**.")
+        return
+    
+    mc = result["mc"]
+    st.caption(f"Last run: {mc['draws']} draws, ±{mc['spread']*100:.0f}% on {PERTURB_OPTIONS[mc['perturb']].lower()}")
+    stats = mc["levels"][level]
+    if not stats["names"]:
+        st.info("Nothing to analyse at this level.")
+        return
+    
+    df = pd.DataFrame({
+        "Name": [str(n) for n in stats["names"]],
+        "Rank": stats["base_rank"],
+        "Weighted %": [f"{v:.1f}" for v in stats["baseline"]],
+        "P5 %": [f"{v:.1f}" for v in stats["p5"]],
+        "Median %": [f"{v:.1f}" for v in stats["p50"]],
+        "P95 %": [f"{v:.1f}" for v in stats["p95"]],
+        "Rank Change Prob.": [f"{v*100:.1f}%" for v in stats["rank_change"]]
+    }).sort_values("Rank")
+    st.markdown("**📊 Progress Bands and Rank Stability**")
+    display_force_table(df, force_type=side, key=f"sensitivity_bands_{side}")
+    
+    reversals = sorted(stats["reversals"], key=lambda r: r["probability"], reverse=True)[:10]
+    if reversals:
+        st.markdown("**🔀 Most Likely Rank Reversals**")
+        display_force_table(pd.DataFrame([{
+            "Currently Ahead": str(r["higher"]),
+            "Currently Behind": str(r["lower"]),
+            "Reversal Probability": f"{r['probability']*100:.1f}%"
+        } for r in reversals]), force_type=side, key=f"sensitivity_reversals_{side}")
+    
+    tornado = result["tornado"]
+    if tornado["bars"]:
+        st.markdown("**🌪️ Tornado - Overall Progress Swing per Weight**")
+        bars = list(reversed(tornado["bars"]))
+        labels = [b["label"][:50] for b in bars]
+        baseline = tornado["baseline"]
+        fig = go.Figure()
+        fig.add_trace(go.Bar(y=labels, x=[b["low"] - baseline for b in bars], base=baseline, orientation='h',
+                             name=f"Weight -{tornado['delta']*100:.0f}%", marker_color="#dc2626"))
+        fig.add_trace(go.Bar(y=labels, x=[b["high"] - baseline for b in bars], base=baseline, orientation='h',
+                             name=f"Weight +{tornado['delta']*100:.0f}%", marker_color="#16a34a"))
+        fig.update_layout(
+            barmode='overlay',
+            title=f"Overall progress {baseline:.1f}% - sensitivity to individual weights",
+            xaxis_title="Overall Progress (%)",
+            height=max(350, len(bars) * 35),
+            margin=dict(l=250, r=50, t=60, b=50),
+            yaxis=dict(automargin=True)
+        )
+        st.plotly_chart(fig, use_container_width=True, key=f"tornado_chart_{side}")
+
+def show_dp_analysis(progress, data, rag, side, version=None, rag_table=None):
+    """Show DP analysis charts; pass the data version to reuse the figure across reruns"""
+    from ahp_charts import cached_figure, progress_bar_figure
+    if not progress.get("dp"):
+        st.info("No Decisive Points configured for this force.")
+        return
+    
+    # DPs in DP number order, sorted once per data version in the RAG table
+    rag_table = rag_table or build_rag_table(progress)
+    dp_items = rag_table["dp"]["items"]
+    dp_vals = [item[1] for item in dp_items]
+    
+    def build():
+        # DP names from the data as clean labels
+        dp_names = {}
+        for dp in data.get("dps", []):
+            dp_names.setdefault(str(dp.get("DP No", "") or dp.get("dp_no", "")), dp.get("Name"))
+        dp_labels = []
+        for dp_no, _ in dp_items:
+            dp_name = dp_names.get(str(dp_no)) or (f"DP {dp_no}" if str(dp_no) in dp_names else "Unknown DP")
+            clean_name = dp_name[:40] + "..." if len(dp_name) > 40 else dp_name
+            dp_labels.append(f"DP {dp_no}: {clean_name}")
+        return progress_bar_figure(
+            dp_labels, dp_vals, rag=rag,
+            title=f"DP Progress - RAG Status (🔴 <{rag['red']}% | 🟡 <{rag['amber']}% | 🟢 ≥{rag['amber']}%)",
+            axis_title="Decisive Points", row_height=50, min_height=400,
+            margin=dict(l=200, r=50, t=70, b=50))
+    
+    if version is None:
+        fig = build()
+    else:
+        fig = cached_figure(("dp", side, version, rag["red"], rag["amber"]), build)
     st.plotly_chart(fig, use_container_width=True, key=f"dp_chart_{side}")
     
     # DP Status Summary
-    red_count = sum(1 for v in dp_vals if v < rag["red"])
-    amber_count = sum(1 for v in dp_vals if rag["red"] <= v < rag["amber"])
-    green_count = sum(1 for v in dp_vals if v >= rag["amber"])
-    avg_dp_progress = sum(dp_vals) / len(dp_vals) if dp_vals else 0
+    counts = rag_counts(rag_table["dp"], rag)
+    red_count, amber_count, green_count = counts["red"], counts["amber"], counts["green"]
+    avg_dp_progress = counts["average"]
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -3886,80 +3624,56 @@ def show_dp_analysis(progress, data, rag, side):
     with col4:
         st.metric("📊 Average DP Progress", f"{avg_dp_progress:.1f}%")
 
-def show_objective_analysis(progress, side):
+def show_objective_analysis(progress, side, version=None, rag_table=None):
     """Show objective analysis charts"""
+    from ahp_charts import cached_figure, progress_bar_figure
     if not progress.get("objective"):
         st.info("No Objectives configured for this force.")
         return
         
-    # Sort objectives numerically by objective name/number for display
-    obj_items = list(progress["objective"].items())
-    obj_items.sort(key=lambda x: get_numeric_sort_key({"Objective No": x[0]}, "Objective No"))
+    # Objectives in natural name order, sorted once per data version in the RAG table
+    obj_items = (rag_table or build_rag_table(progress))["objective"]["items"]
     
     obj_names = [item[0] for item in obj_items]
     obj_vals = [item[1] for item in obj_items]
     
-    # Colorful bars for objectives
-    obj_colors = ["#3b82f6", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4", "#84cc16", "#f97316", "#ec4899", "#6366f1"]
-    obj_colors = [obj_colors[i % len(obj_colors)] for i in range(len(obj_vals))]
-    
-    fig2 = go.Figure([go.Bar(
-        y=obj_names, 
-        x=obj_vals, 
-        orientation='h',
-        marker_color=obj_colors,
-        text=[f"{v:.1f}%" for v in obj_vals],
-        textposition='inside',
-        textfont=dict(color='white', size=11, family='Arial Black')
-    )])
-    fig2.update_layout(
-        title="Objective Progress Analysis",
-        xaxis_title="Progress (%)",
-        yaxis_title="Objectives",
-        height=max(350, len(obj_names) * 60),
-        margin=dict(l=150, r=50, t=50, b=50)
-    )
+    def build():
+        # Colorful bars for objectives
+        obj_colors = ["#3b82f6", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4", "#84cc16", "#f97316", "#ec4899", "#6366f1"]
+        return progress_bar_figure(
+            obj_names, obj_vals, colors=[obj_colors[i % len(obj_colors)] for i in range(len(obj_vals))],
+            title="Objective Progress Analysis", axis_title="Objectives", row_height=60, min_height=350,
+            margin=dict(l=150, r=50, t=50, b=50))
+    
+    fig2 = build() if version is None else cached_figure(("objective", side, version), build)
     st.plotly_chart(fig2, use_container_width=True, key=f"obj_chart_{side}")
     
     # Objective metrics
     avg_obj_progress = sum(obj_vals) / len(obj_vals) if obj_vals else 0
     st.metric("Average Objective Progress", f"{avg_obj_progress:.1f}%")
 
-def show_phase_analysis(progress, side):
+def show_phase_analysis(progress, side, version=None, rag_table=None):
     """Show phase analysis charts"""
+    from ahp_charts import cached_figure, progress_bar_figure
     if not progress.get("phase"):
         st.info("No Phases configured for this force.")
         return
         
-    # Sort phases numerically by phase name/number for display
-    phase_items = list(progress["phase"].items())
-    phase_items.sort(key=lambda x: get_numeric_sort_key({"Phase No": x[0]}, "Phase No"))
+    # Phases in natural name order, sorted once per data version in the RAG table
+    phase_items = (rag_table or build_rag_table(progress))["phase"]["items"]
     
     phase_names = [item[0] for item in phase_items]
     phase_vals = [item[1] for item in phase_items]
     
-    # Colorful gradient bars for phases
-    phase_colors = ["#059669", "#7c3aed", "#dc2626", "#2563eb", "#d97706", "#0891b2", "#be185d", "#4338ca", "#65a30d", "#c2410c"]
-    phase_colors = [phase_colors[i % len(phase_colors)] for i in range(len(phase_vals))]
-    
-    fig3 = go.Figure([go.Bar(
-        y=phase_names, 
-        x=phase_vals, 
-        orientation='h',
-        marker_color=phase_colors,
-        text=[f"{v:.1f}%" for v in phase_vals],
-        textposition='inside',
-        textfont=dict(color='white', size=12, family='Arial Black')
-    )])
-    fig3.update_layout(
-        title="Phase Progress Timeline", 
-        xaxis_title="Progress (%)", 
-        yaxis_title="Phases",
-        height=max(300, len(phase_names) * 70),
-        margin=dict(l=120, r=50, t=50, b=50),
-        yaxis=dict(automargin=True),
-        font=dict(size=11)
-    )
+    def build():
+        # Colorful gradient bars for phases
+        phase_colors = ["#059669", "#7c3aed", "#dc2626", "#2563eb", "#d97706", "#0891b2", "#be185d", "#4338ca", "#65a30d", "#c2410c"]
+        return progress_bar_figure(
+            phase_names, phase_vals, colors=[phase_colors[i % len(phase_colors)] for i in range(len(phase_vals))],
+            title="Phase Progress Timeline", axis_title="Phases", row_height=70, min_height=300,
+            margin=dict(l=120, r=50, t=50, b=50), text_size=12)
+    
+    fig3 = build() if version is None else cached_figure(("phase", side, version), build)
     st.plotly_chart(fig3, use_container_width=True, key=f"phase_chart_{side}")
     
     # Phase metrics
@@ -4029,53 +3743,42 @@ def show_quick_progress_preview(project):
 
 def show_progress_comparison_chart(project, progress_type, title):
     """Show comparison chart for specific progress type across all forces"""
-    import plotly.graph_objects as go
+    from ahp_charts import cached_figure, progress_bar_figure
     
-    force_names = []
-    progress_values = []
-    colors = []
-    
-    for side in SIDES:
-        data = load_project(project, side)
-        progress = compute_progress(data)
+    def build():
+        force_names = []
+        progress_values = []
+        colors = []
         
-        if progress.get(progress_type):
-            # Calculate average progress for this force
-            values = list(progress[progress_type].values())
-            avg_progress = sum(values) / len(values) if values else 0
+        for side in SIDES:
+            progress = get_force_rag_table(project, side)["progress"]
             
-            force_names.append(f"{get_force_emoji(side)} {side.capitalize()}")
-            progress_values.append(avg_progress)
-            colors.append(FORCE_COLORS.get(side, "#8b5cf6"))
-        else:
-            force_names.append(f"{get_force_emoji(side)} {side.capitalize()}")
-            progress_values.append(0)
-            colors.append("#cccccc")  # Gray for no data
+            if progress.get(progress_type):
+                # Calculate average progress for this force
+                values = list(progress[progress_type].values())
+                avg_progress = sum(values) / len(values) if values else 0
+                
+                force_names.append(f"{get_force_emoji(side)} {side.capitalize()}")
+                progress_values.append(avg_progress)
+                colors.append(FORCE_COLORS.get(side, "#8b5cf6"))
+            else:
+                force_names.append(f"{get_force_emoji(side)} {side.capitalize()}")
+                progress_values.append(0)
+                colors.append("#cccccc")  # Gray for no data
+        
+        # Create horizontal bar chart
+        fig = progress_bar_figure(force_names, progress_values, colors=colors, title=f"Average {title} Progress",
+                                  row_height=60, min_height=200, margin=dict(l=120, r=30, t=50, b=30), text_size=9)
+        return fig, progress_values
+    
+    # Every force's data feeds the chart, so it is rebuilt when any of them changes
+    versions = tuple((side, get_data_version(project, side)) for side in SIDES)
+    fig, progress_values = cached_figure(("comparison", project, progress_type, versions), build)
     
     if not progress_values or all(v == 0 for v in progress_values):
         st.info(f"No {title.lower()} data available")
         return
     
-    # Create horizontal bar chart
-    fig = go.Figure([go.Bar(
-        y=force_names,
-        x=progress_values,
-        orientation='h',
-        marker_color=colors,
-        text=[f"{v:.1f}%" for v in progress_values],
-        textposition='inside',
-        textfont=dict(color='white', size=10, family='Arial Black')
-    )])
-    
-    fig.update_layout(
-        title=f"Average {title} Progress",
-        xaxis_title="Progress (%)",
-        height=max(200, len(force_names) * 60),
-        margin=dict(l=120, r=30, t=50, b=30),
-        font=dict(size=9),
-        showlegend=False
-    )
-    
     st.plotly_chart(fig, use_container_width=True, key=f"preview_{progress_type}")
     
     # Show summary statistics
@@ -4096,29 +3799,17 @@ def show_progress_comparison_chart(project, progress_type, title):
 
 def show_compact_progress_overview(project):
     """Show compact table view of all progress types for all forces"""
+    import pandas as pd
     
     # Collect data for all forces
     progress_data = []
     
     for side in SIDES:
-        data = load_project(project, side)
-        progress = compute_progress(data)
-        
-        # Calculate averages for each progress type
-        dp_avg = 0
-        if progress.get("dp"):
-            dp_values = list(progress["dp"].values())
-            dp_avg = sum(dp_values) / len(dp_values) if dp_values else 0
-        
-        phase_avg = 0
-        if progress.get("phase"):
-            phase_values = list(progress["phase"].values())
-            phase_avg = sum(phase_values) / len(phase_values) if phase_values else 0
-        
-        obj_avg = 0
-        if progress.get("objective"):
-            obj_values = list(progress["objective"].values())
-            obj_avg = sum(obj_values) / len(obj_values) if obj_values else 0
+        # Averages for each progress type
+        table = get_force_rag_table(project, side)
+        dp_avg = level_average(table, "dp")
+        phase_avg = level_average(table, "phase")
+        obj_avg = level_average(table, "objective")
         
         progress_data.append({
             "Force": f"{get_force_emoji(side)} {side.capitalize()}",
@@ -4150,7 +3841,7 @@ def show_compact_progress_overview(project):
     st.markdown("### 📊 All Forces Progress Summary")
     
     # Use our existing display_force_table function with control styling
-    display_force_table(summary_df, use_container_width=True, force_type="control")
+    display_force_table(summary_df, use_container_width=True, force_type="control", key="all_forces_summary")
     
     # Summary statistics below the table
     st.markdown("---")
@@ -4172,7 +3863,7 @@ def force_dashboard_tab():
     """Independent dashboard for individual forces to view their own progress"""
     role = st.session_state.get("role")
     project = st.session_state.get("project")
-    rag = st.session_state.get("rag", {"red": 40, "amber": 70})
+    rag = get_rag_thresholds(project)
     
     if role == "control":
         st.warning("⚠️ This is the Force Dashboard. Use the main Dashboard for control operations.")
@@ -4193,7 +3884,7 @@ def force_dashboard_tab():
     col1, col2 = st.columns([3, 1])
     with col2:
         if st.button("🔄 Reset Independent Data", help="Regenerate independent data from base structure"):
-            independent_file = f"{project}_{role}_independent.json"
+            independent_file = get_independent_path(project, role)
             if os.path.exists(independent_file):
                 os.remove(independent_file)
             st.success("Independent data reset. Please refresh the page.")
@@ -4227,6 +3918,7 @@ def force_progress_entry_tab():
 
 # --- Control Panel Tab ---
 def control_panel_tab():
+    import pandas as pd
     st.header("⚙️ Control Panel")
     st.markdown("*Centralized command and control interface for all force operations*")
     
@@ -4237,8 +3929,9 @@ def control_panel_tab():
         st.subheader("📊 RAG Threshold Configuration")
         st.markdown("*Set performance thresholds for Red-Amber-Green status indicators*")
         
+        project = st.session_state.get("project")
         col1, col2 = st.columns(2)
-        rag = st.session_state.get("rag", {"red": 40, "amber": 70})
+        rag = get_rag_thresholds(project)
         
         with col1:
             red = st.slider("🔴 Red Threshold (%)", 0, 100, int(rag["red"]), 
@@ -4247,7 +3940,13 @@ def control_panel_tab():
             amber = st.slider("🟡 Amber Threshold (%)", 0, 100, int(rag["amber"]), 
                              help="Below this percentage shows as AMBER status")
         
-        st.session_state["rag"] = {"red": red, "amber": amber}
+        # Saved per project; every session picks the change up on its next run
+        if project and (red, amber) != (rag["red"], rag["amber"]):
+            try:
+                set_rag_thresholds(project, red, amber)
+            except Exception as e:
+                st.error(f"Error saving RAG thresholds: {str(e)}")
+        st.caption(f"Thresholds apply to project **{project}** for all users." if project else "Select a project to save thresholds.")
         
         # Show current settings in a nice display
         st.markdown("**Current Thresholds:**")
@@ -4265,34 +3964,39 @@ def control_panel_tab():
         
         project = st.session_state.get("project")
         
+        st.caption("PINs are stored hashed and cannot be shown. Leave a field blank to keep the current PIN.")
+        
         # Control PIN section
         with st.expander("🎯 Control Access", expanded=True):
             pwd_control = st.text_input("Control PIN", 
-                                      value=st.session_state.get("pin_control", "9999"), 
+                                      value="", 
                                       type="password", 
                                       key="pin_control_panel_cp",
-                                      help="Master control access PIN")
+                                      help="Master control access PIN" + ("" if has_custom_pin("control") else " (currently the default PIN)"))
         
         # Forces PIN section
         if SIDES:
             with st.expander(f"⚔️ Force Access ({len(SIDES)} forces configured)", expanded=True):
                 force_pins = {}
                 for force in SIDES:
-                    st.session_state.setdefault(f"pin_{force}", "0000")
                     force_pins[force] = st.text_input(
                         f"{force.capitalize()} Force PIN", 
-                        value=st.session_state.get(f"pin_{force}", "0000"), 
+                        value="", 
                         type="password", 
                         key=f"pin_{force}_panel_cp",
-                        help=f"Access PIN for {force.capitalize()} force operations"
+                        help=f"Access PIN for {force.capitalize()} force operations" + ("" if has_custom_pin(force) else " (currently the default PIN)")
                     )
                 
                 # Save all PINs button
                 if st.button("💾 Save All PINs", key="save_all_pins_panel_cp", type="primary"):
-                    st.session_state["pin_control"] = pwd_control
-                    for force, pin_val in force_pins.items():
-                        st.session_state[f"pin_{force}"] = pin_val
-                    st.success("✅ All PINs updated successfully!")
+                    try:
+                        changed = set_pins(dict(force_pins, control=pwd_control))
+                        if changed:
+                            st.success(f"✅ PINs updated for: {', '.join(role.capitalize() for role in changed)}")
+                        else:
+                            st.info("ℹ️ No PINs entered; nothing changed.")
+                    except Exception as e:
+                        st.error(f"Error saving PINs: {str(e)}")
         else:
             st.info("ℹ️ No forces configured. Use Force Manager to add forces first.")
     
@@ -4400,7 +4104,7 @@ def control_panel_tab():
         
         # RAG settings display
         st.markdown("**� Current RAG Thresholds**")
-        rag = st.session_state.get("rag", {"red": 40, "amber": 70})
+        rag = get_rag_thresholds(st.session_state.get("project"))
         col_rag1, col_rag2, col_rag3 = st.columns(3)
         with col_rag1:
             st.metric("🔴 Red Zone", f"0-{rag['red']}%")
@@ -4408,6 +4112,51 @@ def control_panel_tab():
             st.metric("🟡 Amber Zone", f"{rag['red']+1}-{rag['amber']}%")
         with col_rag3:
             st.metric("🟢 Green Zone", f"{rag['amber']+1}-100%")
+        
+        # Session memory: keys held for this browser session, by namespace
+        st.markdown("**🧠 Session Memory**")
+        report = session_memory_report(st.session_state)
+        col_mem1, col_mem2, col_mem3 = st.columns(3)
+        with col_mem1:
+            st.metric("Session Keys", report["keys"])
+        with col_mem2:
+            st.metric("Approx. Size", f"{report['bytes'] / 1024:.1f} KB")
+        with col_mem3:
+            st.metric("Keys Evicted", report["evicted"])
+        st.dataframe(pd.DataFrame([{
+            "Namespace": row["namespace"],
+            "Keys": row["keys"],
+            "Size (KB)": round(row["bytes"] / 1024, 1)
+        } for row in report["namespaces"]]), use_container_width=True, hide_index=True)
+
+        st.markdown("**⏱️ Page Timings**")
+        timings = page_timing_report(st.session_state)
+        cold = timings["cold_start"]
+        if cold:
+            st.metric("Cold Start", f"{cold['ms']:.0f} ms",
+                      delta=f"{cold['ms'] - cold['budget_ms']:+.0f} ms vs {cold['budget_ms']} ms budget",
+                      delta_color="inverse", help=f"First run of this server process ({cold['page']}), including imports")
+        if timings["pages"]:
+            st.dataframe(pd.DataFrame([{
+                "Page": row["page"],
+                "Runs": row["runs"],
+                "Last (ms)": round(row["last_ms"]),
+                "Mean (ms)": round(row["mean_ms"]),
+                "Max (ms)": round(row["max_ms"]),
+                "Budget (ms)": row["budget_ms"],
+                "Over Budget": row["over_budget"]
+            } for row in timings["pages"]]), use_container_width=True, hide_index=True)
+
+        # Dashboard figures shared by all sessions, keyed by data version
+        from ahp_charts import FIGURE_CACHE_SIZE, figure_cache_size, clear_figure_cache
+        st.markdown("**📈 Chart Cache**")
+        col_chart1, col_chart2 = st.columns(2)
+        with col_chart2:
+            if st.button("🧹 Clear Chart Cache", key="clear_chart_cache", help="Charts are rebuilt on their next view"):
+                clear_figure_cache()
+                st.success("✅ Chart cache cleared")
+        with col_chart1:
+            st.metric("Cached Figures", f"{figure_cache_size()} / {FIGURE_CACHE_SIZE}")
 
 # --- Force Manager Tab ---
 def force_manager_tab():
@@ -4444,6 +4193,7 @@ def force_manager_tab():
 
 # --- Theater Command Tab ---
 def theater_command_tab():
+    from ahp_theater import THEATER_MODES, get_theater_mode, create_theater, assign_force, unassign_force, delete_theater
     st.header("🏛️ Theater Command")
     st.write("Manage theater groupings and view combined progress.")
     
@@ -4465,14 +4215,41 @@ def theater_command_tab():
     st.subheader("📊 Current Theater Status")
     
     if theater_config["theaters"]:
+        # Aggregation mode is stored with the theater config so every view agrees
+        current_mode = get_theater_mode(theater_config)
+        mode = st.selectbox("Theater aggregation", list(THEATER_MODES.keys()),
+                            index=list(THEATER_MODES.keys()).index(current_mode),
+                            format_func=THEATER_MODES.get, key="theater_mode_select")
+        if mode != current_mode:
+            theater_config["mode"] = mode
+            save_theater_config(project, theater_config)
+        
+        if mode == "force_weight":
+            with st.expander("⚖️ Force Weights", expanded=False):
+                force_weights = theater_config.get("force_weights", {})
+                weight_cols = st.columns(min(len(available_forces), 4))
+                new_weights = {}
+                for idx, force in enumerate(available_forces):
+                    with weight_cols[idx % len(weight_cols)]:
+                        new_weights[force] = st.number_input(f"{force.capitalize()}", min_value=0.0,
+                                                             value=float(force_weights.get(force, 1)), step=0.5,
+                                                             key=f"force_weight_{force}")
+                if st.button("💾 Save Force Weights", key="save_force_weights"):
+                    theater_config["force_weights"] = new_weights
+                    save_theater_config(project, theater_config)
+                    st.success("Force weights saved")
+                    st.rerun()
+        
+        # All theaters in one batch; each force is only re-read after it has been saved
+        theater_results = calculate_all_theater_progress(project, theater_config)
+        
         # Create columns for theater overview
         theater_names = list(theater_config["theaters"].keys())
         if theater_names:
             cols = st.columns(len(theater_names))
             for idx, (theater_name, theater_data) in enumerate(theater_config["theaters"].items()):
                 with cols[idx]:
-                    # Calculate theater progress
-                    theater_progress = calculate_theater_progress(project, theater_data["forces"])
+                    theater_progress = theater_results[theater_name]["progress"]
                     
                     # Progress color coding
                     progress_color = "#ef4444" if theater_progress < 30 else "#f59e0b" if theater_progress < 70 else "#10b981"
@@ -4483,7 +4260,7 @@ def theater_command_tab():
                         <h4 style="color:white; margin:0; text-align:center; text-shadow:none; font-weight:600;">🏛️ {theater_name}</h4>
                         <div style="text-align:center; margin:0.5rem 0;">
                             <span style="font-size:2rem; font-weight:bold; color:{progress_color}; text-shadow:none;">{theater_progress:.1f}%</span><br>
-                            <span style="color:#e5e7eb; font-size:0.9rem; text-shadow:none;">Average Progress</span>
+                            <span style="color:#e5e7eb; font-size:0.9rem; text-shadow:none;">{"Average Progress" if mode == "equal" else "Weighted Progress"}</span>
                         </div>
                         <div style="color:#e5e7eb; font-size:0.85rem; text-align:center; text-shadow:none;">
                             Forces: {len(theater_data["forces"])}<br>
@@ -4497,11 +4274,11 @@ def theater_command_tab():
                         st.session_state[f"managing_theater"] = theater_name
                     if st.button(f"Delete {theater_name}", key=f"delete_{theater_name}", type="secondary"):
                         # Move forces back to unassigned
-                        theater_config["unassigned_forces"].extend(theater_data["forces"])
-                        del theater_config["theaters"][theater_name]
+                        delete_theater(theater_config, theater_name)
                         save_theater_config(project, theater_config)
                         st.success(f"Deleted theater {theater_name}")
                         st.rerun()
+        show_theater_drilldown(project, theater_config)
     else:
         st.info("No theaters configured yet. Create your first theater below.")
     
@@ -4531,7 +4308,7 @@ def theater_command_tab():
     
     with col2:
         # Get unassigned forces for selection
-        unassigned = [f for f in available_forces if f not in [force for theater in theater_config["theaters"].values() for force in theater["forces"]]]
+        unassigned = theater_config["unassigned_forces"]
         if unassigned:
             selected_forces = st.multiselect("Select Forces for Theater", unassigned)
         else:
@@ -4540,12 +4317,7 @@ def theater_command_tab():
     
     if st.button("Create Theater", type="primary") and new_theater_name and selected_forces:
         if new_theater_name not in theater_config["theaters"]:
-            theater_config["theaters"][new_theater_name] = {
-                "forces": selected_forces,
-                "created_date": str(datetime.now().date())
-            }
-            # Remove forces from unassigned list
-            theater_config["unassigned_forces"] = [f for f in theater_config["unassigned_forces"] if f not in selected_forces]
+            create_theater(theater_config, new_theater_name, selected_forces)
             save_theater_config(project, theater_config)
             st.success(f"Created theater '{new_theater_name}' with forces: {', '.join([f.capitalize() for f in selected_forces])}")
             st.rerun()
@@ -4580,13 +4352,15 @@ def theater_command_tab():
             col_add, col_remove = st.columns(2)
             
             with col_add:
-                # Forces available to add
-                available_to_add = [f for f in available_forces if f not in current_forces]
+                # Forces available to add (forces in other theaters are moved here)
+                assignments = theater_config["assignments"]
+                available_to_add = [f for f in available_forces if assignments.get(f) != managing]
                 if available_to_add:
-                    forces_to_add = st.multiselect("Add Forces", available_to_add, key=f"add_forces_{managing}")
+                    forces_to_add = st.multiselect("Add Forces", available_to_add, key=f"add_forces_{managing}",
+                                                   format_func=lambda f: f"{f} (from {assignments[f]})" if f in assignments else f)
                     if st.button("Add Selected Forces", key=f"add_btn_{managing}") and forces_to_add:
-                        theater_config["theaters"][managing]["forces"].extend(forces_to_add)
-                        theater_config["unassigned_forces"] = [f for f in theater_config["unassigned_forces"] if f not in forces_to_add]
+                        for force in forces_to_add:
+                            assign_force(theater_config, force, managing)
                         save_theater_config(project, theater_config)
                         st.success(f"Added forces to {managing}")
                         st.rerun()
@@ -4595,65 +4369,172 @@ def theater_command_tab():
                 if current_forces:
                     forces_to_remove = st.multiselect("Remove Forces", current_forces, key=f"remove_forces_{managing}")
                     if st.button("Remove Selected Forces", key=f"remove_btn_{managing}") and forces_to_remove:
-                        theater_config["theaters"][managing]["forces"] = [f for f in current_forces if f not in forces_to_remove]
-                        theater_config["unassigned_forces"].extend(forces_to_remove)
+                        for force in forces_to_remove:
+                            unassign_force(theater_config, force)
                         save_theater_config(project, theater_config)
                         st.success(f"Removed forces from {managing}")
                         st.rerun()
             
+            if get_theater_mode(theater_config) == "theater_weight" and current_forces:
+                st.write(f"**⚖️ Force Weights in {managing}:**")
+                theater_weights = theater_data.get("weights", {})
+                weight_cols = st.columns(min(len(current_forces), 4))
+                new_weights = {}
+                for idx, force in enumerate(current_forces):
+                    with weight_cols[idx % len(weight_cols)]:
+                        new_weights[force] = st.number_input(f"{force.capitalize()}", min_value=0.0,
+                                                             value=float(theater_weights.get(force, 1)), step=0.5,
+                                                             key=f"theater_weight_{managing}_{force}")
+                if st.button("💾 Save Theater Weights", key=f"save_theater_weights_{managing}"):
+                    theater_config["theaters"][managing]["weights"] = new_weights
+                    save_theater_config(project, theater_config)
+                    st.success(f"Saved force weights for {managing}")
+                    st.rerun()
+            
             if st.button("Done Managing", key=f"done_{managing}"):
                 del st.session_state["managing_theater"]
                 st.rerun()
 
+def show_theater_drilldown(project, theater_config):
+    """Drill from theater down to tasks using the precomputed aggregate tree"""
+    import pandas as pd
+    from ahp_theater import TREE_LEVELS, build_theater_tree, get_tree_node, get_tree_children, worst_nodes
+    st.markdown("---")
+    st.subheader("🔎 Theater Drill-Down")
+    
+    try:
+        tree = build_theater_tree(project, theater_config)
+    except Exception as e:
+        st.error(f"Error building theater tree: {str(e)}")
+        return
+    
+    level_names = {"force": "Force", "phase": "Phase", "objective": "Objective", "dp": "Decisive Point", "task": "Task"}
+    drill_tab, worst_tab = st.tabs(["🧭 Drill-Down", "⚠️ Lowest Progress"])
+    
+    with drill_tab:
+        # Each selection is a dictionary lookup into the cached tree
+        node_id = ()
+        path = st.columns(5)
+        for depth, column in enumerate(path):
+            children = get_tree_children(tree, node_id)
+            if not children:
+                break
+            level = children[0]["level"]
+            with column:
+                options = [None] + [child["id"] for child in children]
+                choice = st.selectbox(
+                    level_names.get(level, level.capitalize()) if level != "theater" else "Theater",
+                    options,
+                    format_func=lambda c: "— All —" if c is None else f"{get_tree_node(tree, c)['name']} ({get_tree_node(tree, c)['progress']:.1f}%)",
+                    key=f"drill_{depth}_{'/'.join(map(str, node_id))}"
+                )
+            if choice is None:
+                break
+            node_id = choice
+        
+        node = get_tree_node(tree, node_id)
+        children = get_tree_children(tree, node_id)
+        if node_id:
+            st.metric(f"{node['name']} Progress", f"{node['progress']:.1f}%")
+        if children:
+            rows = []
+            for child in children:
+                row = {level_names.get(child["level"], child["level"].capitalize()): child["name"],
+                       "Progress %": f"{child['progress']:.1f}"}
+                if child["level"] == "force":
+                    row["Weight"] = f"{child.get('weight', 0):g}"
+                row["Items"] = len(child["children"])
+                rows.append(row)
+            display_force_table(pd.DataFrame(rows), key=f"drill_{'/'.join(map(str, node_id))}")
+    
+    with worst_tab:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            theater_scope = st.selectbox("Theater", [None] + list(theater_config["theaters"].keys()),
+                                         format_func=lambda t: "All Theaters" if t is None else t, key="worst_theater")
+        with col2:
+            level = st.selectbox("Level", [l for l in TREE_LEVELS if l not in ("theater",)], index=3,
+                                 format_func=level_names.get, key="worst_level")
+        with col3:
+            count = st.number_input("Show", min_value=1, max_value=100, value=10, key="worst_count")
+        
+        nodes = worst_nodes(tree, level, theater_scope, int(count))
+        if nodes:
+            display_force_table(pd.DataFrame([{
+                "Theater": n["id"][0],
+                "Force": n["id"][1].capitalize(),
+                level_names[level]: n["name"],
+                "Path": " › ".join(str(get_tree_node(tree, n["id"][:i])["name"]) for i in range(3, len(n["id"]))),
+                "Progress %": f"{n['progress']:.1f}"
+            } for n in nodes]), key="worst_nodes")
+        else:
+            st.info("No items at this level.")
+
 # --- Main Routing ---
+# Sidebar selection -> page function. Pages import their heavy dependencies
+# themselves, so a run only loads what the selected page needs.
+PAGES = {
+    "Phases": phases_tab,
+    "Objectives": objectives_tab,
+    "Decisive Points": dps_tab,
+    "Tasks": tasks_tab,
+    "KO Method": ko_tab,
+    "Progress Entry": progress_entry_tab,
+    "Dashboard": dashboard_tab,
+    "Chat": chat_tab,
+    "Force Progress Entry": force_progress_entry_tab,
+    "Force Dashboard": force_dashboard_tab,
+    "Control Panel": control_panel_tab,
+    "Force Manager": force_manager_tab,
+    "Theater Command": theater_command_tab,
+    "Project Management": project_management,
+    "Logout": clear_session
+}
+
+# Page -> stylesheets in static/ it needs beyond ahp.css, injected by main()
+PAGE_STYLESHEETS = {
+    "Phases": ("tables.css",),
+    "Objectives": ("tables.css",),
+    "Decisive Points": ("tables.css",),
+    "Tasks": ("tables.css",),
+    "KO Method": ("tables.css",),
+    "Progress Entry": ("progress.css",),
+    "Dashboard": ("tables.css", "cards.css"),
+    "Chat": ("chat.css",),
+    "Force Progress Entry": ("progress.css",),
+    "Force Dashboard": ("tables.css",),
+    "Theater Command": ("tables.css",),
+}
+
 def main():
     global SIDES
     # Reload forces in case they were modified
     SIDES = load_forces()
     
-    if "role" not in st.session_state:
-        login()
-        return
-    if "project" not in st.session_state:
-        projects = list_projects()
-        if projects:
-            st.session_state["project"] = projects[0]
-        else:
-            st.session_state["project"] = "Demo"
-            for side in SIDES:
-                save_project("Demo", side, DEFAULT_STRUCTURE)
-    selected = sidebar()
-    if selected == "Phases":
-        phases_tab()
-    elif selected == "Objectives":
-        objectives_tab()
-    elif selected == "Decisive Points":
-        dps_tab()
-    elif selected == "Tasks":
-        tasks_tab()
-    elif selected == "KO Method":
-        ko_tab()
-    elif selected == "Progress Entry":
-        progress_entry_tab()
-    elif selected == "Dashboard":
-        dashboard_tab()
-    elif selected == "Chat":
-        chat_tab()
-    elif selected == "Force Progress Entry":
-        force_progress_entry_tab()
-    elif selected == "Force Dashboard":
-        force_dashboard_tab()
-    elif selected == "Control Panel":
-        control_panel_tab()
-    elif selected == "Force Manager":
-        force_manager_tab()
-    elif selected == "Theater Command":
-        theater_command_tab()
-    elif selected == "Project Management":
-        project_management()
-    elif selected == "Logout":
-        clear_session()
-    show_footer()
+    page = "Login"
+    try:
+        if "role" not in st.session_state:
+            login()
+            return
+        if "project" not in st.session_state:
+            projects = list_projects()
+            if projects:
+                st.session_state["project"] = projects[0]
+            else:
+                st.session_state["project"] = "Demo"
+                for side in SIDES:
+                    save_project("Demo", side, DEFAULT_STRUCTURE)
+        page = sidebar()
+        # Drop widget/cache keys of pages that are no longer on screen
+        enter_page(st.session_state, page, st.session_state.get("project"))
+        if page in PAGE_STYLESHEETS:
+            st.markdown(stylesheet_tags(PAGE_STYLESHEETS[page]), unsafe_allow_html=True)
+        if page in PAGES:
+            PAGES[page]()
+        show_footer()
+    finally:
+        # Runs cut short by st.rerun() are timed too; they are real work for the user
+        record_page_time(st.session_state, page, (time.perf_counter() - _RUN_STARTED) * 1000)
 
 if __name__ == "__main__":
     main()